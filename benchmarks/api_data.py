@@ -0,0 +1,125 @@
+"""Energy-ES - Benchmarks - API data.
+
+This module generates API responses so that the benchmarks don't depend on the
+network nor on the test suite.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Iterator
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+import json
+
+from energy_es.data.intervals import get_day_minutes, get_day_start
+
+
+# API response data
+def get_spot_data(start: date, end: date, resolution: int = 60) -> dict:
+    """Return the Spot Market API response data of a date range.
+
+    :param start: Start date.
+    :param end: End date (included).
+    :param resolution: Resolution (in minutes) of the values.
+    :return: Response data.
+    """
+    tz = ZoneInfo("Europe/Madrid")
+    days = (end - start).days + 1
+    spot = []
+
+    for i in range(days):
+        day = start + timedelta(days=i)
+        day_start = get_day_start(day)
+
+        spot.extend(
+            {
+                "datetime": (
+                    day_start + timedelta(minutes=j * resolution)
+                ).astimezone(tz).isoformat(),
+                "value": 100.10
+            }
+            for j in range(get_day_minutes(day) // resolution)
+        )
+
+    return {
+        "included": [
+            {
+                "type": "spot",
+                "attributes": {
+                    "values": spot
+                }
+            }
+        ]
+    }
+
+
+def get_pvpc_data(day: date) -> dict:
+    """Return the PVPC API response data of a day.
+
+    :param day: Date.
+    :return: Response data.
+    """
+    tz = ZoneInfo("Europe/Madrid")
+    day_start = get_day_start(day)
+    hours = get_day_minutes(day) // 60
+
+    def get_hour(i: int) -> str:
+        return (day_start + timedelta(hours=i)).astimezone(tz).strftime("%H")
+
+    pvpc = [
+        {
+            "Dia": day.strftime("%d/%m/%Y"),
+            "Hora": get_hour(i) + "-" + get_hour(i + 1),
+            "PCB": "100,25",
+            "CYM": "150"
+        }
+        for i in range(hours)
+    ]
+
+    return {
+        "PVPC": pvpc
+    }
+
+
+# Fake "energy_es.data.transport.Transport"
+class FakeTransport:
+    """Transport that returns generated API responses."""
+
+    def __init__(self, spot_resolution: int = 60):
+        """Initializer.
+
+        :param spot_resolution: Resolution (in minutes) of the Spot Market
+        values.
+        """
+        self.urls = []
+        self._spot_resolution = spot_resolution
+
+    def get_json(self, url: str) -> Any:
+        """Make a GET request and return the response data.
+
+        :param url: Request URL.
+        :return: Response data (parsed JSON).
+        """
+        self.urls.append(url)
+        params = parse_qs(urlparse(url).query)
+
+        if url.startswith("https://apidatos.ree.es/"):
+            start = date.fromisoformat(params["start_date"][0][:10])
+            end = date.fromisoformat(params["end_date"][0][:10])
+
+            return get_spot_data(start, end, self._spot_resolution)
+        elif url.startswith("https://api.esios.ree.es/"):
+            return get_pvpc_data(date.fromisoformat(params["date"][0]))
+        else:
+            raise Exception("Invalid URL")
+
+    def iter_text(self, url: str, chunk_size: int = 65536) -> Iterator[str]:
+        """Make a GET request and iterate over the response body.
+
+        :param url: Request URL.
+        :param chunk_size: Maximum number of characters of each chunk.
+        :return: Iterator of strings (chunks of the body).
+        """
+        body = json.dumps(self.get_json(url))
+
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
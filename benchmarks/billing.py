@@ -0,0 +1,111 @@
+"""Energy-ES - Benchmarks - Billing.
+
+This script measures the throughput (meters per second) of the bill
+simulation of `energy_es.data.billing` with a year of hourly consumption per
+meter, with a single worker process and with a process pool.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from os import cpu_count
+from os.path import dirname, abspath, join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import argparse
+import sys
+
+import numpy as np
+
+# We include the "src" directory in "sys.path" so that we can import
+# "energy_es" (the API responses are generated by "api_data").
+_dir = dirname(abspath(__file__))
+sys.path.append(join(_dir, "..", "src"))
+
+from api_data import FakeTransport  # noqa: E402
+
+from energy_es.data.billing import simulate_bills  # noqa: E402
+from energy_es.data.history import HistoryStore  # noqa: E402
+from energy_es.data.prices import PricesManager  # noqa: E402
+
+
+def _write_meters(dir: str, meters: int, start: date, days: int) -> list[str]:
+    """Write consumption files with random hourly values.
+
+    :param dir: Destination directory.
+    :param meters: Number of files.
+    :param start: Start date.
+    :param days: Number of days of each file.
+    :return: File paths.
+    """
+    rng = np.random.default_rng(0)
+
+    # UTC start datetime of every hour of the days (Europe/Madrid)
+    dt = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+    dt -= timedelta(hours=1)
+
+    hours = [
+        (dt + timedelta(hours=i)).isoformat() for i in range(days * 24)
+    ]
+
+    paths = []
+
+    for i in range(meters):
+        path = join(dir, f"meter_{i}.csv")
+        values = rng.uniform(0, 3, len(hours)).round(3)
+
+        with open(path, "w") as f:
+            f.write("datetime,consumption\n")
+            f.writelines(f"{h},{v}\n" for h, v in zip(hours, values.tolist()))
+
+        paths.append(path)
+
+    return paths
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput of the bill simulation."
+    )
+
+    parser.add_argument(
+        "-m", "--meters", type=int, default=200,
+        help="number of meters (default: 200)"
+    )
+
+    args = parser.parse_args()
+
+    start = date(2022, 1, 1)
+    end = date(2022, 12, 31)
+    days = (end - start).days + 1
+
+    pm = PricesManager(FakeTransport(), HistoryStore(":memory:"))
+    pm.get_prices_range(start, end)
+
+    with TemporaryDirectory() as tmp:
+        paths = _write_meters(tmp, args.meters, start, days)
+
+        print(f"{'Workers':>7} {'Meters':>7} {'Meters/s':>10} {'Rows/s':>12}")
+
+        for workers in sorted({1, cpu_count() or 1}):
+            t0 = perf_counter()
+
+            res = list(simulate_bills(
+                paths, start, end, workers=workers, prices_manager=pm
+            ))
+
+            elapsed = perf_counter() - t0
+            errors = [r["error"] for r in res if "error" in r]
+
+            if errors:
+                raise Exception(errors[0])
+
+            rate = len(paths) / elapsed
+
+            print(
+                f"{workers:>7} {len(paths):>7} {rate:>10,.1f} "
+                f"{rate * days * 24:>12,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
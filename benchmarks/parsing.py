@@ -0,0 +1,116 @@
+"""Energy-ES - Benchmarks - Parsing.
+
+This script measures the parse throughput (rows per second) of the API
+responses with the per-row parsing of `PricesManager` and with the batch
+parsing of `energy_es.data.parsing`.
+"""
+
+from datetime import date, timedelta
+from os.path import dirname, abspath, join
+from time import perf_counter
+from typing import Any, Callable
+import argparse
+import sys
+
+# We include the "src" directory in "sys.path" so that we can import
+# "energy_es" (the API responses are generated by "api_data").
+_dir = dirname(abspath(__file__))
+sys.path.append(join(_dir, "..", "src"))
+
+from api_data import get_pvpc_data, get_spot_data  # noqa: E402
+
+from energy_es.data.history import HistoryStore  # noqa: E402
+from energy_es.data.parsing import parse_pvpc, parse_spot_market  # noqa: E402
+from energy_es.data.prices import PricesManager  # noqa: E402
+
+
+class _PayloadTransport:
+    """Transport that returns a fixed response."""
+
+    def __init__(self, data: Any):
+        """Class initializer.
+
+        :param data: Response data.
+        """
+        self.data = data
+
+    def get_json(self, url: str) -> Any:
+        """Return the response data.
+
+        :param url: Request URL.
+        :return: Response data.
+        """
+        return self.data
+
+
+def _measure(func: Callable, rows: int, repeat: int) -> float:
+    """Return the throughput of a function.
+
+    :param func: Function to call.
+    :param rows: Number of rows parsed by each call.
+    :param repeat: Number of calls.
+    :return: Rows per second.
+    """
+    func()  # Warm-up
+    start = perf_counter()
+
+    for _ in range(repeat):
+        func()
+
+    return rows * repeat / (perf_counter() - start)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Measure the parse throughput of the API responses."
+    )
+
+    parser.add_argument(
+        "-d", "--days", type=int, default=31,
+        help="days of each Spot Market response (default: 31)"
+    )
+
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=50,
+        help="number of times each response is parsed (default: 50)"
+    )
+
+    args = parser.parse_args()
+
+    start = date(2022, 1, 1)
+    end = start + timedelta(days=args.days - 1)
+
+    spot = get_spot_data(start, end)
+    pvpc = get_pvpc_data(start)
+
+    store = HistoryStore(":memory:")
+    spot_pm = PricesManager(_PayloadTransport(spot), store)
+    pvpc_pm = PricesManager(_PayloadTransport(pvpc), store)
+
+    cases = (
+        (
+            "Spot Market", 24 * args.days,
+            lambda: spot_pm._get_spot_market_data(start, end),
+            lambda: parse_spot_market(spot, start, end)
+        ),
+        (
+            "PVPC", 24,
+            lambda: pvpc_pm._get_updated_pvpc_data(start),
+            lambda: parse_pvpc(pvpc, start)
+        )
+    )
+
+    print(f"{'Response':<12} {'Rows':>6} {'Per row':>14} {'Batch':>14}")
+
+    for name, rows, per_row, batch in cases:
+        per_row = _measure(per_row, rows, args.repeat)
+        batch = _measure(batch, rows, args.repeat)
+
+        print(
+            f"{name:<12} {rows:>6} {per_row:>10,.0f} r/s {batch:>10,.0f} r/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
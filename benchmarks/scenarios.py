@@ -0,0 +1,91 @@
+"""Energy-ES - Benchmarks - Scenarios.
+
+This script measures the time taken to compute the cost matrix of M hourly
+load profiles of a year with S tariffs (10,000 x 10 by default) with
+`energy_es.data.scenarios.evaluate_scenarios`, in a single process and in a
+process pool, and checks that both results are the same.
+"""
+
+from datetime import date
+from os import cpu_count
+from os.path import dirname, abspath, join
+from time import perf_counter
+import argparse
+import sys
+
+import numpy as np
+
+# We include the "src" directory in "sys.path" so that we can import
+# "energy_es" (the API responses are generated by "api_data").
+_dir = dirname(abspath(__file__))
+sys.path.append(join(_dir, "..", "src"))
+
+from api_data import FakeTransport  # noqa: E402
+
+from energy_es.data.history import HistoryStore  # noqa: E402
+from energy_es.data.prices import PricesManager  # noqa: E402
+from energy_es.data.scenarios import Tariff, evaluate_scenarios  # noqa: E402
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Measure the time taken to compute a cost matrix."
+    )
+
+    parser.add_argument(
+        "-m", "--profiles", type=int, default=10000,
+        help="number of load profiles (default: 10000)"
+    )
+
+    parser.add_argument(
+        "-s", "--tariffs", type=int, default=10,
+        help="number of tariffs (default: 10)"
+    )
+
+    args = parser.parse_args()
+
+    start = date(2022, 1, 1)
+    end = date(2022, 12, 31)
+
+    pm = PricesManager(FakeTransport(), HistoryStore(":memory:"))
+    intervals = len(pm.get_prices_range(start, end, format="array")["time"])
+
+    # Profiles and tariffs (a discount or surcharge of each series)
+    rng = np.random.default_rng(0)
+    loads = rng.uniform(0, 3, (args.profiles, intervals))
+
+    tariffs = [
+        Tariff(f"Tariff {i}", Tariff.SERIES[i % 3], 0.9 + i / 50)
+        for i in range(args.tariffs)
+    ]
+
+    print(
+        f"{args.profiles:,} profiles x {intervals:,} intervals x "
+        f"{args.tariffs} tariffs"
+    )
+
+    print(f"{'Workers':>7} {'Seconds':>8} {'Profiles/s':>12}")
+    results = []
+
+    for workers in sorted({1, cpu_count() or 1, 2}):
+        t0 = perf_counter()
+
+        costs = evaluate_scenarios(
+            loads, tariffs, start, end, workers=workers, prices_manager=pm
+        )
+
+        elapsed = perf_counter() - t0
+        results.append(costs)
+
+        print(
+            f"{workers:>7} {elapsed:>8.3f} "
+            f"{args.profiles / elapsed:>12,.0f}"
+        )
+
+    same = all((r == results[0]).all() for r in results)
+    print(f"Same results with any number of workers: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Energy-ES - Benchmarks - Server.
+
+This script measures the throughput (requests per second) of the prices server
+of `energy_es.server` with many clients that request the prices of the
+current day through keep-alive connections. The server runs in another
+process, but both processes may share the same CPU cores, so the result is a
+lower bound.
+"""
+
+from multiprocessing import Process, Queue
+from os.path import dirname, abspath, join
+from time import perf_counter
+import argparse
+import asyncio
+import sys
+
+# We include the "src" directory in "sys.path" so that we can import
+# "energy_es" (the API responses are generated by "api_data").
+_dir = dirname(abspath(__file__))
+sys.path.append(join(_dir, "..", "src"))
+
+from api_data import FakeTransport  # noqa: E402
+
+from energy_es.data.history import HistoryStore  # noqa: E402
+from energy_es.data.prices import PricesManager  # noqa: E402
+from energy_es.server import PricesServer  # noqa: E402
+
+
+def _run_server(ports: Queue):
+    """Run the prices server.
+
+    :param ports: Queue to which the port of the server is put.
+    """
+    async def serve():
+        pm = PricesManager(FakeTransport(), HistoryStore(":memory:"))
+        server = PricesServer(pm, port=0)
+
+        await server.start()
+        ports.put(server.port)
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+async def _run_client(port: int, target: str, count: int, etag: bool):
+    """Make requests through a keep-alive connection.
+
+    :param port: Server port.
+    :param target: Request target.
+    :param count: Number of requests.
+    :param etag: Whether to make conditional requests.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode()
+
+    for _ in range(count):
+        writer.write(request)
+        head = await reader.readuntil(b"\r\n\r\n")
+        headers = {}
+
+        for line in head.decode("latin-1").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            headers[name.lower()] = value.strip()
+
+        if "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+
+        if etag and "etag" in headers:
+            request = (
+                f"GET {target} HTTP/1.1\r\nHost: localhost\r\n"
+                f"If-None-Match: {headers['etag']}\r\n\r\n"
+            ).encode()
+
+    writer.close()
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput of the prices server."
+    )
+
+    parser.add_argument(
+        "-c", "--clients", type=int, default=50,
+        help="number of concurrent clients (default: 50)"
+    )
+
+    parser.add_argument(
+        "-n", "--requests", type=int, default=200,
+        help="number of requests of each client (default: 200)"
+    )
+
+    args = parser.parse_args()
+
+    ports = Queue()
+    server = Process(target=_run_server, args=(ports,), daemon=True)
+    server.start()
+    port = ports.get()
+
+    print(f"{'Target':<48} {'Requests':>9} {'Requests/s':>11}")
+
+    tests = [
+        ("/prices", False),
+        ("/prices?format=csv&unit=k", False),
+        ("/prices (If-None-Match)", True),
+        ("/prices/range?start=2022-01-01&end=2022-01-31", False)
+    ]
+
+    try:
+        for name, etag in tests:
+            target = name.split(" ")[0]
+
+            async def run():
+                await asyncio.gather(*(
+                    _run_client(port, target, args.requests, etag)
+                    for _ in range(args.clients)
+                ))
+
+            # Warm-up (the first request renders the response)
+            asyncio.run(_run_client(port, target, 1, etag))
+
+            t0 = perf_counter()
+            asyncio.run(run())
+            elapsed = perf_counter() - t0
+
+            total = args.clients * args.requests
+            print(f"{name:<48} {total:>9,} {total / elapsed:>11,.0f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
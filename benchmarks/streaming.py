@@ -0,0 +1,122 @@
+"""Energy-ES - Benchmarks - Streaming.
+
+This script measures the peak memory used to get the prices of date ranges of
+different lengths and save them to the cache, with `get_prices_range` (the API
+responses are parsed in batch) and with `update_range` (the Spot Market
+responses are parsed in streaming mode).
+"""
+
+from datetime import date, timedelta
+from os.path import dirname, abspath, join
+from typing import Any, Callable, Iterator
+import argparse
+import json
+import sys
+import tracemalloc
+
+# We include the "src" directory in "sys.path" so that we can import
+# "energy_es" (the API responses are generated by "api_data").
+_dir = dirname(abspath(__file__))
+sys.path.append(join(_dir, "..", "src"))
+
+from api_data import FakeTransport  # noqa: E402
+
+from energy_es.data.history import HistoryStore  # noqa: E402
+from energy_es.data.prices import PricesManager  # noqa: E402
+
+
+class _BodyTransport:
+    """Transport that returns response bodies generated in advance, so that
+    generating them isn't measured.
+    """
+
+    def __init__(self, start: date, end: date):
+        """Class initializer.
+
+        :param start: Start date of the range.
+        :param end: End date of the range (included).
+        """
+        mock = FakeTransport()
+        PricesManager(mock, HistoryStore(":memory:")).update_range(start, end)
+
+        urls = list(mock.urls)
+        self._bodies = {u: json.dumps(mock.get_json(u)) for u in urls}
+
+    def get_json(self, url: str) -> Any:
+        """Return the response data.
+
+        :param url: Request URL.
+        :return: Response data (parsed JSON).
+        """
+        return json.loads(self._bodies[url])
+
+    def iter_text(self, url: str, chunk_size: int = 65536) -> Iterator[str]:
+        """Iterate over the response body.
+
+        :param url: Request URL.
+        :param chunk_size: Maximum number of characters of each chunk.
+        :return: Iterator of strings (chunks of the body).
+        """
+        body = self._bodies[url]
+
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+
+
+def _measure(func: Callable) -> float:
+    """Return the peak memory used by a function.
+
+    :param func: Function to call.
+    :return: Peak memory (in MB).
+    """
+    tracemalloc.start()
+
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Measure the peak memory used to get date ranges."
+    )
+
+    parser.add_argument(
+        "-d", "--days", type=int, nargs="+", default=[31, 365, 730],
+        help="numbers of days of the ranges (default: 31 365 730)"
+    )
+
+    args = parser.parse_args()
+    start = date(2020, 1, 1)
+
+    # Warm-up (e.g. the NumPy import isn't measured)
+    PricesManager(
+        _BodyTransport(start, start), HistoryStore(":memory:")
+    ).get_prices_range(start, start)
+
+    print(f"{'Days':>6} {'get_prices_range':>18} {'update_range':>14}")
+
+    for days in args.days:
+        end = start + timedelta(days=days - 1)
+        transport = _BodyTransport(start, end)
+
+        batch = _measure(
+            lambda: PricesManager(
+                transport, HistoryStore(":memory:")
+            ).get_prices_range(start, end)
+        )
+
+        streaming = _measure(
+            lambda: PricesManager(
+                transport, HistoryStore(":memory:")
+            ).update_range(start, end)
+        )
+
+        print(f"{days:>6} {batch:>15.1f} MB {streaming:>11.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
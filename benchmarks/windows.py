@@ -0,0 +1,109 @@
+"""Energy-ES - Benchmarks - Windows.
+
+This script measures the time taken to find the cheapest window and the
+cheapest intervals of quarter-hour prices of different numbers of days, both
+with the functions of `energy_es.data.windows` and with
+`PricesManager.get_cheapest_window` (which also reads the prices from the
+cache).
+"""
+
+from datetime import date, datetime, time, timedelta
+from os.path import dirname, abspath, join
+from time import perf_counter
+from typing import Callable
+import argparse
+import sys
+
+import numpy as np
+
+# We include the "src" directory in "sys.path" so that we can import
+# "energy_es" (the API responses are generated by "api_data").
+_dir = dirname(abspath(__file__))
+sys.path.append(join(_dir, "..", "src"))
+
+from api_data import FakeTransport  # noqa: E402
+
+from energy_es.data.history import HistoryStore  # noqa: E402
+from energy_es.data.intervals import TZ  # noqa: E402
+from energy_es.data.prices import PricesManager  # noqa: E402
+
+from energy_es.data.windows import (  # noqa: E402
+    find_cheapest_intervals, find_cheapest_window
+)
+
+
+def _measure(func: Callable, repeat: int) -> float:
+    """Return the mean duration of a function call.
+
+    :param func: Function to call.
+    :param repeat: Number of calls.
+    :return: Microseconds.
+    """
+    func()  # Warm-up
+    start = perf_counter()
+
+    for _ in range(repeat):
+        func()
+
+    return (perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Measure the time taken to find the cheapest intervals."
+    )
+
+    parser.add_argument(
+        "--hours", type=int, default=4,
+        help="hours of the window and number of hours (default: 4)"
+    )
+
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=100,
+        help="number of times each search is done (default: 100)"
+    )
+
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    count = args.hours * 4
+
+    start = date(2022, 1, 1)
+    store = HistoryStore(":memory:")
+    pm = PricesManager(FakeTransport(15), store)
+
+    print(
+        f"{'Days':>6} {'Intervals':>10} {'Window':>12} {'Intervals':>12} "
+        f"{'Cached range':>14}"
+    )
+
+    for days in (1, 31, 365, 730):
+        values = rng.uniform(0, 300, days * 96)
+        end = start + timedelta(days=days - 1)
+
+        window = _measure(
+            lambda: find_cheapest_window(values, count), args.repeat
+        )
+
+        intervals = _measure(
+            lambda: find_cheapest_intervals(values, count), args.repeat
+        )
+
+        # The days are saved to the cache by the warm-up call
+        t1 = datetime.combine(start, time(0), TZ)
+        t2 = datetime.combine(end + timedelta(days=1), time(0), TZ)
+
+        cached = _measure(
+            lambda: pm.get_cheapest_window(t1, t2, args.hours),
+            max(args.repeat // 10, 1)
+        )
+
+        print(
+            f"{days:>6} {len(values):>10} {window:>9,.0f} µs "
+            f"{intervals:>9,.0f} µs {cached:>11,.0f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -46,7 +46,12 @@ if __name__ == "__main__":
         },
         entry_points={
             "console_scripts": [
-                "energy-es=energy_es:main"
+                "energy-es=energy_es:main",
+                "energy-es-prices=energy_es.cli:main",
+                "energy-es-backfill=energy_es.data.backfill:main",
+                "energy-es-bills=energy_es.data.billing:main",
+                "energy-es-prefetch=energy_es.data.scheduler:main",
+                "energy-es-server=energy_es.server:main"
             ]
         }
     )
@@ -5,15 +5,46 @@ the hourly values of the Spot Market and PVPC energy prices of the current day
 in Spain. The data is provided by some APIs of "Red Eléctrica de España".
 """
 
-# We import the "energy_es.env" module to set a environment variable before
-# importing PySide6 through the "energy_es.ui" module.
-from energy_es import env
-from energy_es.ui import start_ui
-
+from typing import Optional
 
 __version__ = "0.1.0"
 
 
-def main():
-    """Application main function."""
-    start_ui()
+def main(args: Optional[list[str]] = None):
+    """Application main function.
+
+    The user interface modules are imported here instead of at the top of the
+    module, so that the data modules (e.g. "energy_es.data.prices") can be
+    imported without importing PySide6 (and "argparse" is imported here too,
+    as this module is imported by all of them).
+
+    :param args: Command-line arguments. If it's None (default), the arguments
+    of the current process are used.
+    """
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(
+        prog="energy-es",
+        description=(
+            "Show a chart with the Spot Market and PVPC energy prices of the "
+            "current day in Spain."
+        )
+    )
+
+    parser.add_argument(
+        "--chart", choices=("web", "native"), default=None,
+        help=(
+            "Chart backend: \"web\" (Plotly chart) or \"native\" (lighter "
+            "chart drawn with Qt, for devices with little memory). Default: "
+            "value of the ENERGY_ES_CHART environment variable or \"web\"."
+        )
+    )
+
+    parsed_args = parser.parse_args(args)
+
+    # We import the "energy_es.env" module to set a environment variable before
+    # importing PySide6 through the "energy_es.ui" module.
+    from energy_es import env
+    from energy_es.ui import start_ui
+
+    start_ui(parsed_args.chart)
@@ -0,0 +1,224 @@
+"""Energy-ES - Command-Line Interface."""
+
+from argparse import ArgumentParser
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from typing import Optional
+import csv
+import json
+import sys
+
+from energy_es.data.intervals import RESOLUTIONS, TZ
+from energy_es.data.prices import PricesManager
+
+
+# Output formats
+FORMATS = ("table", "json", "csv")
+
+# Columns of the CSV and table formats
+PRICE_COLUMNS = ("spot_market", "pvpc_pcb", "pvpc_cm")
+
+
+def _get_columns(prices: dict) -> list[str]:
+    """Return the columns of the CSV and table formats.
+
+    :param prices: Prices as returned by `PricesManager.get_prices` or
+    `PricesManager.get_prices_range`.
+    :return: Column names.
+    """
+    data = prices["data"]
+    date_col = ["date"] if data and "date" in data[0] else []
+
+    # The results of the cheapest window and hours only have one series
+    price_cols = [
+        c for c in PRICE_COLUMNS if not data or c in data[0]
+    ]
+
+    return date_col + ["time"] + price_cols
+
+
+def format_json(prices: dict) -> str:
+    """Return the prices as a JSON string.
+
+    :param prices: Prices as returned by `PricesManager.get_prices` or
+    `PricesManager.get_prices_range`.
+    :return: JSON string.
+    """
+    return json.dumps(prices, indent=2, ensure_ascii=False)
+
+
+def format_csv(prices: dict) -> str:
+    """Return the prices as a CSV string.
+
+    :param prices: Prices as returned by `PricesManager.get_prices` or
+    `PricesManager.get_prices_range`.
+    :return: CSV string.
+    """
+    cols = _get_columns(prices)
+
+    f = StringIO()
+    writer = csv.DictWriter(f, cols, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(prices["data"])
+
+    return f.getvalue()
+
+
+def format_table(prices: dict) -> str:
+    """Return the prices as a text table.
+
+    :param prices: Prices as returned by `PricesManager.get_prices` or
+    `PricesManager.get_prices_range`.
+    :return: Table string.
+    """
+    cols = _get_columns(prices)
+    unit = prices["price_unit"]
+
+    header = [
+        f"{c} ({unit})" if c in PRICE_COLUMNS else c for c in cols
+    ]
+
+    rows = [[str(x[c]) for c in cols] for x in prices["data"]]
+
+    widths = [
+        max([len(header[i])] + [len(r[i]) for r in rows])
+        for i in range(len(cols))
+    ]
+
+    lines = [
+        "  ".join(v.rjust(w) for v, w in zip(r, widths))
+        for r in [header] + rows
+    ]
+
+    return "\n".join(lines) + "\n"
+
+
+def _get_cheapest(pm: PricesManager, args) -> dict:
+    """Return the cheapest window or hours of the period of the arguments.
+
+    The period is the date range of the arguments or, if there isn't any,
+    from the current time until the end of the last day in the cache (the
+    next day, if its prices are already published).
+
+    :param pm: Prices manager.
+    :param args: Parsed command-line arguments.
+    :return: Cheapest window or hours as returned by
+    `PricesManager.get_cheapest_window` or `PricesManager.get_cheapest_hours`.
+    """
+    if args.start is None:
+        start = datetime.now(TZ)
+        last = start.date() + timedelta(days=1)
+
+        if not pm.is_cached(last):
+            last = start.date()
+    else:
+        start = datetime.combine(args.start, time(0), TZ)
+        last = args.end or args.start
+
+    end = datetime.combine(last + timedelta(days=1), time(0), TZ)
+
+    if args.window is not None:
+        find = pm.get_cheapest_window
+        hours = args.window
+    else:
+        find = pm.get_cheapest_hours
+        hours = args.cheapest
+
+    return find(start, end, hours, args.series, args.unit, args.resolution)
+
+
+def main(args: Optional[list[str]] = None):
+    """Command-line interface main function.
+
+    This function prints the prices as JSON, CSV or a text table. It doesn't
+    import PySide6, so it can be used on systems without a display.
+
+    :param args: Command-line arguments. If it's None (default), the arguments
+    of the current process are used.
+    """
+    parser = ArgumentParser(
+        prog="energy-es-prices",
+        description=(
+            "Print the Spot Market and PVPC energy prices of the current day "
+            "(or of a date range) in Spain."
+        )
+    )
+
+    parser.add_argument(
+        "-f", "--format", choices=FORMATS, default="table",
+        help="Output format. Default: table."
+    )
+
+    parser.add_argument(
+        "-u", "--unit", choices=("k", "m"), default="m",
+        help='Prices unit: "k" (€/kWh) or "m" (€/MWh). Default: m.'
+    )
+
+    parser.add_argument(
+        "-r", "--resolution", type=int, choices=RESOLUTIONS,
+        help="Length (in minutes) of the intervals of the prices. Default: "
+        "resolution of the market data."
+    )
+
+    parser.add_argument(
+        "-s", "--start", type=date.fromisoformat,
+        help="Start date (YYYY-MM-DD) of a date range."
+    )
+
+    parser.add_argument(
+        "-e", "--end", type=date.fromisoformat,
+        help="End date (YYYY-MM-DD), included, of a date range. Default: "
+        "start date."
+    )
+
+    cheapest = parser.add_mutually_exclusive_group()
+
+    cheapest.add_argument(
+        "-w", "--window", type=int, metavar="HOURS",
+        help="Print the cheapest window of consecutive hours of the date "
+        "range (or, without a date range, from now on)."
+    )
+
+    cheapest.add_argument(
+        "-c", "--cheapest", type=int, metavar="HOURS",
+        help="Print the cheapest hours (not necessarily consecutive) of the "
+        "date range (or, without a date range, from now on)."
+    )
+
+    parser.add_argument(
+        "--series", choices=PRICE_COLUMNS, default="spot_market",
+        help="Prices series of --window and --cheapest. Default: spot_market."
+    )
+
+    args = parser.parse_args(args)
+
+    if args.end is not None and args.start is None:
+        parser.error("the --end argument requires the --start argument")
+
+    try:
+        pm = PricesManager()
+
+        if args.window is not None or args.cheapest is not None:
+            prices = _get_cheapest(pm, args)
+        elif args.start is None:
+            prices = pm.get_prices(args.unit, resolution=args.resolution)
+        else:
+            end = args.end or args.start
+
+            prices = pm.get_prices_range(
+                args.start, end, args.unit, resolution=args.resolution
+            )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.format == "json":
+        print(format_json(prices))
+    elif args.format == "csv":
+        sys.stdout.write(format_csv(prices))
+    else:
+        sys.stdout.write(format_table(prices))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,591 @@
+"""Energy-ES - Data - Async Prices."""
+
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+import asyncio
+
+from energy_es.data.history import HistoryStore, get_default_store
+from energy_es.data.intervals import check_resolution
+from energy_es.data.locks import AsyncSingleFlight
+from energy_es.data.parsing import parse_pvpc, parse_spot_market
+from energy_es.data.prices import BasePricesManager
+from energy_es.data.transport import AsyncTransport
+
+
+class AsyncPricesManager(BasePricesManager):
+    """Asynchronous prices manager.
+
+    This class is the asyncio counterpart of `PricesManager`: its public
+    methods are coroutines with the same parameters and results. The APIs are
+    called through an asynchronous transport, so the event loop is never
+    blocked by the network, and the history store is only accessed in
+    threads. The API responses are parsed and checked, and the prices are
+    converted and formatted, by the same code as in `PricesManager` (see
+    `BasePricesManager`). It isn't a subclass of `PricesManager`, so it can't
+    be used where a blocking prices manager is expected.
+
+    The API requests of a date range are made concurrently, with up to
+    `max_requests` requests at a time. If several tasks need the data of the
+    same day (or date range) at the same time, the APIs are only called once
+    and the rest of the tasks wait for it (single-flight). An instance must
+    only be used in one event loop.
+    """
+
+    # Default maximum number of concurrent API requests
+    MAX_REQUESTS = 8
+
+    def __init__(
+        self,
+        transport: Optional[AsyncTransport] = None,
+        store: Optional[HistoryStore] = None,
+        max_requests: int = MAX_REQUESTS
+    ):
+        """Class initializer.
+
+        Unlike `PricesManager`, the data of the current day isn't loaded from
+        the store until the first call, and the default store is created then
+        (in a thread), so the initializer never blocks.
+
+        :param transport: Transport used to call the APIs. It can be any
+        object with an awaitable `get_json` method (see `AsyncTransport`). If
+        it's None (default), a new `AsyncTransport` is used.
+        :param store: History store used as cache. If it's None (default), the
+        store shared by all the instances is used.
+        :param max_requests: Maximum number of concurrent API requests.
+        """
+        self._transport = transport or AsyncTransport()
+        self._store = store
+        self._prices = None
+
+        self._max_requests = max_requests
+        self._semaphore = None
+        self._flight = AsyncSingleFlight()
+
+        # Background update tasks (stale-while-revalidate mode)
+        self._refresh_tasks = set()
+
+    async def _get_store(self) -> HistoryStore:
+        """Return the history store, creating the default one if needed.
+
+        :return: History store.
+        """
+        if self._store is None:
+            self._store = await asyncio.to_thread(get_default_store)
+
+        return self._store
+
+    @asynccontextmanager
+    async def _hold_file_lock(self) -> AsyncIterator[None]:
+        """Hold the lock that coordinates the data updates of the processes
+        that share the cache (see `BasePricesManager._get_file_lock`).
+
+        The lock is acquired in a thread, so waiting for other processes
+        doesn't block the event loop.
+        """
+        lock = self._get_file_lock()
+        acquire = asyncio.ensure_future(asyncio.to_thread(lock.__enter__))
+
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The lock is released as soon as the thread acquires it
+            def release(f: asyncio.Future):
+                if not f.cancelled() and f.exception() is None:
+                    lock.__exit__()
+
+            acquire.add_done_callback(release)
+            raise
+
+        try:
+            yield
+        finally:
+            lock.__exit__()
+
+    async def _fetch(
+        self, url: str, parse: Callable[..., Any], *args
+    ) -> Any:
+        """Make a request to an API and parse the response data.
+
+        At most `max_requests` requests are made at the same time.
+
+        :param url: Request URL.
+        :param parse: Function that receives the response data and `args` and
+        returns the parsed data.
+        :param args: Arguments of the parse function.
+        :return: Parsed data.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_requests)
+
+        async with self._semaphore:
+            data = await self._transport.get_json(url)
+
+        return parse(data, *args)
+
+    async def _gather(
+        self, calls: dict[str, Awaitable], timeout: Optional[float] = None
+    ) -> dict:
+        """Run some calls concurrently and return their results.
+
+        This method is the asyncio counterpart of
+        `PricesManager._run_parallel`: if any of the calls fails or the
+        deadline is reached, an exception is raised and the pending calls are
+        cancelled.
+
+        :param calls: Dictionary which keys are the call names and which values
+        are awaitables.
+        :param timeout: Deadline (in seconds) shared by all the calls. If it's
+        None (default), there's no deadline.
+        :return: Dictionary which keys are the call names and which values are
+        the call results.
+        """
+        tasks = {k: asyncio.ensure_future(v) for k, v in calls.items()}
+
+        try:
+            done, _ = await asyncio.wait(
+                tasks.values(), timeout=timeout,
+                return_when=asyncio.FIRST_EXCEPTION
+            )
+
+            for k, t in tasks.items():
+                if t in done and t.exception() is not None:
+                    raise Exception(
+                        f"{k} data couldn't be updated: {t.exception()}"
+                    ) from t.exception()
+
+            for k, t in tasks.items():
+                if t not in done:
+                    raise Exception(
+                        f"{k} data couldn't be updated: No response received "
+                        f"in {timeout} seconds."
+                    )
+
+            return {k: t.result() for k, t in tasks.items()}
+        finally:
+            for t in tasks.values():
+                if not t.done():
+                    t.cancel()
+                elif not t.cancelled():
+                    # We retrieve every exception to avoid warnings
+                    t.exception()
+
+    async def _get_updated_day(self, day_em: date) -> dict:
+        """Get the data of a day by calling the APIs and save it to the cache.
+
+        This method holds the cache file lock, as
+        `PricesManager._get_updated_data` does.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: Dictionary with the same structure as `_prices`.
+        """
+        async with self._hold_file_lock():
+            # Another process may have got the data while we were waiting
+            prices = await asyncio.to_thread(self._store.get_day, day_em)
+
+            if prices is not None:
+                return prices
+
+            now = datetime.now()
+
+            res = await self._gather(
+                {
+                    "Spot Market": self._fetch(
+                        self._get_spot_market_url(day_em, day_em),
+                        self._parse_spot_market_data, day_em, day_em
+                    ),
+                    "PVPC": self._fetch(
+                        self._get_pvpc_url(day_em), self._parse_pvpc_data,
+                        day_em
+                    )
+                },
+                self.UPDATE_TIMEOUT
+            )
+
+            prices = self._merge_data(
+                day_em, now.timestamp(), res["Spot Market"][day_em],
+                res["PVPC"]
+            )
+
+            await asyncio.to_thread(self._store.set_day, day_em, prices)
+
+            return prices
+
+    async def _get_day_data(self, day_em: date) -> dict:
+        """Get the data of a day from the cache or, if it isn't there, by
+        calling the APIs.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: Dictionary with the same structure as `_prices`.
+        """
+        key = (self._get_store_key(), day_em)
+        return await self._flight.do(key, self._get_updated_day, day_em)
+
+    async def _get_updated_days(self, days: list[date], end: date) -> int:
+        """Get the data of some days by calling the APIs and save it to the
+        cache.
+
+        The requests are the same as the ones of
+        `PricesManager._get_data_range` (a Spot Market request for every
+        `SPOT_MAX_DAYS` days and a PVPC request for each day).
+
+        :param days: Sorted list of the days (in the Europe/Madrid time zone).
+        :param end: Last date of the Spot Market requests.
+        :return: Number of days saved to the cache.
+        """
+        now = datetime.now()
+        calls = {}
+
+        for s, e in self._get_spot_ranges(days, end):
+            calls[f"Spot Market ({s} - {e})"] = self._fetch(
+                self._get_spot_market_url(s, e), parse_spot_market, s, e
+            )
+
+        for d in days:
+            calls[f"PVPC ({d})"] = self._fetch(
+                self._get_pvpc_url(d), parse_pvpc, d
+            )
+
+        res = await self._gather(calls)
+        spot = {}
+
+        for k, v in res.items():
+            if k.startswith("Spot Market"):
+                spot.update(v)
+
+        fetched = {
+            d: self._merge_arrays(
+                d, now.timestamp(), spot[d], res[f"PVPC ({d})"]
+            )
+            for d in days
+        }
+
+        await asyncio.to_thread(self._store.set_days, fetched)
+
+        return len(fetched)
+
+    async def _get_missing_days(self, start: date, end: date) -> list[date]:
+        """Return the days of a date range that aren't in the cache.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :return: Sorted list of dates.
+        """
+        if start > end:
+            raise Exception(
+                "Invalid date range. The start date is after the end date."
+            )
+
+        store = await self._get_store()
+        stored = await asyncio.to_thread(store.get_stored_dates, start, end)
+
+        return [
+            d for d in (
+                start + timedelta(days=i)
+                for i in range((end - start).days + 1)
+            )
+            if d not in stored
+        ]
+
+    async def _update_data_range(self, start: date, end: date):
+        """Get the data of the days of a date range that aren't in the cache
+        and save it to the cache.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        """
+        missing = await self._get_missing_days(start, end)
+
+        if missing:
+            key = (self._get_store_key(), tuple(missing))
+            await self._flight.do(key, self._get_updated_days, missing, end)
+
+    def _refresh_data(
+        self,
+        unit: str,
+        format: str,
+        resolution: Optional[int],
+        on_update: Optional[Callable[[dict], None]],
+        on_error: Optional[Callable[[Exception], None]]
+    ):
+        """Update the data in a background task.
+
+        :param unit: Prices unit of the data passed to `on_update`.
+        :param format: Prices format of the data passed to `on_update`.
+        :param resolution: Prices resolution of the data passed to
+        `on_update`.
+        :param on_update: Function to call, in the event loop, with the
+        updated prices (in the format of `get_prices`).
+        :param on_error: Function to call, in the event loop, with the
+        exception raised if the data couldn't be updated.
+        """
+        async def refresh():
+            try:
+                self._prices = await self._get_day_data(self._get_today_em())
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+
+                return
+
+            if on_update is not None:
+                prices = self._get_prices(
+                    self._prices, unit, format, resolution
+                )
+
+                prices["stale"] = False
+                on_update(prices)
+
+        # We keep a reference to the task until it finishes
+        task = asyncio.ensure_future(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def get_prices(
+        self,
+        unit: str = "m",
+        stale_ok: bool = False,
+        format: str = "dict",
+        resolution: Optional[int] = None,
+        on_update: Optional[Callable[[dict], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None
+    ) -> dict:
+        """Return the energy prices (of either Spot Market or PVPC) of the
+        current day in Spain.
+
+        See `PricesManager.get_prices`. In the stale-while-revalidate mode,
+        the data of the current day is got in a background task of the event
+        loop, which calls `on_update` or `on_error`.
+
+        :param unit: Prices unit ("k" or "m"). Default: "m".
+        :param stale_ok: Whether to use the stale-while-revalidate mode.
+        :param format: Prices format ("dict" or "array"). Default: "dict".
+        :param resolution: Resolution (in minutes) of the prices.
+        :param on_update: Function to call with the updated prices if the
+        returned prices are stale.
+        :param on_error: Function to call with the exception raised if the
+        returned prices are stale and the data couldn't be updated.
+        :return: Prices.
+        """
+        # Check units, format and resolution
+        unit = self._check_unit(unit)
+        format = self._check_format(format)
+
+        if resolution is not None:
+            resolution = check_resolution(resolution)
+
+        store = await self._get_store()
+        today = self._get_today_em()
+
+        if not self._is_data_valid():
+            self._prices = await asyncio.to_thread(store.get_day, today)
+
+        if not self._is_data_valid():
+            stale = None
+
+            if stale_ok:
+                day = await asyncio.to_thread(store.get_last_day, today)
+
+                if day is not None:
+                    stale = await asyncio.to_thread(store.get_day, day)
+
+            if stale is None:
+                self._prices = await self._get_day_data(today)
+            else:
+                self._refresh_data(
+                    unit, format, resolution, on_update, on_error
+                )
+
+                prices = self._get_prices(stale, unit, format, resolution)
+                prices["stale"] = True
+
+                return prices
+
+        prices = self._get_prices(self._prices, unit, format, resolution)
+
+        if stale_ok:
+            prices["stale"] = False
+
+        return prices
+
+    async def is_cached(self, day_em: date) -> bool:
+        """Return whether the data of a day is in the cache.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: Whether the data is in the cache.
+        """
+        store = await self._get_store()
+
+        dates = await asyncio.to_thread(
+            store.get_stored_dates, day_em, day_em
+        )
+
+        return bool(dates)
+
+    async def prefetch(self, day_em: date):
+        """Get the data of a day and save it to the cache, if it isn't there.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        """
+        await self._get_store()
+        await self._get_day_data(day_em)
+
+    async def update_range(self, start: date, end: date) -> int:
+        """Get the data of the days of a date range that aren't in the cache
+        and save it to the cache.
+
+        The days are got by Spot Market request ranges (see
+        `PricesManager.update_range`), so at most the data of `SPOT_MAX_DAYS`
+        days is in memory.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :return: Number of days saved to the cache.
+        """
+        missing = await self._get_missing_days(start, end)
+
+        for s, e in self._get_spot_ranges(missing, end):
+            days = [d for d in missing if s <= d <= e]
+            key = (self._get_store_key(), tuple(days))
+
+            await self._flight.do(key, self._get_updated_days, days, e)
+
+        return len(missing)
+
+    async def get_prices_range(
+        self,
+        start: date,
+        end: date,
+        unit: str = "m",
+        format: str = "dict",
+        resolution: Optional[int] = None
+    ) -> dict:
+        """Return the energy prices (of either Spot Market or PVPC) of a date
+        range in Spain.
+
+        See `PricesManager.get_prices_range`. The days that aren't in the
+        cache are got from the APIs concurrently.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :param unit: Prices unit ("k" or "m"). Default: "m".
+        :param format: Prices format ("dict" or "array"). Default: "dict".
+        :param resolution: Resolution (in minutes) of the prices.
+        :return: Prices.
+        """
+        unit = self._check_unit(unit)
+        format = self._check_format(format)
+
+        if resolution is not None:
+            resolution = check_resolution(resolution)
+
+        await self._update_data_range(start, end)
+
+        # All the days are in the cache, so the prices are only read from it
+        return await asyncio.to_thread(
+            self._read_prices_range, start, end, unit, format, resolution
+        )
+
+    async def _find_cheapest_async(
+        self,
+        start: datetime,
+        end: datetime,
+        hours: int,
+        series: str,
+        unit: str,
+        resolution: Optional[int],
+        window: bool
+    ) -> dict:
+        """Find the cheapest intervals of a period.
+
+        :param start: Start datetime of the period.
+        :param end: End datetime of the period (not included).
+        :param hours: Number of hours to find.
+        :param series: Prices series.
+        :param unit: Prices unit.
+        :param resolution: Resolution (in minutes) of the prices.
+        :param window: Whether to find consecutive intervals.
+        :return: Dictionary with the structure of the values returned by
+        `get_cheapest_window` and `get_cheapest_hours`.
+        """
+        unit = self._check_unit(unit)
+        series = self._check_series(series)
+
+        if resolution is not None:
+            resolution = check_resolution(resolution)
+
+        start, end, last = self._check_period(start, end)
+        await self._update_data_range(start.date(), last)
+
+        # All the days are in the cache, so the prices are only read from it
+        prices = await asyncio.to_thread(
+            self._read_arrays_range, start.date(), last, unit, resolution
+        )
+
+        return await asyncio.to_thread(
+            self._select_cheapest, prices, start, end, hours, series, window
+        )
+
+    async def get_cheapest_window(
+        self,
+        start: datetime,
+        end: datetime,
+        hours: int,
+        series: str = "spot_market",
+        unit: str = "m",
+        resolution: Optional[int] = None
+    ) -> dict:
+        """Return the cheapest window of consecutive hours of a period.
+
+        See `PricesManager.get_cheapest_window`.
+
+        :param start: Start datetime of the period.
+        :param end: End datetime of the period (not included).
+        :param hours: Number of hours of the window.
+        :param series: Prices series. Default: "spot_market".
+        :param unit: Prices unit ("k" or "m"). Default: "m".
+        :param resolution: Resolution (in minutes) of the prices.
+        :return: Cheapest window.
+        """
+        return await self._find_cheapest_async(
+            start, end, hours, series, unit, resolution, True
+        )
+
+    async def get_cheapest_hours(
+        self,
+        start: datetime,
+        end: datetime,
+        hours: int,
+        series: str = "spot_market",
+        unit: str = "m",
+        resolution: Optional[int] = None
+    ) -> dict:
+        """Return the cheapest hours (not necessarily consecutive) of a
+        period.
+
+        See `PricesManager.get_cheapest_hours`.
+
+        :param start: Start datetime of the period.
+        :param end: End datetime of the period (not included).
+        :param hours: Number of hours.
+        :param series: Prices series. Default: "spot_market".
+        :param unit: Prices unit ("k" or "m"). Default: "m".
+        :param resolution: Resolution (in minutes) of the prices.
+        :return: Cheapest hours.
+        """
+        return await self._find_cheapest_async(
+            start, end, hours, series, unit, resolution, False
+        )
+
+    async def close(self):
+        """Cancel the background update tasks and close the transport.
+
+        The transport is only closed if it has a `close` coroutine method.
+        """
+        for task in list(self._refresh_tasks):
+            task.cancel()
+
+        close = getattr(self._transport, "close", None)
+
+        if close is not None:
+            await close()
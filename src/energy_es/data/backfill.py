@@ -0,0 +1,263 @@
+"""Energy-ES - Data - Backfill."""
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from time import monotonic
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+import sys
+
+from energy_es.data.history import HistoryStore, get_default_store
+from energy_es.data.prices import PricesManager
+
+from energy_es.data.transport import (
+    RateLimitedTransport, Transport, get_default_transport
+)
+
+
+class Backfill:
+    """Historical prices backfill.
+
+    This class gets the hourly values of the Spot Market and PVPC energy prices
+    of all the days of a date range and saves them to a history store. The days
+    are split into chunks of consecutive days, which are got in parallel by a
+    bounded pool of workers, and the API requests are rate limited.
+
+    Each day is saved to the store as soon as its data is received (see
+    `PricesManager.update_range`), so the store itself is the checkpoint: if a
+    backfill is interrupted, running it again only gets the days that aren't in
+    the store yet.
+    """
+
+    # Maximum number of parallel PVPC requests of each chunk, so that the
+    # backfill uses at most `workers` × (1 + CHUNK_PVPC_WORKERS) threads
+    CHUNK_PVPC_WORKERS = 1
+
+    def __init__(
+        self,
+        start: date,
+        end: date,
+        workers: int = 4,
+        rate: float = 5.0,
+        chunk_days: int = 7,
+        transport: Optional[Transport] = None,
+        store: Optional[HistoryStore] = None
+    ):
+        """Class initializer.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :param workers: Number of chunks got in parallel.
+        :param rate: Maximum number of API requests per second.
+        :param chunk_days: Maximum number of days of each chunk.
+        :param transport: Transport used to call the APIs. If it's None
+        (default), the default transport is used.
+        :param store: Destination store. If it's None (default), the default
+        store is used.
+        """
+        if start > end:
+            raise Exception(
+                "Invalid date range. The start date is after the end date."
+            )
+
+        if workers < 1 or chunk_days < 1:
+            raise Exception(
+                "Invalid backfill parameters. The number of workers and the "
+                "number of days per chunk must be greater than 0."
+            )
+
+        self.start = start
+        self.end = end
+        self.workers = workers
+        self.chunk_days = chunk_days
+
+        self._store = store or get_default_store()
+
+        transport = RateLimitedTransport(
+            transport or get_default_transport(), rate
+        )
+
+        self._prices_manager = PricesManager(transport, self._store)
+
+    def get_pending_days(self) -> list[date]:
+        """Return the days of the range that aren't in the store.
+
+        :return: Sorted list of dates.
+        """
+        stored = self._store.get_stored_dates(self.start, self.end)
+        days = (self.end - self.start).days + 1
+
+        return [
+            d for d in (self.start + timedelta(days=i) for i in range(days))
+            if d not in stored
+        ]
+
+    def get_chunks(self) -> list[tuple[date, date]]:
+        """Return the chunks of consecutive pending days.
+
+        :return: Sorted list of tuples, each one with the start and end dates
+        (included) of a chunk.
+        """
+        chunks = []
+
+        for d in self.get_pending_days():
+            if chunks:
+                s, e = chunks[-1]
+
+                if (
+                    d == e + timedelta(days=1) and
+                    (d - s).days < self.chunk_days
+                ):
+                    chunks[-1] = (s, d)
+                    continue
+
+            chunks.append((d, d))
+
+        return chunks
+
+    def run(
+        self, on_progress: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+        """Run the backfill.
+
+        A chunk that can't be got doesn't stop the backfill. It's reported as
+        failed and its days that weren't saved can be got by running the
+        backfill again.
+
+        :param on_progress: Function called, in the caller thread, each time a
+        chunk is finished. The function receives a dictionary with the same
+        structure as the one returned by this method.
+        :return: Dictionary with the "total" (number of pending days when
+        the backfill started), "done" (number of saved days), "skipped"
+        (number of days of the failed chunks that weren't saved), "failed"
+        (list of failed chunks, each one a tuple with its start date, end date
+        and error message), "elapsed" (seconds) and "rate" (saved days per
+        second) keys.
+        """
+        chunks = self.get_chunks()
+        total = sum((e - s).days + 1 for s, e in chunks)
+
+        status = {
+            "total": total,
+            "done": 0,
+            "skipped": 0,
+            "failed": [],
+            "elapsed": 0.0,
+            "rate": 0.0
+        }
+
+        t0 = monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(
+                    self._prices_manager.update_range, s, e,
+                    self.CHUNK_PVPC_WORKERS
+                ): (s, e)
+                for s, e in chunks
+            }
+
+            for f in as_completed(futures):
+                s, e = futures[f]
+
+                if f.exception() is None:
+                    status["done"] += (e - s).days + 1
+                else:
+                    # The days of the chunk saved before the error are kept
+                    stored = self._store.get_stored_dates(s, e)
+
+                    status["done"] += len(stored)
+                    status["skipped"] += (e - s).days + 1 - len(stored)
+                    status["failed"].append((s, e, str(f.exception())))
+
+                elapsed = monotonic() - t0
+                status["elapsed"] = elapsed
+                status["rate"] = status["done"] / elapsed if elapsed else 0.0
+
+                if on_progress is not None:
+                    on_progress(status)
+
+        status["failed"].sort()
+        return status
+
+
+def main():
+    """Backfill main function.
+
+    This function gets the prices of a date range and saves them to the
+    default store, printing the progress.
+    """
+    today_em = datetime.now().astimezone(ZoneInfo("Europe/Madrid")).date()
+
+    parser = ArgumentParser(
+        prog="energy-es-backfill",
+        description=(
+            "Get the Spot Market and PVPC prices of a date range and save "
+            "them to the local cache. Days already in the cache are skipped, "
+            "so an interrupted backfill resumes where it stopped."
+        )
+    )
+
+    parser.add_argument(
+        "start", type=date.fromisoformat, help="Start date (YYYY-MM-DD)"
+    )
+
+    parser.add_argument(
+        "end", type=date.fromisoformat, nargs="?", default=today_em,
+        help="End date (YYYY-MM-DD), included. Default: current date."
+    )
+
+    parser.add_argument(
+        "-w", "--workers", type=int, default=4,
+        help="Number of chunks got in parallel. Default: 4."
+    )
+
+    parser.add_argument(
+        "-r", "--rate", type=float, default=5.0,
+        help="Maximum number of API requests per second. Default: 5."
+    )
+
+    parser.add_argument(
+        "-c", "--chunk-days", type=int, default=7,
+        help="Maximum number of days of each chunk. Default: 7."
+    )
+
+    args = parser.parse_args()
+
+    def on_progress(status: dict):
+        done = status["done"] + status["skipped"]
+        total = status["total"]
+        pct = (done / total * 100) if total else 100.0
+
+        print(
+            f"{done}/{total} days ({pct:.1f}%), "
+            f"{len(status['failed'])} failed chunks, "
+            f"{status['rate']:.2f} days/s",
+            file=sys.stderr
+        )
+
+    try:
+        backfill = Backfill(
+            args.start, args.end, args.workers, args.rate, args.chunk_days
+        )
+
+        status = backfill.run(on_progress)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(
+        f"{status['done']} days saved in {status['elapsed']:.1f} seconds.",
+        file=sys.stderr
+    )
+
+    for s, e, error in status["failed"]:
+        print(f"Chunk {s} - {e} failed: {error}", file=sys.stderr)
+
+    if status["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""Energy-ES - Data - Billing."""
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+import csv
+import sys
+
+from energy_es.data.intervals import RESOLUTIONS, get_starts
+from energy_es.data.parsing import parse_datetimes
+from energy_es.data.prices import PricesManager, get_default_prices_manager
+
+# The consumption profiles may have thousands of rows (e.g. 8760 for a year of
+# hourly values) and there may be thousands of them, so they're priced with
+# vectorized NumPy operations and read in chunks. NumPy is imported when the
+# functions are called, so that importing this module is fast.
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Prices series
+SERIES = ("spot_market", "pvpc_pcb", "pvpc_cm")
+
+# Periods of the cost breakdowns and their NumPy datetime units
+PERIODS = {"day": "D", "month": "M", "year": "Y"}
+
+# Columns of the consumption files
+DATETIME_COLUMN = "datetime"
+CONSUMPTION_COLUMN = "consumption"
+
+# Engine of the current worker process (see `_init_worker`)
+_worker_engine: Optional["CostEngine"] = None
+
+
+def iter_consumption(
+    path: str, chunk_rows: int = 8760
+) -> Iterator[tuple["np.ndarray", "np.ndarray"]]:
+    """Read a consumption file in chunks.
+
+    The file is a CSV file with a header and, at least, a column named
+    "datetime", with the start datetime (ISO 8601 with a UTC offset, e.g.
+    "2022-12-15T00:00:00+01:00") of each interval, and a column named
+    "consumption", with the consumption (kWh) of the interval. The file is
+    read as UTF-8, with or without a byte order mark (BOM).
+
+    :param path: File path.
+    :param chunk_rows: Maximum number of rows of each chunk.
+    :return: Iterator of tuples, each one with a NumPy array (datetime64[m])
+    with the UTC start datetimes of the intervals of a chunk and a NumPy array
+    (float) with their consumption.
+    """
+    import numpy as np
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [c.strip().lower() for c in next(reader, [])]
+
+        if DATETIME_COLUMN not in header or CONSUMPTION_COLUMN not in header:
+            raise Exception(
+                "Invalid consumption file. It must have a "
+                f'"{DATETIME_COLUMN}" column and a "{CONSUMPTION_COLUMN}" '
+                "column."
+            )
+
+        dt_col = header.index(DATETIME_COLUMN)
+        cons_col = header.index(CONSUMPTION_COLUMN)
+
+        dts = []
+        values = []
+
+        for row in reader:
+            if not row:
+                continue
+
+            dts.append(row[dt_col].strip())
+            values.append(row[cons_col])
+
+            if len(dts) == chunk_rows:
+                yield parse_datetimes(dts), np.array(values, dtype=np.float64)
+
+                dts = []
+                values = []
+
+        if dts:
+            yield parse_datetimes(dts), np.array(values, dtype=np.float64)
+
+
+class CostEngine:
+    """Consumption cost engine.
+
+    This class computes the energy cost of consumption profiles (e.g. the
+    hourly consumption of smart meters) with the Spot Market and PVPC prices
+    of a date range. Each consumption value is joined with the prices of the
+    interval that starts at the same time, and the costs are added by period
+    (e.g. by month) with vectorized operations.
+
+    The costs only include the energy term (consumption multiplied by price),
+    without any fixed term, tax or fee.
+    """
+
+    # Maximum number of rows of a consumption file that are read at a time
+    CHUNK_ROWS = 8760
+
+    def __init__(self, prices: dict, period: str = "month"):
+        """Class initializer.
+
+        :param prices: Prices as returned by `PricesManager.get_prices_range`
+        in the "array" format, in €/MWh.
+        :param period: Period of the cost breakdowns. It must be "day",
+        "month" (default) or "year".
+        """
+        import numpy as np
+
+        if period not in PERIODS:
+            raise Exception(
+                'Invalid period. It must be "day", "month" or "year".'
+            )
+
+        if prices["price_unit"] != "€/MWh":
+            raise Exception("Invalid prices. They must be in €/MWh.")
+
+        self.period = period
+        self._starts = get_starts(prices["date"], prices["resolution"])
+
+        # Prices in €/kWh, one row for each series
+        self._prices = np.stack([prices[s] for s in SERIES]) / 1000
+
+        # Period of each interval (in the Europe/Madrid time zone)
+        periods = prices["date"].astype(f"datetime64[{PERIODS[period]}]")
+
+        self._periods, self._period_idx = np.unique(
+            periods, return_inverse=True
+        )
+
+    @classmethod
+    def from_prices_manager(
+        cls,
+        start: date,
+        end: date,
+        period: str = "month",
+        resolution: int = 60,
+        prices_manager: Optional[PricesManager] = None
+    ) -> "CostEngine":
+        """Create an engine with the prices of a date range.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :param period: Period of the cost breakdowns.
+        :param resolution: Resolution (in minutes) of the consumption
+        profiles. Default: 60.
+        :param prices_manager: Prices manager used to get the prices. If it's
+        None (default), the default prices manager is used.
+        :return: Engine.
+        """
+        pm = prices_manager or get_default_prices_manager()
+
+        prices = pm.get_prices_range(
+            start, end, format="array", resolution=resolution
+        )
+
+        return cls(prices, period)
+
+    def _new_totals(self) -> "np.ndarray":
+        """Return empty totals.
+
+        :return: NumPy array (float) of zeros with a row for each period and
+        the consumption, the cost of each series and the number of
+        consumption values as columns.
+        """
+        import numpy as np
+
+        return np.zeros((len(self._periods), 2 + len(SERIES)))
+
+    def _add(
+        self, totals: "np.ndarray", times: "np.ndarray", values: "np.ndarray"
+    ):
+        """Add the consumption and costs of some intervals to totals.
+
+        :param totals: Totals (see `_new_totals`).
+        :param times: NumPy array (datetime64[m]) with the UTC start datetimes
+        of the intervals.
+        :param values: NumPy array (float) with the consumption (kWh) of the
+        intervals.
+        """
+        import numpy as np
+
+        # Interval of the prices of each consumption value
+        idx = np.searchsorted(self._starts, times)
+        idx_ok = np.minimum(idx, len(self._starts) - 1)
+        missing = self._starts[idx_ok] != times
+
+        if missing.any():
+            t = times[np.argmax(missing)]
+            raise Exception(f"There are no prices for {t} (UTC).")
+
+        periods = self._period_idx[idx]
+        n = len(self._periods)
+
+        totals[:, 0] += np.bincount(periods, weights=values, minlength=n)
+        totals[:, -1] += np.bincount(periods, minlength=n)
+
+        costs = self._prices[:, idx] * values
+
+        for i in range(len(SERIES)):
+            totals[:, i + 1] += np.bincount(
+                periods, weights=costs[i], minlength=n
+            )
+
+    def _get_result(self, totals: "np.ndarray") -> dict:
+        """Return the result of some totals.
+
+        :param totals: Totals (see `_new_totals`).
+        :return: Dictionary with the structure of the value returned by
+        `get_costs`.
+        """
+        total = totals.sum(axis=0).tolist()
+        keys = ("consumption",) + SERIES
+
+        # The periods without consumption values are skipped. The periods
+        # whose consumption is 0 (e.g. with exported energy) are kept.
+        periods = [
+            {"period": str(p), **dict(zip(keys, t))}
+            for p, t in zip(self._periods, totals.tolist())
+            if t[-1] > 0
+        ]
+
+        return {
+            "consumption": total[0],
+            "costs": dict(zip(SERIES, total[1:])),
+            "periods": periods
+        }
+
+    def get_costs(self, times: "np.ndarray", values: "np.ndarray") -> dict:
+        """Return the costs of a consumption profile.
+
+        :param times: NumPy array (datetime64) with the UTC start datetimes of
+        the intervals of the profile.
+        :param values: NumPy array (float) with the consumption (kWh) of the
+        intervals.
+        :return: Dictionary with three keys named "consumption", "costs" and
+        "periods", which values are, respectively, the total consumption
+        (kWh), a dictionary with the total cost (€) of each series (see
+        `SERIES`) and a sorted list of dictionaries, each one for a period
+        with consumption values. Each dictionary has a key named "period",
+        which value is the period string (e.g. "2022-12" for a month), and keys
+        named "consumption" and as the series, with the consumption and costs
+        of the period.
+        """
+        totals = self._new_totals()
+        self._add(totals, times.astype("datetime64[m]"), values)
+
+        return self._get_result(totals)
+
+    def get_file_costs(self, path: str) -> dict:
+        """Return the costs of a consumption file.
+
+        The file is read in chunks of `CHUNK_ROWS` rows, so the memory used
+        doesn't depend on its size.
+
+        :param path: File path (see `iter_consumption`).
+        :return: Dictionary with the same structure as the one returned by
+        `get_costs`.
+        """
+        totals = self._new_totals()
+
+        for times, values in iter_consumption(path, self.CHUNK_ROWS):
+            self._add(totals, times, values)
+
+        return self._get_result(totals)
+
+
+def _init_worker(prices: dict, period: str):
+    """Initialize a worker process of `simulate_bills`.
+
+    :param prices: Prices (see `CostEngine`).
+    :param period: Period of the cost breakdowns.
+    """
+    global _worker_engine
+    _worker_engine = CostEngine(prices, period)
+
+
+def _get_worker_costs(path: str) -> dict:
+    """Return the costs of a consumption file in a worker process.
+
+    :param path: File path.
+    :return: Dictionary with the same structure as the ones returned by
+    `simulate_bills`.
+    """
+    try:
+        return {"path": path, **_worker_engine.get_file_costs(path)}
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+
+
+def simulate_bills(
+    paths: Iterable[str],
+    start: date,
+    end: date,
+    period: str = "month",
+    resolution: int = 60,
+    workers: Optional[int] = None,
+    prices_manager: Optional[PricesManager] = None
+) -> Iterator[dict]:
+    """Compute the costs of many consumption files in parallel.
+
+    The prices of the date range are got once and sent to each worker process
+    when it starts. Then, the files are priced by a process pool, so all the
+    CPU cores are used.
+
+    :param paths: Consumption file paths (see `iter_consumption`).
+    :param start: Start date (in the Europe/Madrid time zone) of the prices.
+    :param end: End date (in the Europe/Madrid time zone), included, of the
+    prices.
+    :param period: Period of the cost breakdowns. It must be "day", "month"
+    (default) or "year".
+    :param resolution: Resolution (in minutes) of the consumption profiles.
+    Default: 60.
+    :param workers: Number of worker processes. If it's None (default), the
+    number of CPU cores is used.
+    :param prices_manager: Prices manager used to get the prices. If it's None
+    (default), the default prices manager is used.
+    :return: Iterator of dictionaries, one for each file in the same order as
+    `paths`, yielded as soon as the file and the previous ones are priced.
+    Each dictionary has a key named "path", with the file path, and either
+    the keys of the dictionary returned by `CostEngine.get_costs` or, if the
+    file couldn't be priced, a key named "error" with the error message.
+    """
+    pm = prices_manager or get_default_prices_manager()
+
+    prices = pm.get_prices_range(
+        start, end, format="array", resolution=resolution
+    )
+
+    # Check the period before starting the processes
+    CostEngine(prices, period)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker,
+        initargs=(prices, period)
+    ) as executor:
+        yield from executor.map(_get_worker_costs, paths)
+
+
+def main():
+    """Bill simulation main function.
+
+    This function prices consumption files with the prices of a date range
+    and prints, as CSV, the consumption and costs of each file by period and
+    in total. The rows are printed as soon as the files are priced.
+    """
+    parser = ArgumentParser(
+        prog="energy-es-bills",
+        description=(
+            "Compute the energy cost of consumption files (CSV files with a "
+            '"datetime" column and a "consumption" column in kWh) with the '
+            "Spot Market and PVPC prices of a date range."
+        )
+    )
+
+    parser.add_argument(
+        "start", type=date.fromisoformat, help="Start date (YYYY-MM-DD)"
+    )
+
+    parser.add_argument(
+        "end", type=date.fromisoformat,
+        help="End date (YYYY-MM-DD), included."
+    )
+
+    parser.add_argument("files", nargs="+", help="Consumption files.")
+
+    parser.add_argument(
+        "-p", "--period", choices=tuple(PERIODS), default="month",
+        help="Period of the cost breakdowns. Default: month."
+    )
+
+    parser.add_argument(
+        "-r", "--resolution", type=int, choices=RESOLUTIONS, default=60,
+        help="Length (in minutes) of the consumption intervals. Default: 60."
+    )
+
+    parser.add_argument(
+        "-w", "--workers", type=int,
+        help="Number of worker processes. Default: number of CPU cores."
+    )
+
+    args = parser.parse_args()
+
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(("file", "period", "consumption") + SERIES)
+    errors = 0
+
+    try:
+        for res in simulate_bills(
+            args.files, args.start, args.end, args.period, args.resolution,
+            args.workers
+        ):
+            if "error" in res:
+                errors += 1
+                print(f"{res['path']}: {res['error']}", file=sys.stderr)
+                continue
+
+            for p in res["periods"]:
+                writer.writerow(
+                    (res["path"], p["period"], p["consumption"]) +
+                    tuple(p[s] for s in SERIES)
+                )
+
+            writer.writerow(
+                (res["path"], "total", res["consumption"]) +
+                tuple(res["costs"][s] for s in SERIES)
+            )
+
+            sys.stdout.flush()
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Energy-ES - Data - Cache."""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Hashable, Optional
+
+
+class PricesCache:
+    """In-memory prices cache.
+
+    This class keeps the prices of the most recently used days already in the
+    format of `PricesManager.get_prices`, so that repeated calls don't have to
+    read the history store or convert the prices again. Each entry has the
+    update timestamp of its data and it's only valid for that timestamp. When
+    the cache is full, the least recently used entry is discarded.
+    """
+
+    # Default maximum number of entries
+    MAX_SIZE = 64
+
+    def __init__(self, max_size: int = MAX_SIZE):
+        """Class initializer.
+
+        :param max_size: Maximum number of entries.
+        """
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, updated: float) -> Optional[dict]:
+        """Return the prices of an entry.
+
+        :param key: Entry key (e.g. store, date and unit).
+        :param updated: Update timestamp of the current data.
+        :return: Prices or None if there isn't any entry for the key or the
+        entry was created with other data.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] != updated:
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, updated: float, prices: dict):
+        """Set the prices of an entry.
+
+        :param key: Entry key (e.g. store, date and unit).
+        :param updated: Update timestamp of the data of the prices.
+        :param prices: Prices.
+        """
+        with self._lock:
+            self._entries[key] = (updated, prices)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all the entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Return the number of entries.
+
+        :return: Number of entries.
+        """
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,390 @@
+"""Energy-ES - Data - History."""
+
+from datetime import date, datetime
+from itertools import chain
+from threading import Lock
+from typing import TYPE_CHECKING, Optional
+from zoneinfo import ZoneInfo
+import sqlite3
+
+from userconf import UserConf
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# UserConf application ID
+UC_APP_ID = "energy_es"
+
+# History database file name (inside the UserConf files directory)
+DB_FILE_NAME = "prices.db"
+
+# Database schema. The resolution of each day is the length (in minutes) of
+# its intervals and the intervals of a day are numbered from 0.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    updated REAL NOT NULL,
+    resolution INTEGER NOT NULL DEFAULT 60
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS prices (
+    date TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    spot_market REAL NOT NULL,
+    pvpc_pcb REAL NOT NULL,
+    pvpc_cm REAL NOT NULL,
+    PRIMARY KEY (date, interval)
+) WITHOUT ROWID;
+"""
+
+# Database schema version
+SCHEMA_VERSION = 1
+
+# Statements to migrate a database from each previous schema version
+MIGRATIONS = {
+    # Hourly prices only
+    0: """
+    ALTER TABLE days ADD COLUMN resolution INTEGER NOT NULL DEFAULT 60;
+    ALTER TABLE prices RENAME COLUMN hour TO interval;
+    """
+}
+
+
+class HistoryStore:
+    """Prices history store.
+
+    This class stores the Spot Market and PVPC energy prices of every interval
+    (e.g. hour or quarter-hour) of any number of days in a SQLite database.
+    Both tables are indexed by date (and interval), so the prices of any day
+    are got in O(log n) time. The database uses the WAL journal mode, so
+    readers don't block writers.
+
+    The dates are days in the Europe/Madrid time zone and the prices are in
+    €/MWh.
+    """
+
+    def __init__(self, path: str):
+        """Class initializer.
+
+        :param path: Database file path or ":memory:" for an in-memory
+        database.
+        """
+        self._path = path
+        self._lock = Lock()
+
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+
+        self._migrate()
+
+    def _get_version(self) -> int:
+        """Return the schema version of the database.
+
+        :return: Version (0 for an empty database or a database created by a
+        version of Energy-ES that didn't set it).
+        """
+        return self._con.execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate(self):
+        """Create the database tables or update them to the current schema
+        version.
+
+        The database is locked while it's updated, so if several processes
+        open it at the same time, only one of them updates it.
+        """
+        if self._get_version() == SCHEMA_VERSION:
+            return
+
+        self._con.execute("BEGIN IMMEDIATE")
+
+        try:
+            version = self._get_version()
+
+            tables = self._con.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+            ).fetchone()[0]
+
+            if version == SCHEMA_VERSION:
+                statements = []
+            elif tables:
+                # The database was created by a previous version of Energy-ES
+                statements = [
+                    MIGRATIONS[v] for v in range(version, SCHEMA_VERSION)
+                ]
+            else:
+                statements = [SCHEMA]
+
+            for st in ";".join(statements).split(";"):
+                if st.strip():
+                    self._con.execute(st)
+
+            self._con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._con.execute("COMMIT")
+        except Exception:
+            self._con.execute("ROLLBACK")
+            raise
+
+    @property
+    def path(self) -> str:
+        """Return the database file path.
+
+        :return: File path.
+        """
+        return self._path
+
+    def get_rows(self, start: date, end: date) -> list[tuple]:
+        """Return the prices of the stored days of a date range as rows.
+
+        :param start: Start date.
+        :param end: End date (included).
+        :return: List of tuples sorted by date and interval. Each tuple has the
+        date string (YYYY-MM-DD), the update timestamp and resolution of the
+        day, the interval and the Spot Market, PVPC (Peninsula, Canarias and
+        Baleares) and PVPC (Ceuta and Melilla) prices.
+        """
+        with self._lock:
+            return self._con.execute(
+                "SELECT d.date, d.updated, d.resolution, p.interval, "
+                "p.spot_market, p.pvpc_pcb, p.pvpc_cm FROM days d "
+                "JOIN prices p ON p.date = d.date "
+                "WHERE d.date BETWEEN ? AND ? ORDER BY d.date, p.interval",
+                (start.isoformat(), end.isoformat())
+            ).fetchall()
+
+    def get_arrays(
+        self, start: date, end: date
+    ) -> tuple[list[tuple], "np.ndarray"]:
+        """Return the prices of the stored days of a date range as a NumPy
+        array.
+
+        Unlike `get_rows`, the rows aren't kept as Python objects: the prices
+        are copied from the database cursor to the array, so the memory used
+        for a multi-year range is only the memory of the array.
+
+        :param start: Start date.
+        :param end: End date (included).
+        :return: Tuple with a list of tuples (one for each day, sorted by
+        date, with the date string (YYYY-MM-DD), the update timestamp, the
+        resolution and the number of intervals of the day) and a NumPy array
+        (float) of shape (intervals, 3) with the Spot Market, PVPC (Peninsula,
+        Canarias and Baleares) and PVPC (Ceuta and Melilla) prices of every
+        interval, sorted by date and interval.
+        """
+        # NumPy is imported here, instead of at the top of the module, because
+        # it takes a long time to be imported and it's only needed for this
+        # method.
+        import numpy as np
+
+        params = (start.isoformat(), end.isoformat())
+
+        with self._lock:
+            # Both queries read the same snapshot of the database
+            self._con.execute("BEGIN")
+
+            try:
+                days = self._con.execute(
+                    "SELECT d.date, d.updated, d.resolution, COUNT(*) "
+                    "FROM days d JOIN prices p ON p.date = d.date "
+                    "WHERE d.date BETWEEN ? AND ? GROUP BY d.date "
+                    "ORDER BY d.date",
+                    params
+                ).fetchall()
+
+                cursor = self._con.execute(
+                    "SELECT p.spot_market, p.pvpc_pcb, p.pvpc_cm FROM days d "
+                    "JOIN prices p ON p.date = d.date "
+                    "WHERE d.date BETWEEN ? AND ? ORDER BY d.date, p.interval",
+                    params
+                )
+
+                values = np.fromiter(
+                    chain.from_iterable(cursor), dtype=np.float64,
+                    count=3 * sum(r[3] for r in days)
+                )
+            finally:
+                self._con.execute("COMMIT")
+
+        return days, values.reshape(-1, 3)
+
+    def get_days(self, start: date, end: date) -> dict:
+        """Return the prices of the stored days of a date range.
+
+        :param start: Start date.
+        :param end: End date (included).
+        :return: Dictionary which keys are date strings (YYYY-MM-DD) and which
+        values are dictionaries with the same structure as
+        `PricesManager._prices`.
+        """
+        days = {}
+
+        for r in self.get_rows(start, end):
+            d = r[0]
+
+            if d not in days:
+                days[d] = {
+                    "date": d,
+                    "updated": r[1],
+                    "price_unit": "€/MWh",
+                    "resolution": r[2],
+                    "data": []
+                }
+
+            days[d]["data"].append({
+                "interval": r[3],
+                "spot_market": r[4],
+                "pvpc_pcb": r[5],
+                "pvpc_cm": r[6]
+            })
+
+        return days
+
+    def get_day(self, day: date) -> Optional[dict]:
+        """Return the prices of a day.
+
+        :param day: Date.
+        :return: Dictionary with the same structure as
+        `PricesManager._prices` or None if the day isn't stored.
+        """
+        return self.get_days(day, day).get(day.isoformat())
+
+    def set_days(self, days: dict):
+        """Store the prices of some days, replacing any previous prices of
+        them.
+
+        All the days are stored in a single transaction.
+
+        :param days: Dictionary which keys are dates and which values are
+        dictionaries with the same structure as `PricesManager._prices`.
+        """
+        with self._lock, self._con:
+            for day, prices in days.items():
+                d = day.isoformat()
+
+                rows = [
+                    (
+                        d, x["interval"], x["spot_market"], x["pvpc_pcb"],
+                        x["pvpc_cm"]
+                    )
+                    for x in prices["data"]
+                ]
+
+                self._con.execute("DELETE FROM prices WHERE date = ?", (d,))
+
+                self._con.execute(
+                    "INSERT OR REPLACE INTO days (date, updated, resolution) "
+                    "VALUES (?, ?, ?)",
+                    (d, prices["updated"], prices["resolution"])
+                )
+
+                self._con.executemany(
+                    "INSERT INTO prices (date, interval, spot_market, "
+                    "pvpc_pcb, pvpc_cm) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+
+    def set_day(self, day: date, prices: dict):
+        """Store the prices of a day, replacing any previous prices of it.
+
+        :param day: Date.
+        :param prices: Dictionary with the same structure as
+        `PricesManager._prices`.
+        """
+        self.set_days({day: prices})
+
+    def get_stored_dates(self, start: date, end: date) -> set[date]:
+        """Return the stored days of a date range.
+
+        :param start: Start date.
+        :param end: End date (included).
+        :return: Dates.
+        """
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT date FROM days WHERE date BETWEEN ? AND ?",
+                (start.isoformat(), end.isoformat())
+            ).fetchall()
+
+        return set(date.fromisoformat(r[0]) for r in rows)
+
+    def get_last_day(self, until: Optional[date] = None) -> Optional[date]:
+        """Return the most recent stored day.
+
+        :param until: If it's not None, the most recent stored day until this
+        date (included) is returned.
+        :return: Date or None if there isn't any stored day.
+        """
+        until = "9999-12-31" if until is None else until.isoformat()
+
+        with self._lock:
+            row = self._con.execute(
+                "SELECT MAX(date) FROM days WHERE date <= ?", (until,)
+            ).fetchone()
+
+        return None if row[0] is None else date.fromisoformat(row[0])
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._con.close()
+
+
+def _migrate_legacy_data(store: HistoryStore, conf: UserConf):
+    """Move the prices stored in the "prices" UserConf setting to a store.
+
+    Previous versions of Energy-ES stored the hourly prices of a single day in
+    this setting. The setting is deleted after moving its data.
+
+    :param store: Destination store.
+    :param conf: UserConf instance.
+    """
+    prices = conf.settings.get("prices")
+
+    if prices is None:
+        return
+
+    u = prices["updated"]
+    day = datetime.fromtimestamp(u).astimezone(ZoneInfo("Europe/Madrid"))
+    day = day.date()
+
+    if store.get_day(day) is None:
+        data = [
+            {
+                "interval": x["hour"],
+                "spot_market": x["spot_market"],
+                "pvpc_pcb": x["pvpc_pcb"],
+                "pvpc_cm": x["pvpc_cm"]
+            }
+            for x in prices["data"]
+        ]
+
+        store.set_day(day, {**prices, "resolution": 60, "data": data})
+
+    conf.settings.delete("prices")
+
+
+# Default store shared by all the prices managers of the process
+_default_store: Optional[HistoryStore] = None
+_default_store_lock = Lock()
+
+
+def get_default_store() -> HistoryStore:
+    """Return the default store.
+
+    The default store is created the first time this function is called. Its
+    database file is inside the UserConf files directory.
+
+    :return: `HistoryStore` instance.
+    """
+    global _default_store
+
+    with _default_store_lock:
+        if _default_store is None:
+            conf = UserConf(UC_APP_ID)
+            path = conf.files.get_path(DB_FILE_NAME)
+
+            _default_store = HistoryStore(path)
+            _migrate_legacy_data(_default_store, conf)
+
+        return _default_store
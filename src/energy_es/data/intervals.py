@@ -0,0 +1,160 @@
+"""Energy-ES - Data - Intervals."""
+
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+from zoneinfo import ZoneInfo
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Time zone of the dates and times of the prices
+TZ = ZoneInfo("Europe/Madrid")
+
+# Supported resolutions (length of the intervals of a day, in minutes). Each
+# one is a multiple of the previous ones, so the prices can be converted
+# between any of them.
+RESOLUTIONS = (15, 30, 60)
+
+
+def check_resolution(resolution: int) -> int:
+    """Check a resolution.
+
+    :param resolution: Resolution (in minutes).
+    :return: Resolution.
+    """
+    if resolution not in RESOLUTIONS:
+        res = ", ".join(str(r) for r in RESOLUTIONS)
+        raise Exception(f"Invalid resolution. It must be one of {res}.")
+
+    return resolution
+
+
+def get_day_start(day: date) -> datetime:
+    """Return the start of a day (00:00 in the Europe/Madrid time zone).
+
+    :param day: Date.
+    :return: UTC datetime.
+    """
+    return datetime.combine(day, time(0), TZ).astimezone(timezone.utc)
+
+
+def get_day_minutes(day: date) -> int:
+    """Return the length of a day.
+
+    The days on which the daylight saving time starts or ends have 23 or 25
+    hours.
+
+    :param day: Date.
+    :return: Number of minutes.
+    """
+    length = get_day_start(day + timedelta(days=1)) - get_day_start(day)
+    return int(length.total_seconds()) // 60
+
+
+def get_resolution(day: date, count: int) -> Optional[int]:
+    """Return the resolution of the prices of a day from their number.
+
+    :param day: Date.
+    :param count: Number of prices.
+    :return: Resolution (in minutes) or None if the number of prices doesn't
+    match any supported resolution.
+    """
+    minutes = get_day_minutes(day)
+
+    for r in RESOLUTIONS:
+        if count * r == minutes:
+            return r
+
+    return None
+
+
+def get_starts(dates: "np.ndarray", resolution: int) -> "np.ndarray":
+    """Return the start datetimes of consecutive intervals.
+
+    :param dates: Sorted NumPy array (datetime64[D]) with the date of each
+    interval. The intervals of each day must be complete and consecutive.
+    :param resolution: Resolution (in minutes).
+    :return: NumPy array (datetime64[m]) of UTC datetimes.
+    """
+    import numpy as np
+
+    days, first, inverse = np.unique(
+        dates, return_index=True, return_inverse=True
+    )
+
+    day_starts = np.array(
+        [get_day_start(d).replace(tzinfo=None) for d in days.tolist()],
+        dtype="datetime64[m]"
+    )
+
+    # Position of each interval in its day
+    pos = np.arange(len(dates)) - first[inverse]
+
+    return day_starts[inverse] + pos * np.timedelta64(resolution, "m")
+
+
+@lru_cache(maxsize=1024)
+def get_times(day: date, resolution: int) -> tuple[str, ...]:
+    """Return the start times of the intervals of a day.
+
+    On the day on which the daylight saving time ends, the times between
+    02:00 and 03:00 are repeated.
+
+    :param day: Date.
+    :param resolution: Resolution (in minutes).
+    :return: Tuple of time strings (HH:MM) in the Europe/Madrid time zone.
+    """
+    start = get_day_start(day)
+    count = get_day_minutes(day) // resolution
+
+    return tuple(
+        (start + timedelta(minutes=i * resolution)).astimezone(TZ)
+        .strftime("%H:%M")
+        for i in range(count)
+    )
+
+
+def resample(values: list[float], source: int, target: int) -> list[float]:
+    """Convert the prices of consecutive intervals to another resolution.
+
+    If the target resolution is lower (longer intervals), each price is the
+    mean of the prices of its interval. If it's higher (shorter intervals),
+    each price is repeated.
+
+    :param values: Prices.
+    :param source: Resolution of the prices (in minutes).
+    :param target: Target resolution (in minutes).
+    :return: Prices in the target resolution.
+    """
+    if target > source:
+        k = target // source
+        return [sum(values[i:i + k]) / k for i in range(0, len(values), k)]
+
+    k = source // target
+    return [v for v in values for _ in range(k)]
+
+
+def resample_array(
+    values: "np.ndarray", source: int, target: int
+) -> "np.ndarray":
+    """Convert the prices of consecutive intervals to another resolution.
+
+    This function is the vectorized version of `resample`. The prices are
+    converted along the first axis of the array.
+
+    :param values: NumPy array of prices.
+    :param source: Resolution of the prices (in minutes).
+    :param target: Target resolution (in minutes).
+    :return: NumPy array of prices in the target resolution.
+    """
+    import numpy as np
+
+    if target > source:
+        k = target // source
+        shape = (values.shape[0] // k, k) + values.shape[1:]
+
+        return values.reshape(shape).mean(axis=1)
+
+    return np.repeat(values, source // target, axis=0)
@@ -0,0 +1,157 @@
+"""Energy-ES - Data - Locks."""
+
+from concurrent.futures import Future
+from threading import Lock
+from time import sleep
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Hashable
+import os
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# "asyncio" is imported when `AsyncSingleFlight` is used, so that importing
+# this module (and "energy_es.data.prices") is fast.
+if TYPE_CHECKING:
+    import asyncio
+
+
+class FileLock:
+    """Advisory file lock.
+
+    This class is a context manager that holds an exclusive lock on a file
+    while the context is active, so that it can be used to coordinate
+    different processes. The file is created if it doesn't exist.
+    """
+
+    def __init__(self, path: str):
+        """Class initializer.
+
+        :param path: Lock file path.
+        """
+        self._path = path
+        self._file = None
+
+    def __enter__(self) -> "FileLock":
+        """Acquire the lock, waiting until it's released by any other holder.
+
+        :return: This instance.
+        """
+        self._file = open(self._path, "a+")
+
+        if os.name == "nt":
+            # "msvcrt.locking" locks from the current position and
+            # "msvcrt.LK_LOCK" only retries for 10 seconds.
+            self._file.seek(0)
+
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    sleep(0.1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+
+        return self
+
+    def __exit__(self, *args):
+        """Release the lock."""
+        if os.name == "nt":
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+        self._file.close()
+        self._file = None
+
+
+class SingleFlight:
+    """Single-flight call coordinator.
+
+    When several threads make a call with the same key at the same time, only
+    the first one runs the call. The rest wait for it and get the same result
+    (or exception).
+    """
+
+    def __init__(self):
+        """Class initializer."""
+        self._calls = {}
+        self._lock = Lock()
+
+    def do(self, key: Hashable, func: Callable, *args) -> Any:
+        """Make a call or wait for the same call made by another thread.
+
+        :param key: Call key.
+        :param func: Function to call.
+        :param args: Function arguments.
+        :return: Function result.
+        """
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+
+            if leader:
+                fut = Future()
+                self._calls[key] = fut
+
+        if not leader:
+            return fut.result()
+
+        try:
+            fut.set_result(func(*args))
+        except Exception as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return fut.result()
+
+
+class AsyncSingleFlight:
+    """Asynchronous single-flight call coordinator.
+
+    This class is the asyncio counterpart of `SingleFlight`: when several
+    tasks make a call with the same key at the same time, only the first one
+    runs the call (a coroutine function). The rest wait for it and get the same
+    result (or exception). A task that is cancelled while waiting doesn't
+    cancel the call for the rest.
+    """
+
+    def __init__(self):
+        """Class initializer."""
+        self._calls = {}
+
+    async def do(
+        self, key: Hashable, func: Callable[..., Awaitable], *args
+    ) -> Any:
+        """Make a call or wait for the same call made by another task.
+
+        :param key: Call key.
+        :param func: Coroutine function to call.
+        :param args: Function arguments.
+        :return: Function result.
+        """
+        import asyncio
+
+        fut = self._calls.get(key)
+
+        if fut is None:
+            fut = asyncio.ensure_future(func(*args))
+            self._calls[key] = fut
+
+            def on_done(f: "asyncio.Future"):
+                if self._calls.get(key) is f:
+                    del self._calls[key]
+
+                # The exception is retrieved to avoid a warning if all the
+                # tasks that waited for the call were cancelled.
+                if not f.cancelled():
+                    f.exception()
+
+            fut.add_done_callback(on_done)
+
+        return await asyncio.shield(fut)
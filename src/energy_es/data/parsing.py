@@ -0,0 +1,432 @@
+"""Energy-ES - Data - Parsing."""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Iterable, Iterator
+import json
+import re
+
+from energy_es.data.intervals import (
+    TZ, get_day_minutes, get_day_start, get_resolution, get_times
+)
+
+# The responses of date ranges may have thousands of values, so they're parsed
+# either in batch or incrementally. In batch, a response is converted to NumPy
+# arrays in a single pass and its dates, times and number of values are
+# validated with vectorized operations instead of Python loops. NumPy is
+# imported when the functions are called, so that importing this module is
+# fast. Incrementally, the values are parsed and validated as the response is
+# received, so the memory used doesn't depend on the size of the response.
+if TYPE_CHECKING:
+    import numpy as np
+
+# Regular expression that finds, in a Spot Market API response, the "type" keys
+# (and their values) and the start of the "values" arrays.
+SPOT_KEY_RE = re.compile(
+    r'"(type|values)"\s*:\s*(?:"((?:[^"\\]|\\.)*)"|\[)'
+)
+
+# Maximum number of characters of a key (and its value) that may be split
+# between two chunks of a response.
+MAX_KEY_LEN = 1024
+
+
+def _format_hour(hour: int) -> str:
+    """Return the HH:MM sring of an hour.
+
+    :param hour: Hour (0-23).
+    :return: HH:MM hour string.
+    """
+    return str.zfill(str(hour), 2) + ":00"
+
+
+def _get_utc_offset(dt: str) -> int:
+    """Return the UTC offset of an ISO 8601 datetime string.
+
+    :param dt: Datetime string with a UTC offset (e.g.
+    "2022-12-15T00:00:00.000+01:00").
+    :return: Offset in minutes.
+    """
+    if dt.endswith("Z"):
+        return 0
+
+    if len(dt) < 6 or dt[-6] not in "+-" or dt[-3] != ":":
+        raise Exception(f'The datetime "{dt}" doesn\'t have a UTC offset.')
+
+    sign = -1 if dt[-6] == "-" else 1
+    return sign * (int(dt[-5:-3]) * 60 + int(dt[-2:]))
+
+
+def parse_datetimes(dts: list[str]) -> "np.ndarray":
+    """Parse ISO 8601 datetime strings with a UTC offset.
+
+    :param dts: Datetime strings (e.g. "2022-12-15T00:00:00.000+01:00" or
+    "2022-12-14 23:00:00Z"). Their first 16 characters must be the date and
+    time (YYYY-MM-DDTHH:MM or YYYY-MM-DD HH:MM).
+    :return: NumPy array (datetime64[m]) of UTC datetimes.
+    """
+    import numpy as np
+
+    local = np.array(dts, dtype="U16").astype("datetime64[m]")
+
+    # There are only a few different offsets (usually 2), so each one is
+    # parsed once.
+    known = {x: _get_utc_offset(x) for x in set(x[-6:] for x in dts)}
+    offsets = np.array([known[x[-6:]] for x in dts], dtype=np.int64)
+
+    return local - offsets.astype("timedelta64[m]")
+
+
+def parse_spot_market(data: dict, start: date, end: date) -> dict:
+    """Parse the Spot Market API response data of a date range.
+
+    The resolution of the data of each day (e.g. hourly or quarter-hourly) is
+    got from its number of values, which also depends on the length of the
+    day (23, 24 or 25 hours).
+
+    :param data: Response data (parsed JSON).
+    :param start: Start date (in the Europe/Madrid time zone).
+    :param end: End date (in the Europe/Madrid time zone), included.
+    :return: Dictionary which keys are the dates of the range and which values
+    are NumPy arrays (float) with the Spot Market prices (for all Spain) of
+    every interval of the day.
+    """
+    import numpy as np
+
+    error = "Invalid Spot Market data"
+
+    spot = [x for x in data["included"] if "spot" in x["type"].lower()]
+    spot = spot[0]["attributes"]["values"]
+
+    # Transform data. The datetimes are local (Europe/Madrid) ISO 8601 strings
+    # with a UTC offset (e.g. "2022-12-15T00:00:00.000+01:00"), so their first
+    # 16 characters are the local date and time.
+    dts = [x["datetime"] for x in spot]
+
+    if any(" " in x for x in dts):
+        dts = [x.replace(" ", "") for x in dts]
+
+    local = np.array(dts, dtype="U16").astype("datetime64[m]")
+    utc = parse_datetimes(dts)
+
+    values = np.fromiter(
+        (x["value"] for x in spot), dtype=np.float64, count=len(spot)
+    )
+
+    # Sort data
+    order = np.argsort(utc, kind="stable")
+    local = local[order]
+    utc = utc[order]
+    values = values[order]
+
+    # Check dates
+    dates = local.astype("datetime64[D]")
+    days, first, counts = np.unique(
+        dates, return_index=True, return_counts=True
+    )
+
+    exp_days = np.datetime64(start, "D") + np.arange((end - start).days + 1)
+    n = min(len(days), len(exp_days))
+    wrong_days = days[:n] != exp_days[:n]
+
+    if wrong_days.any() or len(days) != len(exp_days):
+        j = np.argmax(wrong_days) if wrong_days.any() else n
+        exp = exp_days[j] if j < len(exp_days) else "no more days"
+        act = days[j] if j < len(days) else "no data"
+
+        raise Exception(
+            f"{error}. Data for {exp} expected but data for {act} received."
+        )
+
+    # Check number of values
+    res = []
+    day_starts = []
+
+    for d, c in zip(days.tolist(), counts.tolist()):
+        r = get_resolution(d, c)
+
+        if r is None:
+            raise Exception(
+                f"{error}. {c} values received for {d}, which has "
+                f"{get_day_minutes(d) // 60} hours."
+            )
+
+        res.append(r)
+        day_starts.append(get_day_start(d).replace(tzinfo=None))
+
+    # Check times. The expected time of each value is the start of its day
+    # plus its position in the day multiplied by the resolution of the day.
+    pos = np.arange(len(values)) - np.repeat(first, counts)
+    exp_utc = np.repeat(np.array(day_starts, dtype="datetime64[m]"), counts)
+    exp_utc = exp_utc + pos * np.repeat(res, counts).astype("timedelta64[m]")
+
+    wrong_times = utc != exp_utc
+
+    if wrong_times.any():
+        j = np.argmax(wrong_times)
+        exp = exp_utc[j].astype(datetime).replace(tzinfo=timezone.utc)
+        exp = exp.astimezone(TZ).strftime("%H:%M")
+        act = str(local[j])[11:16]
+
+        raise Exception(
+            f"{error}. Data for {exp} expected but data for {act} received."
+        )
+
+    return {
+        d: values[f:f + c]
+        for d, f, c in zip(days.tolist(), first.tolist(), counts.tolist())
+    }
+
+
+def get_pvpc_hours(day: date) -> list[int]:
+    """Return the start hours of the hours of a day, as they are in the PVPC
+    API response data.
+
+    :param day: Date (in the Europe/Madrid time zone).
+    :return: Sorted list of hours (0-23). On the day on which the daylight
+    saving time ends, hour 2 is repeated.
+    """
+    return [int(t[:2]) for t in get_times(day, 60)]
+
+
+def parse_pvpc(data: dict, day: date) -> "np.ndarray":
+    """Parse the PVPC API response data of a day.
+
+    :param data: Response data (parsed JSON).
+    :param day: Date (in the Europe/Madrid time zone).
+    :return: Array (float) of shape (hours, 2) with the PVPC prices (for
+    peninsula, Canarias and Baleares) and the PVPC prices (for Ceuta y
+    Melilla) of every hour of the day.
+    """
+    import numpy as np
+
+    error = "Invalid PVPC data"
+    dt = day.strftime("%Y-%m-%d")
+
+    pvpc = data["PVPC"]
+    exp_hours = get_pvpc_hours(day)
+
+    # Check data
+    exp_count = len(exp_hours)
+    pvpc_count = len(pvpc)
+
+    if pvpc_count != exp_count:
+        raise Exception(
+            f"{error}. {exp_count} values expected but {pvpc_count} "
+            "received."
+        )
+
+    # Transform data. The dates are DD/MM/YYYY strings, the hours are "HH-HH"
+    # strings and the prices have a decimal comma.
+    days = np.array([x["Dia"] for x in pvpc])
+    hours = np.array([x["Hora"] for x in pvpc]).astype("U2").astype(np.int64)
+
+    values = np.array([(x["PCB"], x["CYM"]) for x in pvpc], dtype=np.bytes_)
+
+    # We replace the decimal commas in the characters of all the prices at once
+    chars = values.view(np.uint8)
+    chars[chars == ord(",")] = ord(".")
+    values = values.astype(np.float64)
+
+    # Sort data
+    order = np.argsort(hours, kind="stable")
+    days = days[order]
+    hours = hours[order]
+    values = values[order]
+
+    # Check data
+    wrong_days = days != day.strftime("%d/%m/%Y")
+
+    if wrong_days.any():
+        d, m, y = days[np.argmax(wrong_days)].split("/")
+
+        raise Exception(
+            f"{error}. Data for {dt} expected but data for {y}-{m}-{d} "
+            "received."
+        )
+
+    wrong_hours = hours != np.array(exp_hours)
+
+    if wrong_hours.any():
+        j = np.argmax(wrong_hours)
+        exp = _format_hour(exp_hours[j])
+        act = _format_hour(hours[j])
+
+        raise Exception(
+            f"{error}. Data for {exp} expected but data for {act} received."
+        )
+
+    return values
+
+
+def iter_spot_market_values(chunks: Iterable[str]) -> Iterator[dict]:
+    """Parse the Spot Market API response data incrementally.
+
+    The response is read chunk by chunk and each Spot Market value is yielded
+    as soon as it's received, so only the current chunk and value are kept in
+    memory.
+
+    :param chunks: Chunks of the response body (e.g. `Transport.iter_text`).
+    :return: Iterator of dictionaries, each one with the "datetime" and
+    "value" keys of a Spot Market value, in the order of the response.
+    """
+    error = "Invalid Spot Market data"
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+
+    buf = ""
+    pos = 0
+
+    # Whether the last type found is the Spot Market one and whether we're
+    # inside a "values" array.
+    spot = False
+    values = False
+
+    while True:
+        if values:
+            # Skip whitespace and separators
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+
+            if pos < len(buf):
+                if buf[pos] == "]":
+                    pos += 1
+                    values = False
+
+                    # There is only one Spot Market values array
+                    if spot:
+                        return
+
+                    continue
+
+                try:
+                    v, pos = decoder.raw_decode(buf, pos)
+
+                    if spot:
+                        yield v
+
+                    continue
+                except json.JSONDecodeError:
+                    # The value isn't complete yet
+                    pass
+        else:
+            m = SPOT_KEY_RE.search(buf, pos)
+
+            if m is not None:
+                pos = m.end()
+
+                if m.group(1) == "type":
+                    t = json.loads(f'"{m.group(2)}"')
+                    spot = "spot" in t.lower()
+                else:
+                    values = True
+
+                continue
+
+            # We only keep the characters that may be part of a split key
+            pos = max(pos, len(buf) - MAX_KEY_LEN)
+
+        # Read the next chunk
+        chunk = next(chunks, None)
+
+        if chunk is None:
+            raise Exception(
+                f"{error}. The response doesn't have the Spot Market values "
+                "or it's incomplete."
+            )
+
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+def _check_spot_market_day(
+    day: date, values: list[tuple[datetime, float]]
+) -> list[float]:
+    """Check the Spot Market values of a day.
+
+    :param day: Date (in the Europe/Madrid time zone).
+    :param values: Sorted list of tuples, each one with the datetime and the
+    price of a value.
+    :return: Prices.
+    """
+    error = "Invalid Spot Market data"
+    count = len(values)
+    res = get_resolution(day, count)
+
+    # Check number of values
+    if res is None:
+        raise Exception(
+            f"{error}. {count} values received for {day}, which has "
+            f"{get_day_minutes(day) // 60} hours."
+        )
+
+    # Check times
+    day_start = get_day_start(day)
+
+    for i, (vdt, _) in enumerate(values):
+        exp = day_start + timedelta(minutes=i * res)
+
+        if vdt != exp:
+            exp = exp.astimezone(TZ).strftime("%H:%M")
+            act = vdt.strftime("%H:%M")
+
+            raise Exception(
+                f"{error}. Data for {exp} expected but data for {act} "
+                "received."
+            )
+
+    return [v for _, v in values]
+
+
+def iter_spot_market_days(
+    values: Iterable[dict], start: date, end: date
+) -> Iterator[tuple[date, list[float]]]:
+    """Check the Spot Market values of a date range while they're received
+    and group them by day.
+
+    The values must be sorted by datetime, as they're returned by the API. The
+    resolution of the data of each day (e.g. hourly or quarter-hourly) is got
+    from its number of values, which also depends on the length of the day
+    (23, 24 or 25 hours).
+
+    :param values: Spot Market values (e.g. `iter_spot_market_values`).
+    :param start: Start date (in the Europe/Madrid time zone).
+    :param end: End date (in the Europe/Madrid time zone), included.
+    :return: Iterator of tuples, each one with a date of the range and a list
+    with the Spot Market prices (for all Spain) of every interval of the day,
+    yielded as soon as the values of the day are received.
+    """
+    error = "Invalid Spot Market data"
+
+    exp_d = start
+    day_values = []
+
+    for v in values:
+        vdt = datetime.fromisoformat(v["datetime"].replace(" ", ""))
+        d = vdt.date()
+
+        # The values of the expected day are complete
+        if day_values and d != exp_d:
+            yield exp_d, _check_spot_market_day(exp_d, day_values)
+
+            exp_d += timedelta(days=1)
+            day_values = []
+
+        # Check date
+        if d != exp_d or exp_d > end:
+            exp = str(exp_d) if exp_d <= end else "no more days"
+
+            raise Exception(
+                f"{error}. Data for {exp} expected but data for {str(d)} "
+                "received."
+            )
+
+        day_values.append((vdt, v["value"]))
+
+    if day_values:
+        yield exp_d, _check_spot_market_day(exp_d, day_values)
+        exp_d += timedelta(days=1)
+
+    if exp_d <= end:
+        raise Exception(
+            f"{error}. Data for {str(exp_d)} expected but no data received."
+        )
@@ -1,22 +1,59 @@
 """Energy-ES - Data - Prices."""
 
-from datetime import date, datetime
+from concurrent.futures import (
+    ThreadPoolExecutor, wait, FIRST_EXCEPTION
+)
+from contextlib import AbstractContextManager, nullcontext
+from datetime import date, datetime, timedelta, timezone
+from threading import Lock, Thread
+from typing import (
+    TYPE_CHECKING, Any, Callable, Hashable, Iterator, Optional, Union
+)
 from zoneinfo import ZoneInfo
-
-import requests
-from userconf import UserConf
-
-
-class PricesManager:
-    """Prices manager.
-
-    This class gets the hourly values of the Spot Market and PVPC energy prices
-    of the current day in Spain. The data is cached in a configuration file
-    inside the user's home directory. The data is provided by some APIs of "Red
-    Eléctrica de España".
-
-    The values are stored in €/MWh but can be returned in either €/kWh or
-    €/MWh by the `get_prices` method.
+import sys
+
+from energy_es.data.cache import PricesCache
+from energy_es.data.history import HistoryStore, get_default_store
+from energy_es.data.intervals import (
+    TZ, check_resolution, get_day_minutes, get_starts, get_times, resample,
+    resample_array
+)
+from energy_es.data.locks import FileLock, SingleFlight
+from energy_es.data.parsing import (
+    get_pvpc_hours, iter_spot_market_days, iter_spot_market_values,
+    parse_pvpc, parse_spot_market
+)
+from energy_es.data.transport import Transport, get_default_transport
+from energy_es.data.windows import (
+    find_cheapest_intervals, find_cheapest_window
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Coordinator of the data updates of all the prices managers of the process
+_update_flight = SingleFlight()
+
+# Formatted prices of all the prices managers of the process
+_prices_cache = PricesCache()
+
+# Default prices manager
+_default_prices_manager: Optional["PricesManager"] = None
+_default_prices_manager_lock = Lock()
+
+
+class BasePricesManager:
+    """Base class of the prices managers.
+
+    This class has the logic shared by `PricesManager` and
+    `energy_es.data.async_prices.AsyncPricesManager`, which doesn't depend on
+    how the APIs are called: building the request URLs, parsing and checking
+    the responses, merging the data of a day, reading the date ranges from
+    the history store and checking, converting and formatting the prices. The
+    subclasses set the `_store` attribute and implement the data updates and
+    the public methods (blocking or asynchronous). The data of a day has the
+    structure of the `_prices` attribute of `PricesManager`.
     """
 
     # Red Eléctrica API for Spot Market prices. Prices are the same for whole
@@ -33,38 +70,26 @@ class PricesManager:
         "https://api.esios.ree.es/archives/70/download_json?locale=es&date={}"
     )
 
-    def __init__(self):
-        """Class initializer.
+    # Maximum time (in seconds) to get the Spot Market and PVPC data. Both
+    # APIs are called in parallel and share this deadline.
+    UPDATE_TIMEOUT = 30
 
-        When this method is called, the `_load_data` method is called. This
-        method sets the `_prices` attribute. The following is an example of the
-        `_prices` structure (the prices are in €/MWh):
+    # Maximum number of days of each Spot Market API request
+    SPOT_MAX_DAYS = 31
 
-        {
-          "updated": 1671058800.0
-          "price_unit": "€/MWh",
-          "data": [
-            {
-              "hour": 14,
-              "spot_market": 250.78,
-              "pvpc_pcb": 127.97,
-              "pvpc_cm": 120.5,
-            }
-          ]
-        }
-        """
-        self._conf = UserConf("energy_es")
-        self._prices = None
+    # Keys of the prices returned in the "array" format which values are NumPy
+    # arrays.
+    ARRAY_KEYS = ("time", "spot_market", "pvpc_pcb", "pvpc_cm")
 
-        self._load_data()
+    # Keys of the prices of each interval
+    PRICE_KEYS = ("spot_market", "pvpc_pcb", "pvpc_cm")
 
-    def _load_data(self):
-        """Load the data from the cache."""
-        self._prices = self._conf.settings.get("prices")
+    def _get_today_em(self) -> date:
+        """Return the current date in the Europe/Madrid time zone.
 
-    def _save_data(self):
-        """Save the data to the cache."""
-        self._conf.settings.set("prices", self._prices)
+        :return: Date.
+        """
+        return datetime.now().astimezone(ZoneInfo("Europe/Madrid")).date()
 
     def _is_data_valid(self) -> bool:
         """Check if the data is valid.
@@ -74,23 +99,9 @@ class PricesManager:
         if self._prices is None:
             return False
 
-        # We convert the "Updated" timestamp to a local datetime with time zone
-        # information and we get the current datetime of the Europe/Madrid time
-        # zone.
-
-        # "Updated" datetime
-        u = self._prices["updated"]
-        d1 = datetime.fromtimestamp(u).astimezone()
-
-        # Current datetime in Europe/Madrid
-        d2 = datetime.now().astimezone(ZoneInfo("Europe/Madrid"))
-
-        # Clear time
-        d1 = d1.replace(hour=0, minute=0, second=0, microsecond=0)
-        d2 = d2.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        # Compare datetimes/dates
-        return d1 == d2
+        # Compare the date of the data with the current date in the
+        # Europe/Madrid time zone.
+        return self._prices["date"] == self._get_today_em().isoformat()
 
     def _format_hour(self, hour: int) -> str:
         """Return the HH:MM sring of an hour.
@@ -100,109 +111,73 @@ class PricesManager:
         """
         return str.zfill(str(hour), 2) + ":00"
 
-    def _get_updated_spot_market_data(self, today_em: date) -> list[dict]:
-        """Get the Spot Market updated data.
+    def _get_spot_market_url(self, start: date, end: date) -> str:
+        """Return the URL of the Spot Market data of a date range.
 
-        :param today_em: Current date in the Europe/Madrid time zone.
-        :return: Sorted list of 24 dictionaries, each one for a different hour
-        of the day. Each dictionary has a key named "spot_market" which value
-        is the Spot Market price (for all Spain) (float) for a particular hour.
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :return: URL.
         """
-        error = "Invalid Spot Market data"
+        start_dt = start.strftime("%Y-%m-%d")
+        end_dt = end.strftime("%Y-%m-%d")
 
-        # Prepare URL
-        dt = today_em.strftime("%Y-%m-%d")
-        start = f"{dt}00:00"
-        end = f"{dt}23:59"
-        url = self.SPOT_API_URL.format(start, end)
+        return self.SPOT_API_URL.format(f"{start_dt}00:00", f"{end_dt}23:59")
 
-        # Make request to the API
-        res = requests.get(url)
+    def _get_pvpc_url(self, day_em: date) -> str:
+        """Return the URL of the PVPC data of a day.
 
-        # Check response status
-        if res.status_code != 200:
-            raise Exception(res.reason)
-
-        # Read response data to get the Spot Market prices (in €/MWh)
-        data = res.json()["included"]
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: URL.
+        """
+        return self.PVPC_API_URL.format(day_em.strftime("%Y-%m-%d"))
+
+    def _parse_spot_market_data(
+        self, data: dict, start: date, end: date
+    ) -> dict:
+        """Parse and check the Spot Market data of a date range.
+
+        :param data: Spot Market API response data.
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :return: Dictionary which keys are the dates of the range and which
+        values are sorted lists of dictionaries, each one for a different
+        interval of the day. Each dictionary has a key named "spot_market"
+        which value is the Spot Market price (for all Spain) (float) for a
+        particular interval.
+        """
+        data = data["included"]
 
         spot = list(filter(lambda x: "spot" in x["type"].lower(), data))
         spot = spot[0]["attributes"]["values"]
 
-        # Check data
-        spot_count = len(spot)
-
-        if spot_count != 24:
-            raise Exception(
-                f"{error}. 24 values expected but {spot_count} received."
-            )
-
-        # Transform data
-        spot = list(map(
-            lambda x: {
-                "datetime":
-                    datetime.fromisoformat(x["datetime"].replace(" ", "")),
-                "value": x["value"]
-            },
-            spot
-        ))
-
         # Sort data
-        spot = sorted(spot, key=lambda x: x["datetime"])
-
-        # Check data
-        for i, v in enumerate(spot):
-            vdt = v["datetime"]
-            d = vdt.date()
-
-            # Check date
-            if d != today_em:
-                raise Exception(
-                    f"{error}. Data for {dt} expected but data for {str(d)} "
-                    "received."
-                )
-
-            # Check hour
-            if vdt.hour != i:
-                exp = self._format_hour(i)
-                act = vdt.strftime("%H:%M")
-
-                raise Exception(
-                    f"{error}. Data for {exp} expected but data for {act} "
-                    "received."
-                )
+        spot = sorted(
+            spot,
+            key=lambda x: datetime.fromisoformat(
+                x["datetime"].replace(" ", "")
+            )
+        )
 
-        # Transform and return data
-        return list(map(
-            lambda x: {"spot_market": x["value"]},
-            spot
-        ))
+        # Check and transform data
+        return {
+            d: [{"spot_market": x} for x in v]
+            for d, v in iter_spot_market_days(spot, start, end)
+        }
 
-    def _get_updated_pvpc_data(self, today_em: date) -> list[dict]:
-        """Get the PVPC updated data.
+    def _parse_pvpc_data(self, data: dict, day_em: date) -> list[dict]:
+        """Parse and check the PVPC data of a day.
 
-        :param today_em: Current date in the Europe/Madrid time zone.
-        :return: Sorted list of 24 dictionaries, each one for a different hour
-        of the day. Each dictionary has two keys named "pvpc_pcb" and
-        "pvpc_cm", which values are, respectively, the PVPC price (for
-        peninsula, Canarias and Baleares) (float) and the PVPC price (for Ceuta
-        y Melilla) (float), for a particular hour.
+        :param data: PVPC API response data.
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: Sorted list of dictionaries, each one for a different hour of
+        the day (23, 24 or 25 hours). Each dictionary has two keys named
+        "pvpc_pcb" and "pvpc_cm", which values are, respectively, the PVPC
+        price (for peninsula, Canarias and Baleares) (float) and the PVPC price
+        (for Ceuta y Melilla) (float), for a particular hour.
         """
         error = "Invalid PVPC data"
-
-        # Prepare URL
-        dt = today_em.strftime("%Y-%m-%d")
-        url = self.PVPC_API_URL.format(dt)
-
-        # Make request to the API
-        res = requests.get(url)
-
-        # Check response status
-        if res.status_code != 200:
-            raise Exception(res.reason)
-
-        # Read response data to get the PVPC prices (in €/MWh)
-        data = res.json()["PVPC"]
+        dt = day_em.strftime("%Y-%m-%d")
+        data = data["PVPC"]
 
         pvpc = list(map(
             lambda x: {
@@ -215,11 +190,14 @@ class PricesManager:
         ))
 
         # Check data
+        exp_hours = get_pvpc_hours(day_em)
+        exp_count = len(exp_hours)
         pvpc_count = len(pvpc)
 
-        if pvpc_count != 24:
+        if pvpc_count != exp_count:
             raise Exception(
-                f"{error}. 24 values expected but {pvpc_count} received."
+                f"{error}. {exp_count} values expected but {pvpc_count} "
+                "received."
             )
 
         # Sort data
@@ -231,15 +209,15 @@ class PricesManager:
             h = v["hour"]
 
             # Check date
-            if d != today_em:
+            if d != day_em:
                 raise Exception(
                     f"{error}. Data for {dt} expected but data for {str(d)} "
                     "received."
                 )
 
             # Check hour
-            if h != i:
-                exp = self._format_hour(i)
+            if h != exp_hours[i]:
+                exp = self._format_hour(exp_hours[i])
                 act = self._format_hour(h)
 
                 raise Exception(
@@ -256,94 +234,1414 @@ class PricesManager:
             pvpc
         ))
 
-    def _update_data(self):
-        """Update the data by calling the APIs."""
-        # Current local datetime
-        now = datetime.now()
+    def _merge_data(
+        self, day_em: date, updated: float, spot: list[dict], pvpc: list[dict]
+    ) -> dict:
+        """Merge the Spot Market and PVPC data of a day.
 
-        # Get the current datetime in the Europe/Madrid time zone
-        today_em = now.astimezone(ZoneInfo("Europe/Madrid")).date()
+        The data is merged in the highest resolution of both (e.g. if the
+        Spot Market data is quarter-hourly and the PVPC data is hourly, the
+        PVPC price of each hour is used for its 4 quarter-hours).
 
-        # Get updated data
-        hour = list(range(24))
-        spot = self._get_updated_spot_market_data(today_em)
-        pvpc = self._get_updated_pvpc_data(today_em)
+        :param day_em: Date in the Europe/Madrid time zone.
+        :param updated: Update timestamp.
+        :param spot: Spot Market data of the day.
+        :param pvpc: PVPC data of the day.
+        :return: Dictionary with the same structure as `_prices`.
+        """
+        minutes = get_day_minutes(day_em)
+        spot_res = minutes // len(spot)
+        pvpc_res = minutes // len(pvpc)
+        res = min(spot_res, pvpc_res)
 
-        # Prepare data
-        data = list(map(
-            lambda x: {
-                "hour": x[0],
-                "spot_market": x[1]["spot_market"],
-                "pvpc_pcb": x[2]["pvpc_pcb"],
-                "pvpc_cm": x[2]["pvpc_cm"]
-            },
-            zip(hour, spot, pvpc)
-        ))
+        def get_values(data: list[dict], key: str, source: int) -> list:
+            return resample([x[key] for x in data], source, res)
+
+        columns = (
+            get_values(spot, "spot_market", spot_res),
+            get_values(pvpc, "pvpc_pcb", pvpc_res),
+            get_values(pvpc, "pvpc_cm", pvpc_res)
+        )
+
+        data = [
+            {"interval": i, "spot_market": s, "pvpc_pcb": p, "pvpc_cm": c}
+            for i, (s, p, c) in enumerate(zip(*columns))
+        ]
 
-        # Update prices
-        self._prices = {
-            "updated": now.timestamp(),
+        return {
+            "date": day_em.isoformat(),
+            "updated": updated,
             "price_unit": "€/MWh",
+            "resolution": res,
             "data": data
         }
 
-        # Save data
-        self._save_data()
+    def _merge_arrays(
+        self,
+        day_em: date,
+        updated: float,
+        spot: "np.ndarray",
+        pvpc: "np.ndarray"
+    ) -> dict:
+        """Merge the Spot Market and PVPC data of a day parsed in batch.
+
+        The data is merged in the highest resolution of both (see
+        `_merge_data`).
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :param updated: Update timestamp.
+        :param spot: Spot Market data of the day.
+        :param pvpc: PVPC data of the day.
+        :return: Dictionary with the same structure as `_prices`.
+        """
+        minutes = get_day_minutes(day_em)
+        spot_res = minutes // len(spot)
+        pvpc_res = minutes // len(pvpc)
+        res = min(spot_res, pvpc_res)
 
-    def get_prices(self, unit: str = "m") -> list[dict]:
-        """Return the hourly energy prices (of either Spot Market or PVPC) of
-        the current day in Spain.
+        spot = resample_array(spot, spot_res, res).tolist()
+        pvpc = resample_array(pvpc, pvpc_res, res).tolist()
 
-        :param unit: Prices unit. It must be "k" to return the prices in €/kWh
-        or "m" (default) to return them in €/MWh.
-        :return: Sorted list of 24 dictionaries, each one for a different hour
-        of the day. Each dictionary has four keys named "hour, "spot_market",
-        "pvpc_pcb" and "pvpc_cm", which values are, respectively, the hour and
-        the Spot Market price (for all Spain) (float), the PVPC price (for the
-        peninsula, Canarias and Baleares) (float) and the PVPC price (for Ceuta
-        y Melilla) (float) for a particular hour.
+        data = [
+            {
+                "interval": i,
+                "spot_market": s,
+                "pvpc_pcb": p[0],
+                "pvpc_cm": p[1]
+            }
+            for i, (s, p) in enumerate(zip(spot, pvpc))
+        ]
+
+        return {
+            "date": day_em.isoformat(),
+            "updated": updated,
+            "price_unit": "€/MWh",
+            "resolution": res,
+            "data": data
+        }
+
+    def _get_file_lock(self) -> AbstractContextManager:
+        """Return the lock that coordinates the data updates of the processes
+        that share the cache.
+
+        :return: File lock (or a no-op context manager if the cache is an
+        in-memory database).
+        """
+        path = self._store.path
+
+        if path == ":memory:":
+            return nullcontext()
+
+        return FileLock(f"{path}.lock")
+
+    def _get_store_key(self) -> Hashable:
+        """Return the key that identifies the cache in the process.
+
+        :return: Database file path (or the store ID if the cache is an
+        in-memory database, as in-memory stores aren't shared by path).
+        """
+        path = self._store.path
+        return id(self._store) if path == ":memory:" else path
+
+    def _get_spot_ranges(
+        self, missing: list[date], end: date
+    ) -> list[tuple[date, date]]:
+        """Return the date ranges of the Spot Market requests needed to get
+        the data of some days.
+
+        Each range covers up to `SPOT_MAX_DAYS` consecutive days starting from
+        a missing day.
+
+        :param missing: Sorted list of the days to get.
+        :param end: Last date of the ranges.
+        :return: Sorted list of tuples, each one with the start and end dates
+        (included) of a range.
+        """
+        ranges = []
+        i = 0
+
+        while i < len(missing):
+            s = missing[i]
+            e = min(s + timedelta(days=self.SPOT_MAX_DAYS - 1), end)
+            ranges.append((s, e))
+
+            while i < len(missing) and missing[i] <= e:
+                i += 1
+
+        return ranges
+
+    def _read_arrays_range(
+        self, start: date, end: date, unit: str, resolution: Optional[int]
+    ) -> dict:
+        """Return the prices of a date range in the "array" format of
+        `get_prices_range`, reading them from the cache.
+
+        The days of the range must be in the cache. The prices are copied
+        from the cache to NumPy arrays, without creating any Python object
+        for each interval.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :param resolution: Resolution (in minutes) of the prices or None to
+        use the lowest resolution of the days of the range.
+        :return: Prices.
+        """
+        import numpy as np
+
+        # Date, update timestamp, resolution and number of intervals of each
+        # day and prices of every interval
+        days, values = self._store.get_arrays(start, end)
+
+        if resolution is None:
+            resolution = max(r[2] for r in days)
+
+        times = []
+        parts = []
+        i = 0
+
+        for d, _, source, count in days:
+            day_values = values[i:i + count]
+            i += count
+
+            if source != resolution:
+                day_values = resample_array(day_values, source, resolution)
+
+            times.append(
+                np.array(
+                    get_times(date.fromisoformat(d), resolution), dtype="U5"
+                )
+            )
+
+            parts.append(day_values)
+
+        dates = np.repeat(
+            np.array([r[0] for r in days], dtype="datetime64[D]"),
+            [len(t) for t in times]
+        )
+
+        return {
+            "date": dates,
+            "updated": min(r[1] for r in days),
+            "price_unit": "€/MWh" if unit == "m" else "€/kWh",
+            "resolution": resolution,
+            **self._get_arrays(
+                np.concatenate(times), np.concatenate(parts), unit
+            )
+        }
+
+    def _format_days_range(
+        self, days: list[dict], unit: str, resolution: Optional[int]
+    ) -> dict:
+        """Return the prices of a date range in the "dict" format of
+        `get_prices_range`.
+
+        :param days: Sorted list of dictionaries, each one for a different day
+        and with the same structure as `_prices`.
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :param resolution: Resolution (in minutes) of the prices or None to
+        use the lowest resolution of the days.
+        :return: Prices.
+        """
+        if resolution is None:
+            resolution = max(d["resolution"] for d in days)
+
+        price_unit = "€/MWh" if unit == "m" else "€/kWh"
+        conv = self._get_converter(unit)
+
+        data = []
+
+        for d in days:
+            d = self._resample_prices(d, resolution)
+            times = get_times(date.fromisoformat(d["date"]), resolution)
+
+            data.extend(
+                {
+                    "date": d["date"],
+                    "time": times[x["interval"]],
+                    "spot_market": conv(x["spot_market"]),
+                    "pvpc_pcb": conv(x["pvpc_pcb"]),
+                    "pvpc_cm": conv(x["pvpc_cm"])
+                }
+                for x in d["data"]
+            )
+
+        return {
+            "updated": min(d["updated"] for d in days),
+            "price_unit": price_unit,
+            "resolution": resolution,
+            "data": data
+        }
+
+    def _read_prices_range(
+        self,
+        start: date,
+        end: date,
+        unit: str,
+        format: str,
+        resolution: Optional[int]
+    ) -> dict:
+        """Return the prices of a date range in the format of
+        `get_prices_range`, reading them from the cache.
+
+        The days of the range must be in the cache.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :param format: Prices format. It must be "dict" or "array".
+        :param resolution: Resolution (in minutes) of the prices or None to
+        use the lowest resolution of the days of the range.
+        :return: Prices.
+        """
+        if format == "array":
+            return self._read_arrays_range(start, end, unit, resolution)
+
+        cached = self._store.get_days(start, end)
+        days = [cached[d] for d in sorted(cached)]
+
+        return self._format_days_range(days, unit, resolution)
+
+    def _select_cheapest(
+        self,
+        prices: dict,
+        start: datetime,
+        end: datetime,
+        hours: int,
+        series: str,
+        window: bool
+    ) -> dict:
+        """Select the cheapest intervals of a period.
+
+        :param prices: Prices of the days of the period in the "array" format
+        of `get_prices_range`.
+        :param start: Start datetime of the period in the Europe/Madrid time
+        zone (see `_check_period`).
+        :param end: End datetime of the period (not included) in the
+        Europe/Madrid time zone.
+        :param hours: Number of hours to find.
+        :param series: Prices series.
+        :param window: Whether to find consecutive intervals.
+        :return: Dictionary with the structure of the values returned by
+        `get_cheapest_window` and `get_cheapest_hours`.
+        """
+        import numpy as np
+
+        res = prices["resolution"]
+        starts = get_starts(prices["date"], res)
+
+        # Intervals of the period (consecutive)
+        utc = [
+            np.datetime64(x.astimezone(timezone.utc).replace(tzinfo=None))
+            for x in (start, end)
+        ]
+
+        step = np.timedelta64(res, "m")
+        idx = np.flatnonzero((starts >= utc[0]) & (starts + step <= utc[1]))
+        first = idx[0] if len(idx) else 0
+
+        values = prices[series][first:first + len(idx)]
+        count = hours * 60 // res
+
+        if window:
+            i = first + find_cheapest_window(values, count)
+            sel = np.arange(i, i + count)
+        else:
+            sel = first + find_cheapest_intervals(values, count)
+
+        data = [
+            {"date": str(d), "time": t, series: v}
+            for d, t, v in zip(
+                prices["date"][sel].tolist(), prices["time"][sel].tolist(),
+                prices[series][sel].tolist()
+            )
+        ]
+
+        result = {
+            "series": series,
+            "price_unit": prices["price_unit"],
+            "resolution": res,
+            "mean": float(prices[series][sel].mean()),
+            "data": data
+        }
+
+        if window:
+            # Start and end datetimes (Europe/Madrid) of the window
+            result["start"], result["end"] = [
+                x.item().replace(tzinfo=timezone.utc).astimezone(TZ)
+                .isoformat()
+                for x in (starts[sel[0]], starts[sel[-1]] + step)
+            ]
+
+        return result
+
+    def _check_period(self, start: datetime, end: datetime) -> tuple:
+        """Check a period.
+
+        :param start: Start datetime of the period. If it doesn't have a time
+        zone, it's in the Europe/Madrid time zone.
+        :param end: End datetime of the period (not included). If it doesn't
+        have a time zone, it's in the Europe/Madrid time zone.
+        :return: Tuple with the start and end datetimes in the Europe/Madrid
+        time zone and the date of the last day of the period.
+        """
+        start, end = [
+            (x if x.tzinfo else x.replace(tzinfo=TZ)).astimezone(TZ)
+            for x in (start, end)
+        ]
+
+        if end <= start:
+            raise Exception(
+                "Invalid period. The end must be later than the start."
+            )
+
+        return start, end, (end - timedelta(microseconds=1)).date()
+
+    def _check_unit(self, unit: str) -> str:
+        """Check a prices unit.
+
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :return: Prices unit in lowercase.
         """
         unit = unit.lower()
 
-        # Check units
         if unit not in ("k", "m"):
             raise Exception(
                 'Invalid unit. It must be "k" (€/kWh) or "m" (€/MWh)'
             )
 
-        # Check whether data is valid and update it if not
-        if not self._is_data_valid():
-            self._update_data()
+        return unit
+
+    def _check_format(self, format: str) -> str:
+        """Check a prices format.
+
+        :param format: Prices format. It must be "dict" or "array".
+        :return: Prices format in lowercase.
+        """
+        format = format.lower()
+
+        if format not in ("dict", "array"):
+            raise Exception('Invalid format. It must be "dict" or "array"')
+
+        return format
+
+    def _check_series(self, series: str) -> str:
+        """Check a prices series.
+
+        :param series: Prices series. It must be "spot_market", "pvpc_pcb" or
+        "pvpc_cm".
+        :return: Prices series in lowercase.
+        """
+        series = series.lower()
+
+        if series not in self.PRICE_KEYS:
+            raise Exception(
+                'Invalid series. It must be "spot_market", "pvpc_pcb" or '
+                '"pvpc_cm"'
+            )
+
+        return series
+
+    def _get_converter(self, unit: str) -> Callable[[float], float]:
+        """Return a function that converts a price from €/MWh to a unit.
 
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :return: Function.
+        """
         if unit == "m":
-            # Deep copy of "self._prices["data"]" with the prices in €/MWh
-            price_unit = self._prices["price_unit"]
-
-            data = list(map(
-                lambda x: {
-                    "time": self._format_hour(x["hour"]),
-                    "spot_market": x["spot_market"],
-                    "pvpc_pcb": x["pvpc_pcb"],
-                    "pvpc_cm": x["pvpc_cm"],
-                },
-                self._prices["data"]
-            ))
-        else:
-            # Deep copy of "self._prices["data"]" with the prices in €/kWh
-            price_unit = "€/kWh"
-
-            data = list(map(
-                lambda x: {
-                    "time": self._format_hour(x["hour"]),
-                    "spot_market": round(x["spot_market"] / 1000, 5),
-                    "pvpc_pcb": round(x["pvpc_pcb"] / 1000, 5),
-                    "pvpc_cm": round(x["pvpc_cm"] / 1000, 5)
-                },
-                self._prices["data"]
-            ))
+            return lambda x: x
+
+        return lambda x: round(x / 1000, 5)
+
+    def _resample_prices(
+        self, prices: dict, resolution: Optional[int]
+    ) -> dict:
+        """Return the prices of a day in another resolution.
+
+        :param prices: Dictionary with the same structure as `_prices`.
+        :param resolution: Resolution (in minutes) or None to keep the
+        resolution of the prices.
+        :return: Dictionary with the same structure as `_prices`.
+        """
+        source = prices["resolution"]
+
+        if resolution is None or resolution == source:
+            return prices
+
+        columns = [
+            resample([x[k] for x in prices["data"]], source, resolution)
+            for k in self.PRICE_KEYS
+        ]
+
+        data = [
+            {"interval": i, **dict(zip(self.PRICE_KEYS, v))}
+            for i, v in enumerate(zip(*columns))
+        ]
+
+        return {**prices, "resolution": resolution, "data": data}
+
+    def _format_prices(self, prices: dict, unit: str) -> dict:
+        """Return the prices of a day in the format of `get_prices`.
+
+        :param prices: Dictionary with the same structure as `_prices`.
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :return: Prices.
+        """
+        # Deep copy of "prices["data"]" with the prices in the unit
+        price_unit = "€/MWh" if unit == "m" else "€/kWh"
+        conv = self._get_converter(unit)
+
+        times = get_times(
+            date.fromisoformat(prices["date"]), prices["resolution"]
+        )
+
+        data = list(map(
+            lambda x: {
+                "time": times[x["interval"]],
+                "spot_market": conv(x["spot_market"]),
+                "pvpc_pcb": conv(x["pvpc_pcb"]),
+                "pvpc_cm": conv(x["pvpc_cm"])
+            },
+            prices["data"]
+        ))
 
         return {
-            "updated": self._prices["updated"],
+            "date": prices["date"],
+            "updated": prices["updated"],
             "price_unit": price_unit,
+            "resolution": prices["resolution"],
             "data": data
         }
+
+    def _get_arrays(
+        self, times: Union[list[str], "np.ndarray"], values: "np.ndarray",
+        unit: str
+    ) -> dict:
+        """Return prices as NumPy arrays.
+
+        The prices are converted to the unit with a single vectorized
+        operation.
+
+        :param times: Time string (HH:MM) of each interval (list or NumPy
+        array).
+        :param values: NumPy array (float) of shape (intervals, 3) with the
+        Spot Market, PVPC (Peninsula, Canarias and Baleares) and PVPC (Ceuta
+        and Melilla) prices in €/MWh of each interval.
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :return: Dictionary with the keys of `ARRAY_KEYS`, which values are,
+        respectively, an array of time strings (HH:MM) and an array (float) of
+        each type of prices.
+        """
+        # NumPy is imported here, instead of at the top of the module, because
+        # it takes a long time to be imported and it's only needed for this
+        # format.
+        import numpy as np
+
+        # One row for each type of prices
+        prices = np.ascontiguousarray(values.T)
+
+        if unit == "k":
+            prices = np.round(prices / 1000, 5)
+
+        return {
+            "time": np.array(times, dtype="U5"),
+            "spot_market": prices[0],
+            "pvpc_pcb": prices[1],
+            "pvpc_cm": prices[2]
+        }
+
+    def _format_arrays(self, prices: dict, unit: str) -> dict:
+        """Return the prices of a day in the "array" format of `get_prices`.
+
+        :param prices: Dictionary with the same structure as `_prices`.
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :return: Prices.
+        """
+        import numpy as np
+
+        values = np.array(
+            [[x[k] for k in self.PRICE_KEYS] for x in prices["data"]],
+            dtype=np.float64
+        )
+
+        times = get_times(
+            date.fromisoformat(prices["date"]), prices["resolution"]
+        )
+
+        return {
+            "date": prices["date"],
+            "updated": prices["updated"],
+            "price_unit": "€/MWh" if unit == "m" else "€/kWh",
+            "resolution": prices["resolution"],
+            **self._get_arrays(
+                [times[x["interval"]] for x in prices["data"]],
+                values.reshape(-1, 3),
+                unit
+            )
+        }
+
+    def _get_prices(
+        self,
+        prices: dict,
+        unit: str,
+        format: str = "dict",
+        resolution: Optional[int] = None
+    ) -> dict:
+        """Return the prices of a day in the format of `get_prices`, using the
+        in-memory cache of the process.
+
+        The prices are only converted the first time a day (with the same
+        update timestamp) is requested in a unit, format and resolution. The
+        returned dictionary is a copy of the cached one, so it can be modified
+        by the caller.
+
+        :param prices: Dictionary with the same structure as `_prices`.
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :param format: Prices format. It must be "dict" (default) or "array".
+        :param resolution: Resolution (in minutes) or None (default) to keep
+        the resolution of the prices.
+        :return: Prices.
+        """
+        resolution = resolution or prices["resolution"]
+
+        key = (
+            self._get_store_key(), prices["date"], unit, format, resolution
+        )
+
+        updated = prices["updated"]
+        cached = _prices_cache.get(key, updated)
+
+        if cached is None:
+            prices = self._resample_prices(prices, resolution)
+
+            if format == "dict":
+                cached = self._format_prices(prices, unit)
+            else:
+                cached = self._format_arrays(prices, unit)
+
+            _prices_cache.put(key, updated, cached)
+
+        if format == "dict":
+            return {**cached, "data": [dict(x) for x in cached["data"]]}
+
+        return {**cached, **{k: cached[k].copy() for k in self.ARRAY_KEYS}}
+
+
+class PricesManager(BasePricesManager):
+    """Prices manager.
+
+    This class gets the Spot Market and PVPC energy prices of every interval
+    (hour or, since the market changed its resolution, quarter-hour) of the
+    current day in Spain. The data of every day is cached in a history
+    store (a database file inside the user's home directory). The data is
+    provided by some APIs of "Red Eléctrica de España".
+
+    The values are stored in €/MWh but can be returned in either €/kWh or
+    €/MWh by the `get_prices` method.
+    """
+
+    # Maximum number of parallel API requests to get the data of a date range
+    RANGE_MAX_WORKERS = 8
+
+    def __init__(
+        self,
+        transport: Optional[Transport] = None,
+        store: Optional[HistoryStore] = None
+    ):
+        """Class initializer.
+
+        When this method is called, the `_load_data` method is called. This
+        method sets the `_prices` attribute. The following is an example of the
+        `_prices` structure (the prices are in €/MWh):
+
+        {
+          "date": "2022-12-15",
+          "updated": 1671058800.0
+          "price_unit": "€/MWh",
+          "resolution": 60,
+          "data": [
+            {
+              "interval": 14,
+              "spot_market": 250.78,
+              "pvpc_pcb": 127.97,
+              "pvpc_cm": 120.5,
+            }
+          ]
+        }
+
+        The resolution is the length (in minutes) of the intervals of the day
+        and the intervals are numbered from 0. The number of intervals depends
+        on the resolution and on the length of the day (23, 24 or 25 hours).
+
+        :param transport: Transport used to call the APIs. If it's None
+        (default), a transport shared by all the instances is used.
+        :param store: History store used as cache. If it's None (default), a
+        store shared by all the instances is used.
+        """
+        self._transport = transport or get_default_transport()
+        self._store = store or get_default_store()
+        self._prices = None
+
+        # Background update thread (stale-while-revalidate mode) and functions
+        # to call when it finishes.
+        self._refresh_thread = None
+        self._refresh_callbacks = []
+        self._refresh_lock = Lock()
+
+        self._load_data()
+
+    def _load_data(self):
+        """Load the data of the current day from the cache."""
+        self._prices = self._store.get_day(self._get_today_em())
+
+    def _get_spot_market_data(self, start: date, end: date) -> dict:
+        """Get the Spot Market data of a date range with a single request.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :return: Dictionary with the structure of the value returned by
+        `_parse_spot_market_data`.
+        """
+        # Make request to the API and read the response data to get the Spot
+        # Market prices (in €/MWh).
+        data = self._transport.get_json(self._get_spot_market_url(start, end))
+
+        return self._parse_spot_market_data(data, start, end)
+
+    def _get_updated_spot_market_data(self, day_em: date) -> list[dict]:
+        """Get the Spot Market updated data.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: Sorted list of dictionaries, each one for a different interval
+        of the day. Each dictionary has a key named "spot_market" which value
+        is the Spot Market price (for all Spain) (float) for a particular
+        interval.
+        """
+        return self._get_spot_market_data(day_em, day_em)[day_em]
+
+    def _get_updated_pvpc_data(self, day_em: date) -> list[dict]:
+        """Get the PVPC updated data.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: List with the structure of the value returned by
+        `_parse_pvpc_data`.
+        """
+        # Make request to the API and read the response data to get the PVPC
+        # prices (in €/MWh).
+        data = self._transport.get_json(self._get_pvpc_url(day_em))
+
+        return self._parse_pvpc_data(data, day_em)
+
+    def _get_spot_market_arrays(self, start: date, end: date) -> dict:
+        """Get the Spot Market data of a date range with a single request and
+        parse it in batch.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :return: Dictionary which keys are the dates of the range and which
+        values are NumPy arrays with the Spot Market prices (for all Spain) of
+        every interval of the day.
+        """
+        url = self._get_spot_market_url(start, end)
+        return parse_spot_market(self._transport.get_json(url), start, end)
+
+    def _get_pvpc_arrays(self, day_em: date) -> "np.ndarray":
+        """Get the PVPC data of a day and parse it in batch.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: NumPy array of shape (hours, 2) with the PVPC prices (for
+        peninsula, Canarias and Baleares) and the PVPC prices (for Ceuta y
+        Melilla) of every hour of the day.
+        """
+        url = self._get_pvpc_url(day_em)
+        return parse_pvpc(self._transport.get_json(url), day_em)
+
+    def _run_parallel(
+        self, calls: dict, timeout: Optional[float] = None
+    ) -> dict:
+        """Run some calls in parallel and return their results.
+
+        If any of the calls fails or the deadline is reached, an exception is
+        raised and the pending calls are cancelled.
+
+        :param calls: Dictionary which keys are the call names and which values
+        are tuples with a function and its arguments.
+        :param timeout: Deadline (in seconds) shared by all the calls. If it's
+        None (default), there's no deadline.
+        :return: Dictionary which keys are the call names and which values are
+        the call results.
+        """
+        workers = min(len(calls), self.RANGE_MAX_WORKERS)
+        executor = ThreadPoolExecutor(max_workers=max(workers, 1))
+
+        try:
+            futures = {
+                k: executor.submit(*v) for k, v in calls.items()
+            }
+
+            done, _ = wait(
+                futures.values(), timeout=timeout, return_when=FIRST_EXCEPTION
+            )
+
+            for k, f in futures.items():
+                if f in done and f.exception() is not None:
+                    raise Exception(
+                        f"{k} data couldn't be updated: {f.exception()}"
+                    ) from f.exception()
+
+            for k, f in futures.items():
+                if f not in done:
+                    raise Exception(
+                        f"{k} data couldn't be updated: No response received "
+                        f"in {timeout} seconds."
+                    )
+
+            return {k: f.result() for k, f in futures.items()}
+        finally:
+            # We don't wait for any pending call
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_updated_data(self, day_em: date) -> dict:
+        """Get the data of a day by calling the APIs and save it to the cache.
+
+        This method holds the cache file lock, so only one process gets the
+        data. The rest of the processes wait for the lock and then find the
+        data in the cache.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: Dictionary with the same structure as `_prices`.
+        """
+        with self._get_file_lock():
+            # Another process may have got the data while we were waiting
+            prices = self._store.get_day(day_em)
+
+            if prices is not None:
+                return prices
+
+            # Get updated data. We call both APIs in parallel. If any of the
+            # calls fails or the deadline is reached, the data isn't updated at
+            # all.
+            now = datetime.now()
+
+            res = self._run_parallel(
+                {
+                    "Spot Market":
+                        (self._get_updated_spot_market_data, day_em),
+                    "PVPC": (self._get_updated_pvpc_data, day_em)
+                },
+                self.UPDATE_TIMEOUT
+            )
+
+            prices = self._merge_data(
+                day_em, now.timestamp(), res["Spot Market"], res["PVPC"]
+            )
+
+            # Save data. The data of the day is written in a single SQLite
+            # transaction, so readers never see partial data.
+            self._store.set_day(day_em, prices)
+
+            return prices
+
+    def _get_day_data(self, day_em: date) -> dict:
+        """Get the data of a day from the cache or, if it isn't there, by
+        calling the APIs.
+
+        If several threads get the data of the same day and cache at the same
+        time, only one of them calls the APIs and the rest wait for it
+        (single-flight).
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: Dictionary with the same structure as `_prices`.
+        """
+        key = (self._get_store_key(), day_em)
+        return _update_flight.do(key, self._get_updated_data, day_em)
+
+    def _update_data(self):
+        """Update the data by calling the APIs."""
+        self._prices = self._get_day_data(self._get_today_em())
+
+    def _get_data_range(self, start: date, end: date) -> list[dict]:
+        """Get the data of a date range.
+
+        The days of the range that are in the cache are got from it. The rest
+        of the days are got by calling the APIs (a single Spot Market request
+        for every `SPOT_MAX_DAYS` days and a PVPC request for each day, all of
+        them in parallel), parsed in batch and saved to the cache.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :return: Sorted list of dictionaries, each one for a different day and
+        with the same structure as `_prices`.
+        """
+        if start > end:
+            raise Exception(
+                "Invalid date range. The start date is after the end date."
+            )
+
+        days = [
+            start + timedelta(days=i) for i in range((end - start).days + 1)
+        ]
+
+        cached = self._store.get_days(start, end)
+        missing = [d for d in days if d.isoformat() not in cached]
+
+        if missing:
+            now = datetime.now()
+            calls = {}
+
+            # Spot Market requests
+            for s, e in self._get_spot_ranges(missing, end):
+                calls[f"Spot Market ({s} - {e})"] = (
+                    self._get_spot_market_arrays, s, e
+                )
+
+            # PVPC requests
+            for d in missing:
+                calls[f"PVPC ({d})"] = (self._get_pvpc_arrays, d)
+
+            res = self._run_parallel(calls)
+
+            spot = {}
+
+            for k, v in res.items():
+                if k.startswith("Spot Market"):
+                    spot.update(v)
+
+            fetched = {
+                d: self._merge_arrays(
+                    d, now.timestamp(), spot[d], res[f"PVPC ({d})"]
+                )
+                for d in missing
+            }
+
+            self._store.set_days(fetched)
+
+            for d, v in fetched.items():
+                cached[d.isoformat()] = v
+
+        return [cached[d.isoformat()] for d in days]
+
+    def _iter_spot_market_days(
+        self, start: date, end: date
+    ) -> Iterator[tuple[date, list[float]]]:
+        """Get the Spot Market data of a date range with a single request in
+        streaming mode.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :return: Iterator of tuples, each one with a date of the range and a
+        list with the Spot Market prices (for all Spain) of its intervals,
+        yielded as soon as the values of the day are received.
+        """
+        url = self._get_spot_market_url(start, end)
+
+        try:
+            chunks = self._transport.iter_text(url)
+
+            yield from iter_spot_market_days(
+                iter_spot_market_values(chunks), start, end
+            )
+        except Exception as e:
+            raise Exception(
+                f"Spot Market ({start} - {end}) data couldn't be updated: {e}"
+            ) from e
+
+    def _update_spot_range(
+        self,
+        start: date,
+        end: date,
+        days: list[date],
+        max_workers: Optional[int] = None
+    ):
+        """Get the data of some days of a Spot Market request range in
+        streaming mode and save it to the cache.
+
+        The PVPC data of the days is got in parallel while the Spot Market
+        response is received and parsed incrementally. Each day is saved to
+        the cache as soon as its Spot Market values are received, so at most
+        the data of `SPOT_MAX_DAYS` days is in memory. If there's any error,
+        the days saved before it are kept in the cache.
+
+        :param start: Start date of the range (in the Europe/Madrid time zone).
+        :param end: End date of the range (in the Europe/Madrid time zone),
+        included.
+        :param days: Sorted list of the days of the range to save.
+        :param max_workers: Maximum number of parallel PVPC requests. If it's
+        None (default), `RANGE_MAX_WORKERS` is used.
+        """
+        now = datetime.now()
+
+        workers = min(len(days), max_workers or self.RANGE_MAX_WORKERS)
+        executor = ThreadPoolExecutor(max_workers=max(workers, 1))
+
+        try:
+            pvpc = {
+                d: executor.submit(self._get_updated_pvpc_data, d)
+                for d in days
+            }
+
+            for d, spot in self._iter_spot_market_days(start, end):
+                if d not in pvpc:
+                    continue
+
+                try:
+                    pvpc_data = pvpc[d].result()
+                except Exception as e:
+                    raise Exception(
+                        f"PVPC ({d}) data couldn't be updated: {e}"
+                    ) from e
+
+                spot = [{"spot_market": x} for x in spot]
+                prices = self._merge_data(d, now.timestamp(), spot, pvpc_data)
+
+                self._store.set_day(d, prices)
+        finally:
+            # We don't wait for any pending call
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_arrays_range(
+        self, start: date, end: date, unit: str, resolution: Optional[int]
+    ) -> dict:
+        """Return the prices of a date range in the "array" format of
+        `get_prices_range`.
+
+        The days of the range that aren't in the cache are got and saved to
+        the cache before reading the prices (see `_read_arrays_range`).
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :param resolution: Resolution (in minutes) of the prices or None to
+        use the lowest resolution of the days of the range.
+        :return: Prices.
+        """
+        # Check the range and get and save the days of the range that aren't
+        # in the cache.
+        days = (end - start).days + 1
+
+        if days < 1 or len(self._store.get_stored_dates(start, end)) < days:
+            self._get_data_range(start, end)
+
+        return self._read_arrays_range(start, end, unit, resolution)
+
+    def _find_cheapest(
+        self,
+        start: datetime,
+        end: datetime,
+        hours: int,
+        series: str,
+        unit: str,
+        resolution: Optional[int],
+        window: bool
+    ) -> dict:
+        """Find the cheapest intervals of a period.
+
+        :param start: Start datetime of the period. If it doesn't have a time
+        zone, it's in the Europe/Madrid time zone.
+        :param end: End datetime of the period (not included). If it doesn't
+        have a time zone, it's in the Europe/Madrid time zone.
+        :param hours: Number of hours to find.
+        :param series: Prices series. It must be "spot_market", "pvpc_pcb" or
+        "pvpc_cm".
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        :param resolution: Resolution (in minutes) of the prices or None to
+        use the lowest resolution of the days of the period.
+        :param window: Whether to find consecutive intervals.
+        :return: Dictionary with the structure of the values returned by
+        `get_cheapest_window` and `get_cheapest_hours`.
+        """
+        # Check units, series and resolution
+        unit = self._check_unit(unit)
+        series = self._check_series(series)
+
+        if resolution is not None:
+            resolution = check_resolution(resolution)
+
+        # Prices of the days of the period
+        start, end, last = self._check_period(start, end)
+        prices = self._get_arrays_range(start.date(), last, unit, resolution)
+
+        return self._select_cheapest(prices, start, end, hours, series, window)
+
+    def _refresh_data(
+        self,
+        unit: str,
+        format: str,
+        resolution: Optional[int],
+        on_update: Optional[Callable[[dict], None]],
+        on_error: Optional[Callable[[Exception], None]]
+    ):
+        """Update the data in a background thread.
+
+        If the data is already being updated, no new thread is started and the
+        functions are called when the current update finishes.
+
+        :param unit: Prices unit of the data passed to `on_update`.
+        :param format: Prices format of the data passed to `on_update`.
+        :param resolution: Prices resolution of the data passed to
+        `on_update`.
+        :param on_update: Function to call, in the background thread, with the
+        updated prices (in the format of `get_prices`).
+        :param on_error: Function to call, in the background thread, with the
+        exception raised if the data couldn't be updated.
+        """
+        with self._refresh_lock:
+            self._refresh_callbacks.append(
+                (unit, format, resolution, on_update, on_error)
+            )
+
+            if self._refresh_thread is None:
+                self._refresh_thread = Thread(
+                    target=self._run_refresh, daemon=True
+                )
+
+                self._refresh_thread.start()
+
+    def _run_refresh(self):
+        """Update the data and call the functions set by `_refresh_data`."""
+        error = None
+
+        try:
+            self._update_data()
+        except Exception as e:
+            error = e
+
+        with self._refresh_lock:
+            callbacks = self._refresh_callbacks
+            self._refresh_callbacks = []
+            self._refresh_thread = None
+
+        # Each caller is notified separately, so that an error while notifying
+        # a caller doesn't prevent the rest of the callers from being notified
+        for unit, format, resolution, on_update, on_error in callbacks:
+            if error is not None:
+                self._notify(on_error, error)
+                continue
+
+            if on_update is None:
+                continue
+
+            try:
+                prices = self._get_prices(
+                    self._prices, unit, format, resolution
+                )
+            except Exception as e:
+                self._notify(on_error, e)
+                continue
+
+            prices["stale"] = False
+            self._notify(on_update, prices)
+
+    def _notify(self, callback: Optional[Callable[[Any], None]], value: Any):
+        """Call a function set by `_refresh_data`.
+
+        The errors of the function are printed, so that they don't stop the
+        refresh thread.
+
+        :param callback: Function to call (or None).
+        :param value: Value to pass to the function.
+        """
+        if callback is None:
+            return
+
+        try:
+            callback(value)
+        except Exception as e:
+            print(f"Prices update callback error: {e}", file=sys.stderr)
+
+    def get_prices(
+        self,
+        unit: str = "m",
+        stale_ok: bool = False,
+        format: str = "dict",
+        resolution: Optional[int] = None,
+        on_update: Optional[Callable[[dict], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None
+    ) -> list[dict]:
+        """Return the energy prices (of either Spot Market or PVPC) of the
+        current day in Spain.
+
+        By default, if the data of the current day isn't in the cache, this
+        method gets it from the APIs before returning. In the
+        stale-while-revalidate mode (`stale_ok` set to True), the data of the
+        most recent day in the cache is returned immediately instead, while
+        the data of the current day is got in a background thread.
+
+        :param unit: Prices unit. It must be "k" to return the prices in €/kWh
+        or "m" (default) to return them in €/MWh.
+        :param stale_ok: Whether to use the stale-while-revalidate mode. If
+        there isn't any day in the cache, this method waits for the data of
+        the current day as in the default mode.
+        :param format: Prices format. It must be "dict" (default) or "array"
+        (see the returned value).
+        :param resolution: Resolution (in minutes) of the prices. It must be
+        15, 30, 60 or None (default) to return the prices in the resolution of
+        the market data. In a lower resolution than the one of the market
+        data, the price of each interval is the mean of the prices of its
+        shorter intervals.
+        :param on_update: Function to call, in the background thread, with the
+        updated prices (with the same structure as the returned ones) if the
+        returned prices are stale.
+        :param on_error: Function to call, in the background thread, with the
+        exception raised if the returned prices are stale and the data
+        couldn't be updated.
+        :return: Dictionary with five keys named "date", "updated",
+        "price_unit", "resolution" and "data", which values are, respectively,
+        the date string (YYYY-MM-DD) of the prices (in the Europe/Madrid time
+        zone), the update timestamp (float), the prices unit, the resolution
+        (in minutes) and a sorted list of dictionaries, each one for a
+        different interval of the day (e.g. 24 hours or, on the days on which
+        the daylight saving time starts or ends, 23 or 25 hours). Each
+        dictionary has four keys named "time", "spot_market", "pvpc_pcb" and
+        "pvpc_cm", which values are, respectively, the start time (HH:MM) and
+        the Spot Market price (for all Spain) (float), the PVPC price (for the
+        peninsula, Canarias and Baleares) (float) and the PVPC price (for
+        Ceuta y Melilla) (float) for a particular interval. In the
+        stale-while-revalidate mode, the dictionary also has a key named
+        "stale" which value is whether the prices are stale (bool). In the
+        "array" format, the dictionary doesn't have the "data" key. Instead,
+        it has the "time", "spot_market", "pvpc_pcb" and "pvpc_cm" keys, which
+        values are NumPy arrays with the values of every interval.
+        """
+        # Check units, format and resolution
+        unit = self._check_unit(unit)
+        format = self._check_format(format)
+
+        if resolution is not None:
+            resolution = check_resolution(resolution)
+
+        # Check whether data is valid. If not, we look for the data of the
+        # current day in the cache (it may have been stored by another
+        # instance) and, if it isn't there, we update it.
+        if not self._is_data_valid():
+            self._load_data()
+
+        if not self._is_data_valid():
+            stale = None
+
+            if stale_ok:
+                day = self._store.get_last_day(self._get_today_em())
+
+                if day is not None:
+                    stale = self._store.get_day(day)
+
+            if stale is None:
+                self._update_data()
+            else:
+                self._refresh_data(
+                    unit, format, resolution, on_update, on_error
+                )
+
+                prices = self._get_prices(stale, unit, format, resolution)
+                prices["stale"] = True
+
+                return prices
+
+        prices = self._get_prices(self._prices, unit, format, resolution)
+
+        if stale_ok:
+            prices["stale"] = False
+
+        return prices
+
+    def is_cached(self, day_em: date) -> bool:
+        """Return whether the data of a day is in the cache.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        :return: Whether the data is in the cache.
+        """
+        return bool(self._store.get_stored_dates(day_em, day_em))
+
+    def prefetch(self, day_em: date):
+        """Get the data of a day and save it to the cache, if it isn't there.
+
+        This method is used to get the data of the next day as soon as it's
+        published, so that the first `get_prices` call of the day doesn't
+        have to wait for the APIs.
+
+        :param day_em: Date in the Europe/Madrid time zone.
+        """
+        self._get_day_data(day_em)
+
+    def update_range(
+        self, start: date, end: date, max_workers: Optional[int] = None
+    ) -> int:
+        """Get the data of the days of a date range that aren't in the cache
+        and save it to the cache.
+
+        Unlike `get_prices_range`, this method doesn't return the data, so
+        the Spot Market responses are parsed while they're received (streaming
+        mode) and each day is saved to the cache as soon as its data is
+        complete. The memory used doesn't depend on the number of days of the
+        range.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :param max_workers: Maximum number of parallel PVPC requests. If it's
+        None (default), `RANGE_MAX_WORKERS` is used.
+        :return: Number of days saved to the cache.
+        """
+        if start > end:
+            raise Exception(
+                "Invalid date range. The start date is after the end date."
+            )
+
+        stored = self._store.get_stored_dates(start, end)
+
+        missing = [
+            d for d in (
+                start + timedelta(days=i)
+                for i in range((end - start).days + 1)
+            )
+            if d not in stored
+        ]
+
+        for s, e in self._get_spot_ranges(missing, end):
+            self._update_spot_range(
+                s, e, [d for d in missing if s <= d <= e], max_workers
+            )
+
+        return len(missing)
+
+    def get_prices_range(
+        self,
+        start: date,
+        end: date,
+        unit: str = "m",
+        format: str = "dict",
+        resolution: Optional[int] = None
+    ) -> dict:
+        """Return the energy prices (of either Spot Market or PVPC) of a date
+        range in Spain.
+
+        The days of the range that are in the cache are returned without any
+        API request. The rest of the days are got with as few requests as
+        possible and saved to the cache.
+
+        :param start: Start date (in the Europe/Madrid time zone).
+        :param end: End date (in the Europe/Madrid time zone), included.
+        :param unit: Prices unit. It must be "k" to return the prices in €/kWh
+        or "m" (default) to return them in €/MWh.
+        :param format: Prices format. It must be "dict" (default) or "array"
+        (see the returned value).
+        :param resolution: Resolution (in minutes) of the prices. It must be
+        15, 30, 60 or None (default) to return the prices in the lowest
+        resolution of the days of the range (see `get_prices`).
+        :return: Dictionary with the same keys as the one returned by
+        `get_prices`. The "updated" value is the oldest update timestamp of the
+        days of the range and the "data" value is a sorted list of
+        dictionaries, each one for a different interval of the range. Each
+        dictionary has the same keys as the ones returned by `get_prices` and
+        a key named "date", which value is the date string (YYYY-MM-DD). In the
+        "array" format, the dictionary has the same keys as the one returned
+        by `get_prices` in this format. The "date" value is a NumPy array
+        (datetime64[D]) with the date of every interval.
+        """
+        # Check units, format and resolution
+        unit = self._check_unit(unit)
+        format = self._check_format(format)
+
+        if resolution is not None:
+            resolution = check_resolution(resolution)
+
+        if format == "array":
+            return self._get_arrays_range(start, end, unit, resolution)
+
+        days = self._get_data_range(start, end)
+        return self._format_days_range(days, unit, resolution)
+
+    def get_cheapest_window(
+        self,
+        start: datetime,
+        end: datetime,
+        hours: int,
+        series: str = "spot_market",
+        unit: str = "m",
+        resolution: Optional[int] = None
+    ) -> dict:
+        """Return the cheapest window of consecutive hours of a period.
+
+        The prices of the days of the period are got as `get_prices_range`
+        does (the days that aren't in the cache are got from the APIs) and the
+        window is found in O(n) time.
+
+        :param start: Start datetime of the period. If it doesn't have a time
+        zone, it's in the Europe/Madrid time zone.
+        :param end: End datetime of the period (not included). If it doesn't
+        have a time zone, it's in the Europe/Madrid time zone.
+        :param hours: Number of hours of the window.
+        :param series: Prices series. It must be "spot_market" (default),
+        "pvpc_pcb" or "pvpc_cm".
+        :param unit: Prices unit. It must be "k" to return the prices in €/kWh
+        or "m" (default) to return them in €/MWh.
+        :param resolution: Resolution (in minutes) of the prices. It must be
+        15, 30, 60 or None (default) to use the lowest resolution of the days
+        of the period (see `get_prices_range`).
+        :return: Dictionary with seven keys named "series", "price_unit",
+        "resolution", "mean", "data", "start" and "end", which values are,
+        respectively, the prices series, the prices unit, the resolution (in
+        minutes), the mean price of the window (float), a sorted list of
+        dictionaries, each one for an interval of the window, and the start
+        and end datetime strings (ISO 8601, in the Europe/Madrid time zone) of
+        the window. Each dictionary has three keys named "date", "time" and
+        the series name, which values are, respectively, the date string
+        (YYYY-MM-DD), the start time (HH:MM) and the price (float) of the
+        interval.
+        """
+        return self._find_cheapest(
+            start, end, hours, series, unit, resolution, True
+        )
+
+    def get_cheapest_hours(
+        self,
+        start: datetime,
+        end: datetime,
+        hours: int,
+        series: str = "spot_market",
+        unit: str = "m",
+        resolution: Optional[int] = None
+    ) -> dict:
+        """Return the cheapest hours (not necessarily consecutive) of a
+        period.
+
+        The prices of the days of the period are got as `get_prices_range`
+        does and the hours are selected in O(n) time. With quarter-hour
+        prices, the cheapest quarter-hours are selected (4 for each hour).
+
+        :param start: Start datetime of the period. If it doesn't have a time
+        zone, it's in the Europe/Madrid time zone.
+        :param end: End datetime of the period (not included). If it doesn't
+        have a time zone, it's in the Europe/Madrid time zone.
+        :param hours: Number of hours.
+        :param series: Prices series. It must be "spot_market" (default),
+        "pvpc_pcb" or "pvpc_cm".
+        :param unit: Prices unit. It must be "k" to return the prices in €/kWh
+        or "m" (default) to return them in €/MWh.
+        :param resolution: Resolution (in minutes) of the prices. It must be
+        15, 30, 60 or None (default) to use the lowest resolution of the days
+        of the period (see `get_prices_range`).
+        :return: Dictionary with the same keys as the one returned by
+        `get_cheapest_window` except "start" and "end". The "data" value is a
+        sorted list with the selected intervals.
+        """
+        return self._find_cheapest(
+            start, end, hours, series, unit, resolution, False
+        )
+
+
+def get_default_prices_manager() -> PricesManager:
+    """Return the default prices manager.
+
+    The default prices manager is created the first time this function is
+    called and it uses the default transport and store. Reusing it avoids
+    reading the data of the current day from the store every time.
+
+    :return: `PricesManager` instance.
+    """
+    global _default_prices_manager
+
+    with _default_prices_manager_lock:
+        if _default_prices_manager is None:
+            _default_prices_manager = PricesManager()
+
+        return _default_prices_manager
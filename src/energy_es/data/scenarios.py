@@ -0,0 +1,262 @@
+"""Energy-ES - Data - Scenarios."""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Callable, Optional, Sequence
+
+from energy_es.data.prices import PricesManager, get_default_prices_manager
+
+# The cost of M load profiles with S tariffs is the product of the M x T matrix
+# of the loads and the T x S matrix of the prices of the T intervals of the
+# tariffs, so it's computed with a single matrix product (or a few of them, in
+# parallel). NumPy is imported when the functions are called, so that importing
+# this module is fast.
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Shared arrays of the current worker process (see `_init_worker`)
+_worker_arrays: dict = {}
+
+
+class Tariff:
+    """Tariff scenario.
+
+    A tariff defines the price of each interval as a transform of the prices
+    of a series: the prices (in €/kWh) are multiplied by a factor, an offset
+    is added to them and, optionally, a function is applied to the result
+    (e.g. to add time-of-use charges).
+    """
+
+    # Prices series
+    SERIES = ("spot_market", "pvpc_pcb", "pvpc_cm")
+
+    def __init__(
+        self,
+        name: str,
+        series: str = "pvpc_pcb",
+        factor: float = 1.0,
+        offset: float = 0.0,
+        transform: Optional[
+            Callable[["np.ndarray", "np.ndarray"], "np.ndarray"]
+        ] = None
+    ):
+        """Class initializer.
+
+        :param name: Tariff name.
+        :param series: Prices series. It must be "spot_market", "pvpc_pcb"
+        (default) or "pvpc_cm".
+        :param factor: Factor by which the prices are multiplied.
+        :param offset: Amount (€/kWh) added to the prices.
+        :param transform: Function applied to the prices after the factor and
+        the offset. The function receives a NumPy array (float) with the
+        prices (€/kWh) and a NumPy array (datetime64[m]) with the local
+        (Europe/Madrid) start datetime of each interval, and it must return a
+        NumPy array (float) with the same shape as the prices.
+        """
+        if series not in self.SERIES:
+            raise Exception(
+                'Invalid series. It must be "spot_market", "pvpc_pcb" or '
+                '"pvpc_cm"'
+            )
+
+        self.name = name
+        self.series = series
+        self.factor = factor
+        self.offset = offset
+        self.transform = transform
+
+    def get_prices(self, prices: dict) -> "np.ndarray":
+        """Return the prices of the tariff.
+
+        :param prices: Prices as returned by `PricesManager.get_prices_range`
+        in the "array" format, in €/MWh.
+        :return: NumPy array (float) with the price (€/kWh) of each interval.
+        """
+        import numpy as np
+
+        values = prices[self.series] / 1000 * self.factor + self.offset
+
+        if self.transform is None:
+            return values
+
+        # Local start datetimes
+        minutes = [int(t[:2]) * 60 + int(t[3:]) for t in prices["time"]]
+
+        local = (
+            prices["date"].astype("datetime64[m]") +
+            np.array(minutes, dtype="timedelta64[m]")
+        )
+
+        values = np.asarray(self.transform(values, local), dtype=np.float64)
+
+        if values.shape != prices[self.series].shape:
+            raise Exception(
+                f"Invalid tariff {self.name}. Its transform must return a "
+                "price for each interval."
+            )
+
+        return values
+
+
+def get_default_tariffs() -> list[Tariff]:
+    """Return a tariff for each prices series, without any transform.
+
+    :return: Tariffs.
+    """
+    return [Tariff(s, s) for s in Tariff.SERIES]
+
+
+def _attach(name: str, shape: tuple, dtype: str) -> tuple:
+    """Attach to a shared memory block created by `evaluate_scenarios`.
+
+    :param name: Block name.
+    :param shape: Array shape.
+    :param dtype: Array data type.
+    :return: Tuple with the block and a NumPy array that uses it.
+    """
+    import numpy as np
+
+    # The block is unlinked by the parent process. The worker processes share
+    # its resource tracker, so attaching to the block doesn't track it twice.
+    shm = SharedMemory(name)
+
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _init_worker(blocks: dict):
+    """Initialize a worker process of `evaluate_scenarios`.
+
+    :param blocks: Dictionary with the name, shape and data type of the shared
+    memory block of the loads, the prices and the costs.
+    """
+    for k, v in blocks.items():
+        _worker_arrays[k] = _attach(*v)
+
+
+def _compute_rows(first: int, last: int):
+    """Compute some rows of the costs in a worker process.
+
+    :param first: First row.
+    :param last: Last row (not included).
+    """
+    loads = _worker_arrays["loads"][1]
+    prices = _worker_arrays["prices"][1]
+    costs = _worker_arrays["costs"][1]
+
+    costs[first:last] = loads[first:last] @ prices
+
+
+def _share(arr: "np.ndarray") -> tuple:
+    """Copy an array to a new shared memory block.
+
+    :param arr: NumPy array.
+    :return: Tuple with the block and a NumPy array that uses it.
+    """
+    import numpy as np
+
+    shm = SharedMemory(create=True, size=max(arr.nbytes, 1))
+    shared = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+    shared[...] = arr
+
+    return shm, shared
+
+
+def evaluate_scenarios(
+    loads: "np.ndarray",
+    tariffs: Sequence[Tariff],
+    start: date,
+    end: date,
+    resolution: int = 60,
+    workers: Optional[int] = 1,
+    chunk_rows: int = 1024,
+    prices_manager: Optional[PricesManager] = None
+) -> "np.ndarray":
+    """Return the energy costs of load profiles with tariff scenarios.
+
+    The prices of every tariff are computed once for all the profiles. The
+    costs are computed by blocks of `chunk_rows` profiles, each block with a
+    matrix product, either in this process or in a process pool. In the pool,
+    the loads, the prices and the costs are in shared memory, so they aren't
+    copied to each process. The blocks are always the same, whatever the
+    number of workers, so the results are reproducible.
+
+    :param loads: NumPy array (float) of shape (M, T) with the consumption
+    (kWh) of M profiles in the T intervals of the date range (in the order of
+    `PricesManager.get_prices_range`).
+    :param tariffs: S tariffs (see `get_default_tariffs`).
+    :param start: Start date (in the Europe/Madrid time zone) of the range.
+    :param end: End date (in the Europe/Madrid time zone), included, of the
+    range.
+    :param resolution: Resolution (in minutes) of the profiles. Default: 60.
+    :param workers: Number of worker processes. If it's 1 (default), the costs
+    are computed in this process (NumPy may still use several threads for
+    each product). If it's None, the number of CPU cores is used.
+    :param chunk_rows: Number of profiles of each block.
+    :param prices_manager: Prices manager used to get the prices. If it's None
+    (default), the default prices manager is used.
+    :return: NumPy array (float) of shape (M, S) with the cost (€) of each
+    profile with each tariff.
+    """
+    import numpy as np
+
+    if chunk_rows < 1:
+        raise Exception("The number of profiles of each block must be > 0.")
+
+    pm = prices_manager or get_default_prices_manager()
+
+    prices = pm.get_prices_range(
+        start, end, format="array", resolution=resolution
+    )
+
+    # T x S prices matrix
+    matrix = np.column_stack([t.get_prices(prices) for t in tariffs])
+
+    loads = np.ascontiguousarray(loads, dtype=np.float64)
+
+    if loads.ndim != 2 or loads.shape[1] != matrix.shape[0]:
+        raise Exception(
+            f"Invalid loads. They must have {matrix.shape[0]} values (one for "
+            "each interval of the date range) for each profile."
+        )
+
+    m = loads.shape[0]
+    blocks = [(i, min(i + chunk_rows, m)) for i in range(0, m, chunk_rows)]
+
+    if workers == 1 or len(blocks) < 2:
+        costs = np.empty((m, matrix.shape[1]))
+
+        for first, last in blocks:
+            costs[first:last] = loads[first:last] @ matrix
+
+        return costs
+
+    shared = {
+        "loads": _share(loads),
+        "prices": _share(matrix),
+        "costs": _share(np.zeros((m, matrix.shape[1])))
+    }
+
+    try:
+        names = {
+            k: (shm.name, arr.shape, arr.dtype.str)
+            for k, (shm, arr) in shared.items()
+        }
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(names,)
+        ) as executor:
+            # Wait for all the blocks and raise any error
+            list(executor.map(_compute_rows, *zip(*blocks)))
+
+        return shared["costs"][1].copy()
+    finally:
+        # The arrays that use the shared memory blocks are released before
+        # closing and unlinking every block.
+        shms = [shm for shm, _ in shared.values()]
+        shared.clear()
+
+        for shm in shms:
+            shm.close()
+            shm.unlink()
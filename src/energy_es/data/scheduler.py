@@ -0,0 +1,234 @@
+"""Energy-ES - Data - Scheduler."""
+
+from datetime import date, datetime, time, timedelta, timezone
+from threading import Event, Thread
+from time import sleep
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+import sys
+
+from energy_es.data.prices import PricesManager, get_default_prices_manager
+
+
+class PrefetchScheduler:
+    """Prefetch scheduler.
+
+    This class gets, in a background thread, the data of the next day as soon
+    as it's published by "Red Eléctrica de España" (in the evening, in the
+    Europe/Madrid time zone) and saves it to the cache. If the data isn't
+    published yet, it tries again with an exponential backoff. The data is
+    stored by date, so it's used by `PricesManager.get_prices` as soon as the
+    day changes at 00:00 (Europe/Madrid) and the first request of the day
+    doesn't have to wait for the APIs.
+
+    The scheduler can call a function when the data of the next day has been
+    got and another one when the day changes (e.g. to refresh a chart).
+    """
+
+    # Time (Europe/Madrid) from which the data of the next day is requested
+    PUBLISH_TIME = time(20, 30)
+
+    # Initial and maximum waiting times (in seconds) between requests if the
+    # data of the next day isn't published yet.
+    MIN_BACKOFF = 300
+    MAX_BACKOFF = 1800
+
+    # Waiting time (in seconds) after midnight before the day is considered to
+    # have changed.
+    ROLLOVER_MARGIN = 1
+
+    def __init__(
+        self,
+        prices_manager: Optional[PricesManager] = None,
+        on_prefetch: Optional[Callable[[date], None]] = None,
+        on_rollover: Optional[Callable[[date], None]] = None
+    ):
+        """Class initializer.
+
+        :param prices_manager: Prices manager used to get the data. If it's
+        None (default), the default prices manager is used (it's got in the
+        background thread, so that the thread that starts the scheduler isn't
+        blocked while it's created).
+        :param on_prefetch: Function to call, in the background thread, with
+        the date of the next day when its data has been got.
+        :param on_rollover: Function to call, in the background thread, with
+        the new date when the day changes.
+        """
+        self._prices_manager = prices_manager
+        self._on_prefetch = on_prefetch
+        self._on_rollover = on_rollover
+
+        self._today = None
+        self._backoff = self.MIN_BACKOFF
+
+        self._thread = None
+        self._stop_event = Event()
+
+    def _get_now_em(self) -> datetime:
+        """Return the current datetime in the Europe/Madrid time zone.
+
+        :return: Datetime.
+        """
+        return datetime.now(ZoneInfo("Europe/Madrid"))
+
+    def _get_seconds_to(self, now_em: datetime, day: date, t: time) -> float:
+        """Return the number of seconds until a date and time.
+
+        :param now_em: Current datetime in the Europe/Madrid time zone.
+        :param day: Date.
+        :param t: Time (in the Europe/Madrid time zone).
+        :return: Seconds.
+        """
+        dt = datetime.combine(day, t, now_em.tzinfo)
+
+        # We compare UTC datetimes to take the DST changes into account
+        utc = timezone.utc
+        return (dt.astimezone(utc) - now_em.astimezone(utc)).total_seconds()
+
+    def _get_prices_manager(self) -> PricesManager:
+        """Return the prices manager.
+
+        :return: Prices manager.
+        """
+        if self._prices_manager is None:
+            self._prices_manager = get_default_prices_manager()
+
+        return self._prices_manager
+
+    def _notify(self, callback: Optional[Callable[[date], None]], day: date):
+        """Call a notification function.
+
+        The errors of the function are printed, so that they don't stop the
+        scheduler.
+
+        :param callback: Function to call (or None).
+        :param day: Date to pass to the function.
+        """
+        if callback is None:
+            return
+
+        try:
+            callback(day)
+        except Exception as e:
+            print(f"Prefetch scheduler callback error: {e}", file=sys.stderr)
+
+    def _step(self, now_em: datetime) -> float:
+        """Run a scheduler step.
+
+        :param now_em: Current datetime in the Europe/Madrid time zone.
+        :return: Number of seconds to wait until the next step.
+        """
+        pm = self._get_prices_manager()
+        today = now_em.date()
+        tomorrow = today + timedelta(days=1)
+
+        # Day change
+        if self._today is not None and today != self._today:
+            self._backoff = self.MIN_BACKOFF
+
+            # If the data of the new day couldn't be prefetched, we try to get
+            # it now.
+            try:
+                pm.prefetch(today)
+            except Exception:
+                pass
+
+            self._notify(self._on_rollover, today)
+
+        self._today = today
+
+        to_midnight = self._get_seconds_to(now_em, tomorrow, time(0))
+        to_midnight += self.ROLLOVER_MARGIN
+
+        # The data of the next day is already in the cache
+        if pm.is_cached(tomorrow):
+            return to_midnight
+
+        # The data of the next day isn't published yet
+        to_publish = self._get_seconds_to(now_em, today, self.PUBLISH_TIME)
+
+        if to_publish > 0:
+            return min(to_publish, to_midnight)
+
+        try:
+            pm.prefetch(tomorrow)
+        except Exception:
+            # We try again later
+            wait = self._backoff
+            self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+
+            return min(wait, to_midnight)
+
+        self._backoff = self.MIN_BACKOFF
+
+        self._notify(self._on_prefetch, tomorrow)
+
+        return to_midnight
+
+    def _safe_step(self, now_em: datetime) -> float:
+        """Run a scheduler step, handling its errors.
+
+        If the step fails (e.g. the history store can't be opened or it's
+        locked), the error is printed and the step is tried again with an
+        exponential backoff, so that the background thread never stops.
+
+        :param now_em: Current datetime in the Europe/Madrid time zone.
+        :return: Number of seconds to wait until the next step.
+        """
+        try:
+            return self._step(now_em)
+        except Exception as e:
+            print(f"Prefetch scheduler error: {e}", file=sys.stderr)
+
+            wait = self._backoff
+            self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+
+            return wait
+
+    def _run(self):
+        """Run the scheduler steps until the scheduler is stopped."""
+        while not self._stop_event.is_set():
+            wait = self._safe_step(self._get_now_em())
+            self._stop_event.wait(wait)
+
+    def start(self):
+        """Start the scheduler in a background thread."""
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler."""
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+
+def main():
+    """Prefetch scheduler main function.
+
+    This function runs the prefetch scheduler until the process is
+    interrupted, so that the cache always has the data of the current day
+    (e.g. for the command-line interface or other processes that share it).
+    """
+    def on_prefetch(day: date):
+        print(f"Prices of {day} saved to the cache.", file=sys.stderr)
+
+    scheduler = PrefetchScheduler(on_prefetch=on_prefetch)
+    scheduler.start()
+
+    try:
+        while True:
+            sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
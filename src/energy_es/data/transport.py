@@ -0,0 +1,362 @@
+"""Energy-ES - Data - Transport."""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic, sleep
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
+# "requests" is imported when the first request is made, so that importing this
+# module (and "energy_es.data.prices") is fast. For the same reason, "asyncio"
+# is imported when the first asynchronous request is made.
+if TYPE_CHECKING:
+    import requests
+
+
+class Transport:
+    """HTTP transport.
+
+    This class makes the requests to the APIs of "Red Eléctrica de España"
+    through a pooled keep-alive session. Each request has a connect timeout and
+    a read timeout and it's retried, with a bounded exponential backoff, if
+    there is a connection error or a server error.
+
+    The responses that have an "ETag" or "Last-Modified" header are cached in
+    memory and revalidated in the next requests to the same URL, so an
+    unchanged payload costs a 304 response and it isn't parsed again. Only
+    the most recently used responses are kept, as the data of past days is
+    saved to the history store and their URLs are rarely requested again.
+    """
+
+    # Response status codes for which a request is retried
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    # Default maximum number of cached responses
+    CACHE_SIZE = 16
+
+    def __init__(
+        self,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 20.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        pool_size: int = 10,
+        cache_size: int = CACHE_SIZE
+    ):
+        """Class initializer.
+
+        :param connect_timeout: Connect timeout (in seconds) of each request.
+        :param read_timeout: Read timeout (in seconds) of each request.
+        :param retries: Maximum number of retries of each request.
+        :param backoff: Waiting time (in seconds) before the first retry. The
+        waiting time is doubled before each next retry.
+        :param max_backoff: Maximum waiting time (in seconds) before a retry.
+        :param pool_size: Maximum number of connections to keep alive per host.
+        :param cache_size: Maximum number of cached responses. When the cache
+        is full, the least recently used response is discarded.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.cache_size = cache_size
+
+        # Session (created when the first request is made)
+        self._session = None
+        self._session_lock = Lock()
+
+        # Cached responses, from the least to the most recently used. Each key
+        # is a URL and each value is a dictionary with the "etag",
+        # "last_modified" and "data" (parsed JSON) keys.
+        self._cache = OrderedDict()
+        self._cache_lock = Lock()
+
+    def _get_session(self) -> "requests.Session":
+        """Return the session, creating it if it doesn't exist.
+
+        :return: Session.
+        """
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.pool_size
+                )
+
+                self._session = requests.Session()
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+
+            return self._session
+
+    def _get_backoff(self, attempt: int) -> float:
+        """Return the waiting time before a retry.
+
+        :param attempt: Attempt number (0 for the first retry).
+        :return: Waiting time in seconds.
+        """
+        return min(self.backoff * (2 ** attempt), self.max_backoff)
+
+    def _request(
+        self, url: str, headers: dict, stream: bool = False
+    ) -> "requests.Response":
+        """Make a GET request, retrying it if needed.
+
+        :param url: Request URL.
+        :param headers: Request headers.
+        :param stream: Whether to read the response body only when it's
+        accessed (see `iter_text`).
+        :return: Response.
+        """
+        import requests
+
+        session = self._get_session()
+        attempt = 0
+
+        while True:
+            try:
+                res = session.get(
+                    url, headers=headers, timeout=self.timeout, stream=stream
+                )
+
+                if (
+                    res.status_code not in self.RETRY_STATUS_CODES or
+                    attempt >= self.retries
+                ):
+                    return res
+
+                # We release the connection before retrying
+                res.close()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+
+            sleep(self._get_backoff(attempt))
+            attempt += 1
+
+    def get_json(self, url: str) -> Any:
+        """Make a GET request and return the response data.
+
+        :param url: Request URL.
+        :return: Response data (parsed JSON).
+        """
+        with self._cache_lock:
+            cached = self._cache.get(url)
+
+            if cached is not None:
+                self._cache.move_to_end(url)
+
+        # Conditional request headers
+        headers = {}
+
+        if cached is not None:
+            if cached["etag"] is not None:
+                headers["If-None-Match"] = cached["etag"]
+
+            if cached["last_modified"] is not None:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        res = self._request(url, headers)
+
+        # Unchanged payload
+        if res.status_code == 304 and cached is not None:
+            return cached["data"]
+
+        # Check response status
+        if res.status_code != 200:
+            raise Exception(res.reason)
+
+        data = res.json()
+
+        etag = res.headers.get("ETag")
+        last_modified = res.headers.get("Last-Modified")
+
+        if etag is not None or last_modified is not None:
+            with self._cache_lock:
+                self._cache[url] = {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "data": data
+                }
+
+                self._cache.move_to_end(url)
+
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return data
+
+    def iter_text(self, url: str, chunk_size: int = 65536) -> Iterator[str]:
+        """Make a GET request and iterate over the response body.
+
+        The body is read from the connection while it's iterated, so it's
+        never loaded in memory at once. These responses aren't cached or
+        revalidated (see `get_json`).
+
+        :param url: Request URL.
+        :param chunk_size: Maximum number of bytes read at once.
+        :return: Iterator of strings (chunks of the body).
+        """
+        res = self._request(url, {}, stream=True)
+
+        try:
+            # Check response status
+            if res.status_code != 200:
+                raise Exception(res.reason)
+
+            # JSON is encoded in UTF-8 unless the response says otherwise
+            res.encoding = res.encoding or "utf-8"
+            yield from res.iter_content(chunk_size, decode_unicode=True)
+        finally:
+            res.close()
+
+    def close(self):
+        """Close the session and clear the cached responses."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+        with self._cache_lock:
+            self._cache.clear()
+
+
+class RateLimitedTransport:
+    """Rate limited transport.
+
+    This class wraps a transport so that the requests made through it, from
+    any number of threads, don't exceed a maximum rate.
+    """
+
+    def __init__(self, transport: Transport, rate: float):
+        """Class initializer.
+
+        :param transport: Wrapped transport.
+        :param rate: Maximum number of requests per second.
+        """
+        if rate <= 0:
+            raise Exception("Invalid rate. It must be greater than 0.")
+
+        self._transport = transport
+        self._interval = 1 / rate
+
+        # Time (monotonic clock) of the next allowed request
+        self._next = 0.0
+        self._lock = Lock()
+
+    def _wait(self):
+        """Wait for the next allowed request time."""
+        with self._lock:
+            now = monotonic()
+            t = max(now, self._next)
+            self._next = t + self._interval
+
+        if t > now:
+            sleep(t - now)
+
+    def get_json(self, url: str) -> Any:
+        """Wait for the next allowed request time, make a GET request and
+        return the response data.
+
+        :param url: Request URL.
+        :return: Response data (parsed JSON).
+        """
+        self._wait()
+        return self._transport.get_json(url)
+
+    def iter_text(self, url: str, chunk_size: int = 65536) -> Iterator[str]:
+        """Wait for the next allowed request time, make a GET request and
+        iterate over the response body.
+
+        :param url: Request URL.
+        :param chunk_size: Maximum number of bytes read at once.
+        :return: Iterator of strings (chunks of the body).
+        """
+        self._wait()
+        yield from self._transport.iter_text(url, chunk_size)
+
+
+class AsyncTransport:
+    """Asynchronous HTTP transport.
+
+    This class makes the requests of a `Transport` in threads, so they don't
+    block the event loop and the connection pooling, the retries and the
+    response revalidation of `Transport` are reused. The requests are made in
+    a thread pool of the transport (not in the default executor of the event
+    loop), so a burst of requests doesn't delay the other blocking calls run
+    with `asyncio.to_thread` (e.g. the history store calls), and at most
+    `max_workers` requests are made at the same time.
+
+    Any object with an awaitable `get_json` method can be used instead of
+    this class by `AsyncPricesManager` (e.g. a transport based on a native
+    asyncio HTTP client library such as aiohttp or httpx).
+    """
+
+    # Default maximum number of requests made at the same time
+    MAX_WORKERS = 8
+
+    def __init__(
+        self,
+        transport: Optional[Transport] = None,
+        max_workers: int = MAX_WORKERS
+    ):
+        """Class initializer.
+
+        :param transport: Wrapped transport. If it's None (default), a new
+        `Transport` is used.
+        :param max_workers: Maximum number of requests made at the same time
+        (number of threads of the thread pool).
+        """
+        self._transport = transport or Transport()
+
+        # The threads are only started when the requests are made
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="energy-es-transport"
+        )
+
+    async def get_json(self, url: str) -> Any:
+        """Make a GET request and return the response data.
+
+        :param url: Request URL.
+        :return: Response data (parsed JSON).
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(
+            self._executor, self._transport.get_json, url
+        )
+
+    async def close(self):
+        """Close the wrapped transport and stop the thread pool."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+
+        await loop.run_in_executor(self._executor, self._transport.close)
+        self._executor.shutdown(wait=False)
+
+
+# Default transport shared by all the prices managers of the process
+_default_transport: Optional[Transport] = None
+_default_transport_lock = Lock()
+
+
+def get_default_transport() -> Transport:
+    """Return the default transport.
+
+    The default transport is created the first time this function is called.
+
+    :return: `Transport` instance.
+    """
+    global _default_transport
+
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+
+        return _default_transport
@@ -0,0 +1,78 @@
+"""Energy-ES - Data - Windows."""
+
+from typing import TYPE_CHECKING
+
+# The functions of this module find the cheapest intervals of a series of
+# prices (e.g. to schedule flexible loads such as electric vehicle charging)
+# in O(n) time, so they can be used with the prices of months of history.
+# NumPy is imported when the functions are called, so that importing this
+# module is fast.
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def _check_count(values: "np.ndarray", count: int):
+    """Check the number of intervals to find.
+
+    :param values: NumPy array of prices.
+    :param count: Number of intervals.
+    """
+    if count < 1:
+        raise Exception("The number of intervals must be greater than 0.")
+
+    if count > len(values):
+        raise Exception(
+            f"{count} intervals requested but there are only {len(values)}."
+        )
+
+
+def find_cheapest_window(values: "np.ndarray", count: int) -> int:
+    """Return the cheapest window of consecutive intervals.
+
+    The sums of all the windows are got from the cumulative sum of the prices
+    (sliding window), so each window is added in O(1) time.
+
+    :param values: NumPy array of prices of consecutive intervals.
+    :param count: Number of intervals of the window.
+    :return: Index of the first interval of the window with the lowest mean
+    price (the earliest one if there are several).
+    """
+    import numpy as np
+
+    _check_count(values, count)
+
+    sums = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    windows = sums[count:] - sums[:-count]
+
+    # The differences of the cumulative sums have rounding errors, so windows
+    # with the same prices may have slightly different sums. Any window within
+    # the maximum rounding error of the lowest one is considered a tie.
+    tol = len(values) * np.finfo(np.float64).eps * np.abs(sums).max()
+
+    return int(np.flatnonzero(windows <= windows.min() + tol)[0])
+
+
+def find_cheapest_intervals(values: "np.ndarray", count: int) -> "np.ndarray":
+    """Return the cheapest intervals, not necessarily consecutive.
+
+    The intervals are selected with a partition (introselect) instead of
+    sorting all the prices.
+
+    :param values: NumPy array of prices.
+    :param count: Number of intervals.
+    :return: Sorted NumPy array with the indices of the intervals with the
+    lowest prices. If several intervals have the same price, the earliest ones
+    are selected.
+    """
+    import numpy as np
+
+    _check_count(values, count)
+
+    # Highest selected price. All the lower prices are selected and the
+    # earliest intervals with this price complete the selection.
+    kth = np.partition(values, count - 1)[count - 1]
+
+    lower = np.flatnonzero(values < kth)
+    equal = np.flatnonzero(values == kth)[:count - len(lower)]
+
+    return np.sort(np.concatenate((lower, equal)))
@@ -0,0 +1,526 @@
+"""Energy-ES - HTTP Server."""
+
+from argparse import ArgumentParser
+from datetime import date, datetime, time, timedelta
+from hashlib import sha1
+from math import ceil
+from time import monotonic
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import sys
+
+from energy_es.cli import format_csv, format_json
+from energy_es.data.cache import PricesCache
+from energy_es.data.intervals import TZ, check_resolution
+from energy_es.data.locks import AsyncSingleFlight
+from energy_es.data.prices import PricesManager, get_default_prices_manager
+from energy_es.data.scheduler import PrefetchScheduler
+
+
+class PricesServer:
+    """Prices HTTP server.
+
+    This class serves the prices of `PricesManager` as JSON or CSV over HTTP
+    (asyncio based, without any third-party dependency), so that many clients
+    can share a single prices manager and its history store:
+
+    - GET /prices: prices of the current day (see `PricesManager.get_prices`).
+    - GET /prices/range?start=YYYY-MM-DD&end=YYYY-MM-DD: prices of a date
+      range (see `PricesManager.get_prices_range`).
+
+    Both paths accept the "unit" ("k" or "m"), "resolution" (15, 30 or 60) and
+    "format" ("json" or "csv") query parameters.
+
+    Each response body is rendered once and kept in memory, with an ETag,
+    until the day changes (in the Europe/Madrid time zone), so most requests
+    don't have to call the prices manager at all. The requests that can't be
+    served from memory are handled in a thread pool and, if several clients
+    request the same prices at the same time, the prices are only got once.
+    If the prices can't be got, the error response is kept in memory for a
+    short time too, so that an outage of the APIs doesn't cause a new API call
+    per request.
+    """
+
+    # Response content types of each format
+    CONTENT_TYPES = {
+        "json": "application/json; charset=utf-8",
+        "csv": "text/csv; charset=utf-8"
+    }
+
+    # Maximum number of days of a date range
+    MAX_RANGE_DAYS = 366
+
+    # Maximum age (in seconds) of the responses of date ranges that end
+    # before the current day. The rest of the responses are fresh until the
+    # day changes.
+    PAST_MAX_AGE = 86400
+
+    # Default maximum number of responses kept in memory
+    MAX_ENTRIES = 256
+
+    # Time (in seconds) during which the error of a failed render is returned
+    # without trying to render the response again
+    ERROR_MAX_AGE = 30
+
+    # Reason phrases of the response status codes
+    REASONS = {
+        200: "OK",
+        304: "Not Modified",
+        400: "Bad Request",
+        404: "Not Found",
+        405: "Method Not Allowed",
+        502: "Bad Gateway"
+    }
+
+    def __init__(
+        self,
+        prices_manager: Optional[PricesManager] = None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_entries: int = MAX_ENTRIES
+    ):
+        """Class initializer.
+
+        :param prices_manager: Prices manager used to get the prices. If it's
+        None (default), the default prices manager is used.
+        :param host: Host name or IP address to listen on. Default:
+        "127.0.0.1".
+        :param port: Port to listen on (0 to use any free port). Default:
+        8080.
+        :param max_entries: Maximum number of responses kept in memory.
+        """
+        self._prices_manager = prices_manager or get_default_prices_manager()
+        self.host = host
+        self.port = port
+
+        # Rendered responses. Each entry is only valid for the day on which
+        # it was rendered.
+        self._responses = PricesCache(max_entries)
+
+        # Errors of the failed renders. Each entry has the error message and
+        # the monotonic time at which it expires.
+        self._errors = PricesCache(max_entries)
+
+        # Coordinator of the renders of the responses that aren't in memory
+        self._renders = AsyncSingleFlight()
+
+        self._server = None
+
+    def _get_today_em(self) -> date:
+        """Return the current date in the Europe/Madrid time zone.
+
+        :return: Date.
+        """
+        return datetime.now(TZ).date()
+
+    def _get_error(self, status: int, message: str) -> tuple:
+        """Return an error response.
+
+        :param status: Status code.
+        :param message: Error message.
+        :return: Tuple with the status code, the headers and the body.
+        """
+        headers = {
+            "Content-Type": "text/plain; charset=utf-8",
+            "Cache-Control": "no-store"
+        }
+
+        return status, headers, f"{message}\n".encode()
+
+    def _get_render_error(self, error: dict, now: float) -> tuple:
+        """Return the response of a failed render.
+
+        :param error: Error (dictionary with the "message" and "expires"
+        keys).
+        :param now: Current monotonic time.
+        :return: Tuple with the status code, the headers and the body.
+        """
+        status, headers, body = self._get_error(502, error["message"])
+        headers["Retry-After"] = str(max(ceil(error["expires"] - now), 1))
+
+        return status, headers, body
+
+    def _parse_query(self, path: str, query: str) -> tuple:
+        """Return the key of the response of a request.
+
+        :param path: Request path.
+        :param query: Request query string.
+        :return: Tuple with the path, the unit, the resolution, the format, the
+        start date and the end date (the dates are None for the prices of the
+        current day).
+        """
+        params = {k: v[-1] for k, v in parse_qs(query).items()}
+
+        unit = params.get("unit", "m")
+
+        if unit not in ("k", "m"):
+            raise Exception('Invalid unit. It must be "k" or "m".')
+
+        format = params.get("format", "json")
+
+        if format not in self.CONTENT_TYPES:
+            raise Exception('Invalid format. It must be "json" or "csv".')
+
+        resolution = params.get("resolution")
+
+        if resolution is not None:
+            if not resolution.isdigit():
+                raise Exception("Invalid resolution. It must be a number.")
+
+            resolution = check_resolution(int(resolution))
+
+        if path == "/prices":
+            return path, unit, resolution, format, None, None
+
+        if "start" not in params:
+            raise Exception("The start date is required.")
+
+        try:
+            start = date.fromisoformat(params["start"])
+            end = date.fromisoformat(params.get("end", params["start"]))
+        except ValueError:
+            raise Exception("Invalid date. It must be YYYY-MM-DD.")
+
+        if start > end:
+            raise Exception(
+                "Invalid date range. The start date is after the end date."
+            )
+
+        if (end - start).days >= self.MAX_RANGE_DAYS:
+            raise Exception(
+                f"Invalid date range. It can't have more than "
+                f"{self.MAX_RANGE_DAYS} days."
+            )
+
+        return path, unit, resolution, format, start, end
+
+    def _render(self, key: tuple, today: date) -> dict:
+        """Get the prices of a response key and render the response.
+
+        This method is called in a thread of the thread pool of the event
+        loop, as the prices manager may have to call the APIs.
+
+        :param key: Response key (see `_parse_query`).
+        :param today: Current date in the Europe/Madrid time zone.
+        :return: Dictionary with the "body", "etag", "content_type",
+        "expires" (timestamp of the start of the next day) and "past" (whether
+        the date range ends before the current day) keys.
+        """
+        _, unit, resolution, format, start, end = key
+        pm = self._prices_manager
+
+        if start is None:
+            prices = pm.get_prices(unit, resolution=resolution)
+        else:
+            prices = pm.get_prices_range(
+                start, end, unit, resolution=resolution
+            )
+
+        if format == "json":
+            body = format_json(prices).encode()
+        else:
+            body = format_csv(prices).encode()
+
+        # The responses are fresh until the next day starts
+        tomorrow = datetime.combine(today + timedelta(days=1), time(0), TZ)
+
+        response = {
+            "body": body,
+            "etag": f'"{sha1(body).hexdigest()[:20]}"',
+            "content_type": self.CONTENT_TYPES[format],
+            "expires": tomorrow.timestamp(),
+            "past": end is not None and end < today
+        }
+
+        self._responses.put(key, today, response)
+
+        return response
+
+    async def _get_rendered(self, key: tuple, today: date) -> dict:
+        """Return the rendered response of a key.
+
+        If the response isn't in memory, it's rendered in a thread. Concurrent
+        requests with the same key wait for the same render (single-flight).
+
+        :param key: Response key (see `_parse_query`).
+        :param today: Current date in the Europe/Madrid time zone.
+        :return: Rendered response (see `_render`).
+        """
+        response = self._responses.get(key, today)
+
+        if response is not None:
+            return response
+
+        return await self._renders.do(
+            (key, today), asyncio.to_thread, self._render, key, today
+        )
+
+    async def get_response(
+        self, method: str, target: str, headers: dict[str, str]
+    ) -> tuple:
+        """Return the response of a request.
+
+        :param method: Request method.
+        :param target: Request target (path and query string).
+        :param headers: Request headers (with lowercase names).
+        :return: Tuple with the status code, a dictionary with the headers and
+        the body (bytes).
+        """
+        url = urlsplit(target)
+
+        if url.path not in ("/prices", "/prices/range"):
+            return self._get_error(404, "Not found.")
+
+        if method not in ("GET", "HEAD"):
+            status, res_headers, body = self._get_error(
+                405, "Method not allowed."
+            )
+
+            res_headers["Allow"] = "GET, HEAD"
+            return status, res_headers, body
+
+        try:
+            key = self._parse_query(url.path, url.query)
+        except Exception as e:
+            return self._get_error(400, str(e))
+
+        today = self._get_today_em()
+        error = self._errors.get(key, today)
+
+        if error is not None and error["expires"] > monotonic():
+            return self._get_render_error(error, monotonic())
+
+        try:
+            response = await self._get_rendered(key, today)
+        except Exception as e:
+            now = monotonic()
+            error = {
+                "message": f"Error: {e}",
+                "expires": now + self.ERROR_MAX_AGE
+            }
+
+            self._errors.put(key, today, error)
+            return self._get_render_error(error, now)
+
+        if response["past"]:
+            max_age = self.PAST_MAX_AGE
+        else:
+            now = datetime.now(TZ).timestamp()
+            max_age = max(int(response["expires"] - now), 0)
+
+        res_headers = {
+            "Content-Type": response["content_type"],
+            "ETag": response["etag"],
+            "Cache-Control": f"public, max-age={max_age}"
+        }
+
+        etags = headers.get("if-none-match", "")
+
+        if response["etag"] in etags or etags.strip() == "*":
+            return 304, res_headers, b""
+
+        return 200, res_headers, response["body"]
+
+    def _encode_response(
+        self,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        method: str,
+        keep_alive: bool
+    ) -> bytes:
+        """Return the bytes of a response.
+
+        :param status: Status code.
+        :param headers: Headers.
+        :param body: Body.
+        :param method: Request method.
+        :param keep_alive: Whether the connection is kept open.
+        :return: Response bytes.
+        """
+        lines = [f"HTTP/1.1 {status} {self.REASONS[status]}"]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+
+        if status != 304:
+            lines.append(f"Content-Length: {len(body)}")
+
+        if not keep_alive:
+            lines.append("Connection: close")
+
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        if method == "HEAD" or status == 304:
+            return head
+
+        return head + body
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Handle the requests of a connection.
+
+        The connection is kept open between requests (HTTP/1.1 keep-alive)
+        unless the client asks to close it. Request bodies aren't supported.
+
+        :param reader: Connection reader.
+        :param writer: Connection writer.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (
+                    asyncio.IncompleteReadError, asyncio.LimitOverrunError
+                ):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                request = lines[0].split()
+
+                if len(request) != 3:
+                    status, headers, body = self._get_error(
+                        400, "Invalid request."
+                    )
+
+                    writer.write(self._encode_response(
+                        status, headers, body, "GET", False
+                    ))
+
+                    break
+
+                method, target, version = request
+                headers = {}
+
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+
+                if version == "HTTP/1.1":
+                    keep_alive = connection != "close"
+                else:
+                    keep_alive = connection == "keep-alive"
+
+                # The body of a request isn't read, so the connection can't be
+                # reused after it.
+                if "content-length" in headers or (
+                    "transfer-encoding" in headers
+                ):
+                    keep_alive = False
+
+                status, res_headers, body = await self.get_response(
+                    method, target, headers
+                )
+
+                writer.write(self._encode_response(
+                    status, res_headers, body, method, keep_alive
+                ))
+
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        """Start listening for connections.
+
+        If the port is 0, the `port` attribute is set to the port assigned by
+        the operating system.
+        """
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Start listening for connections and handle them.
+
+        The server is started if it isn't started yet and the connections are
+        handled until the server is closed.
+        """
+        if self._server is None:
+            await self.start()
+
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening for connections."""
+        if self._server is None:
+            return
+
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+
+def main(args: Optional[list[str]] = None):
+    """HTTP server main function.
+
+    This function runs the prices server and, unless it's disabled, the
+    prefetch scheduler until the process is interrupted, so that the data of
+    each day is got from the APIs only once for all the clients, as soon as
+    it's published.
+
+    :param args: Command-line arguments. If it's None (default), the arguments
+    of the current process are used.
+    """
+    parser = ArgumentParser(
+        prog="energy-es-server",
+        description=(
+            "Serve the Spot Market and PVPC energy prices in Spain as JSON or "
+            "CSV over HTTP."
+        )
+    )
+
+    parser.add_argument(
+        "--host", default="127.0.0.1",
+        help="Host name or IP address to listen on. Default: 127.0.0.1."
+    )
+
+    parser.add_argument(
+        "-p", "--port", type=int, default=8080,
+        help="Port to listen on. Default: 8080."
+    )
+
+    parser.add_argument(
+        "--no-prefetch", action="store_true",
+        help="Don't get the prices of the next day as soon as they're "
+        "published."
+    )
+
+    args = parser.parse_args(args)
+
+    pm = get_default_prices_manager()
+    server = PricesServer(pm, args.host, args.port)
+    scheduler = None
+
+    if not args.no_prefetch:
+        scheduler = PrefetchScheduler(pm)
+        scheduler.start()
+
+    print(
+        f"Serving the prices on http://{args.host}:{args.port}/prices",
+        file=sys.stderr
+    )
+
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if scheduler is not None:
+            scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,44 @@
 """Energy-ES - User Interface."""
 
+from os import environ
+from typing import Optional
+
 from PySide6.QtWidgets import QApplication
 
 from energy_es.ui.main_window import MainWindow
 
 
-def start_ui():
+# Chart backends: "web" (Plotly chart shown in a web engine view) and "native"
+# (chart drawn with QPainter, without a web engine, which uses much less memory
+# and starts faster).
+CHART_BACKENDS = ("web", "native")
+
+
+def start_ui(backend: Optional[str] = None):
     """User interface main function.
 
     This function displays the main window.
+
+    :param backend: Chart backend ("web" or "native"). If it's None (default),
+    the value of the "ENERGY_ES_CHART" environment variable is used or, if it
+    isn't set, "web".
     """
+    if backend is None:
+        backend = environ.get("ENERGY_ES_CHART", "web")
+
+    if backend not in CHART_BACKENDS:
+        raise Exception(f'Invalid chart backend: "{backend}".')
+
+    if backend == "web":
+        # The web engine modules are only imported for the web backend. The
+        # application URL scheme must be registered before creating the
+        # application.
+        from energy_es.ui.scheme import register_scheme
+        register_scheme()
+
     app = QApplication([])
 
-    win = MainWindow()
+    win = MainWindow(backend)
     win.show()
 
     app.exec()
@@ -1,19 +1,34 @@
 """Energy-ES - User Interface - Chart."""
 
-from datetime import datetime
+from datetime import date, datetime, time
+from os import remove, replace
+from os.path import exists
+from typing import Callable, Optional
 from zoneinfo import ZoneInfo
+import json
 
-import numpy as np
-import pandas as pd
-import plotly.graph_objects as go
 from userconf import UserConf
 
-from energy_es.data.prices import PricesManager
+from energy_es.data.prices import get_default_prices_manager
+from energy_es.data.windows import (
+    find_cheapest_intervals, find_cheapest_window
+)
 
 
 # UserConf application ID
 UC_APP_ID = "energy_es"
 
+# Application URL scheme. The chart page and the Plotly JavaScript library are
+# served to the web view from memory through this scheme (see
+# "energy_es.ui.scheme").
+SCHEME_NAME = "energy-es"
+
+# Base URL of the resources served through the application URL scheme
+BASE_URL = f"{SCHEME_NAME}://app/"
+
+# Plotly JavaScript library URL
+PLOTLY_JS_URL = BASE_URL + "plotly.min.js"
+
 MESSAGE_HTML = (
     '<!DOCTYPE html>'
     '<html>'
@@ -41,53 +56,373 @@ def get_message_html(title: str, message: str = "") -> str:
     )
 
 
-def _write_chart(unit: str, path: str):
-    """Generate and write the chart HTML page with updated data.
+# Chart series (columns of the prices data) in the order of the chart traces
+SERIES = ("spot_market", "pvpc_cm", "pvpc_pcb")
+
+# Series colors
+COLORS = {
+    "spot_market": "#2077b4",
+    "pvpc_pcb": "#ff8c00",
+    "pvpc_cm": "#00a002"
+}
+
+# Data source of the chart title
+SOURCE = "Data source: Red Eléctrica de España"
+
+# Highlight modes: cheapest window of consecutive hours and cheapest hours
+HIGHLIGHT_MODES = ("window", "hours")
+
+# Chart version. It's saved in the metadata of the generated charts and it
+# must be increased whenever the chart page or the chart data change, so that
+# the charts generated by previous versions aren't reused at startup.
+CHART_VERSION = 1
+
+# JavaScript code that defines the "setUnit" function in the chart page. This
+# function switches the prices unit of the chart in place (without reloading
+# the page). "{{UNITS}}" is replaced by the chart data of every unit and
+# "{plot_id}" by Plotly with the ID of the chart element.
+SET_UNIT_JS = """
+var units = {{UNITS}};
+
+window.setUnit = function (unit) {
+    var u = units[unit];
+
+    Plotly.update(
+        "{plot_id}",
+        {
+            y: u.y,
+            text: u.text,
+            textposition: u.textposition,
+            hovertemplate: u.hovertemplate
+        },
+        {"title.text": u.title, "yaxis.title.text": u.price_unit}
+    );
+};
+"""
 
-    :param unit: Prices unit. It must be "k" to have the prices in €/kWh or "m"
-    to have them in €/MWh.
-    :param path: Destination file path.
+
+def _get_unique_times(times: list[str]) -> list[str]:
+    """Return the time labels of the chart.
+
+    On the day on which the daylight saving time ends, the times between 02:00
+    and 03:00 are repeated. The repeated times get a suffix, as the chart
+    would merge the points with the same label.
+
+    :param times: Time strings (HH:MM).
+    :return: Unique time strings.
     """
-    # Get data
-    pm = PricesManager()
-    prices = pm.get_prices(unit)
+    counts = {}
+    labels = []
 
-    updated = prices["updated"]
-    price_unit = prices["price_unit"]
-    data = prices["data"]
+    for t in times:
+        counts[t] = counts.get(t, 0) + 1
+        labels.append(t if counts[t] == 1 else f"{t} ({counts[t]})")
+
+    return labels
 
-    # Title and source
-    dt = datetime.fromtimestamp(updated).astimezone(ZoneInfo("Europe/Madrid"))
+
+def _get_title(prices: dict) -> str:
+    """Return the chart title.
+
+    :param prices: Prices as returned by `PricesManager.get_prices`.
+    :return: Title.
+    """
+    day = date.fromisoformat(prices["date"])
+    dt = datetime.combine(day, time(0), ZoneInfo("Europe/Madrid"))
     dt = dt.strftime(f"%A {dt.day} %B %Y (%Z)")
 
-    title = f"Electricity price ({price_unit}) in Spain for {dt}"
-    source = "Data source: Red Eléctrica de España"
+    title = f"Electricity price ({prices['price_unit']}) in Spain for {dt}"
 
-    # Create dataframe
-    prices_df = pd.DataFrame(data)
+    if prices.get("stale"):
+        title += " (updating...)"
+
+    return title
+
+
+def _get_prices(
+    on_update: Optional[Callable[[], None]] = None,
+    on_error: Optional[Callable[[str], None]] = None
+) -> dict:
+    """Return the prices of the current day in both units.
+
+    The prices are only got once (in €/MWh) and the prices in €/kWh are
+    derived from them, so both units always have the data of the same day.
+
+    :param on_update: If it's not None, the prices may be stale and this
+    function is called, in a background thread, when the data of the current
+    day is got (see `_write_chart`).
+    :param on_error: If it's not None and the prices are stale, function to
+    call, in a background thread, with the error message if the data of the
+    current day couldn't be got.
+    :return: Dictionary which keys are the units ("k" and "m") and which
+    values are the prices as returned by `PricesManager.get_prices` in the
+    "array" format.
+    """
+    # NumPy is imported here, instead of at the top of the module, because it
+    # takes a long time to be imported (see `_get_unit_data`).
+    import numpy as np
+
+    # The prices manager is shared by all the charts, so repeated charts are
+    # generated from the in-memory cache.
+    pm = get_default_prices_manager()
+
+    if on_update is None:
+        prices = pm.get_prices("m", format="array")
+    else:
+        prices = pm.get_prices(
+            "m", stale_ok=True, format="array",
+            on_update=lambda _: on_update(),
+            on_error=None if on_error is None else lambda e: on_error(str(e))
+        )
+
+    # Same conversion as `PricesManager.get_prices`
+    kwh = {c: np.round(prices[c] / 1000, 5) for c in SERIES}
+
+    return {"k": {**prices, "price_unit": "€/kWh", **kwh}, "m": prices}
+
+
+def _get_unit_data(prices: dict) -> dict:
+    """Return the chart data for a prices unit.
+
+    :param prices: Prices as returned by `PricesManager.get_prices` in the
+    "array" format.
+    :return: Dictionary with the "price_unit", "title" and "time" keys and the
+    "y", "text", "textposition" and "hovertemplate" keys, which values are
+    lists with a value for each chart series (see `SERIES`).
+    """
+    # NumPy is imported here, instead of at the top of the module, because it
+    # takes a long time to be imported and it isn't needed until the first
+    # chart is generated.
+    import numpy as np
+
+    price_unit = prices["price_unit"]
+    title = _get_title(prices)
 
     text = ["<b>MIN</b>", "<b>MAX</b>"]
     text_pos = ["bottom center", "top center"]
 
-    for c in ("spot_market", "pvpc_pcb", "pvpc_cm"):
-        cond = [
-            prices_df[c] == prices_df[c].min(),
-            prices_df[c] == prices_df[c].max()
-        ]
+    unit_data = {
+        "price_unit": price_unit,
+        "title": f'{title}<br><span style="font-size: 14px">{SOURCE}</span>',
+        "time": _get_unique_times(prices["time"].tolist()),
+        "y": [],
+        "text": [],
+        "textposition": [],
+        "hovertemplate": []
+    }
 
-        prices_df[f"{c}_text"] = np.select(cond, text, default=None)
+    hover_tem = "Time: &nbsp;%{x}<br>Price: &nbsp;%{y} " + price_unit
+
+    hover_titles = {
+        "spot_market": "<b>Spot Market</b><br>",
+        "pvpc_pcb": "<b>PVPC (Peninsula, Canarias and Baleares)</b><br>",
+        "pvpc_cm": "<b>PVPC (Ceuta and Melilla)</b><br>"
+    }
+
+    for c in SERIES:
+        # Only the first minimum and maximum are labelled, as the hourly PVPC
+        # prices are repeated in every quarter-hour of the hour.
+        y = prices[c]
+        i = np.arange(len(y))
+        cond = [i == y.argmin(), i == y.argmax()]
+
+        unit_data["y"].append(y.tolist())
+        unit_data["text"].append(np.select(cond, text, default=None).tolist())
 
-        prices_df[f"{c}_text_position"] = (
-            np.select(cond, text_pos, default="top center")
+        unit_data["textposition"].append(
+            np.select(cond, text_pos, default="top center").tolist()
         )
 
+        unit_data["hovertemplate"].append(hover_titles[c] + hover_tem)
+
+    return unit_data
+
+
+def _get_highlight_ranges(
+    prices: dict, highlight: tuple[str, str, int]
+) -> list[tuple[int, int]]:
+    """Return the ranges of intervals to highlight in the chart.
+
+    :param prices: Prices as returned by `PricesManager.get_prices` in the
+    "array" format.
+    :param highlight: Tuple with the prices series ("spot_market",
+    "pvpc_pcb" or "pvpc_cm"), the highlight mode (see `HIGHLIGHT_MODES`) and
+    the number of hours.
+    :return: List of tuples, each one with the indices of the first and last
+    intervals of a range of consecutive intervals.
+    """
+    series, mode, hours = highlight
+
+    if mode not in HIGHLIGHT_MODES:
+        raise Exception(
+            'Invalid highlight mode. It must be "window" or "hours"'
+        )
+
+    values = prices[series]
+    count = hours * 60 // prices["resolution"]
+
+    if mode == "window":
+        i = find_cheapest_window(values, count)
+        return [(i, i + count - 1)]
+
+    ranges = []
+
+    for i in find_cheapest_intervals(values, count).tolist():
+        if ranges and ranges[-1][1] == i - 1:
+            ranges[-1] = (ranges[-1][0], i)
+        else:
+            ranges.append((i, i))
+
+    return ranges
+
+
+def _get_plotly_renderer() -> str:
+    """Return the renderer name of the Plotly charts.
+
+    The name contains the installed Plotly version, which is got without
+    importing Plotly.
+
+    :return: Renderer name.
+    """
+    from importlib.metadata import version
+    return f"plotly-{version('plotly')}"
+
+
+def _get_metadata(
+    prices: dict,
+    renderer: str,
+    unit: str,
+    highlight: Optional[tuple[str, str, int]] = None
+) -> dict:
+    """Return the metadata of a chart.
+
+    :param prices: Prices of the chart as returned by
+    `PricesManager.get_prices`.
+    :param renderer: Renderer name (e.g. "native").
+    :param unit: Initial prices unit of the chart.
+    :param highlight: Cheapest intervals highlighted in the chart.
+    :return: Dictionary with the "version", "renderer", "date", "updated",
+    "stale", "unit" and "highlight" keys.
+    """
+    return {
+        "version": CHART_VERSION,
+        "renderer": renderer,
+        "date": prices["date"],
+        "updated": prices["updated"],
+        "stale": bool(prices.get("stale")),
+        "unit": unit,
+        "highlight": None if highlight is None else list(highlight)
+    }
+
+
+def _is_metadata_valid(
+    metadata: dict,
+    renderer: str,
+    highlight: Optional[tuple[str, str, int]] = None
+) -> bool:
+    """Check if a chart can be shown instead of generating a new one.
+
+    A chart is valid if it was generated by the current chart version and
+    renderer with the data of the current day (as the cached data of
+    `PricesManager`) and with the same highlighted intervals. The prices unit
+    isn't checked, as the charts contain the prices in both units.
+
+    :param metadata: Chart metadata (see `_get_metadata`).
+    :param renderer: Current renderer name.
+    :param highlight: Cheapest intervals to highlight.
+    :return: Whether the chart is valid.
+    """
+    today = datetime.now(ZoneInfo("Europe/Madrid")).date().isoformat()
+
+    return (
+        metadata.get("version") == CHART_VERSION
+        and metadata.get("renderer") == renderer
+        and metadata.get("date") == today
+        and metadata.get("stale") is False
+        and metadata.get("highlight") == (
+            None if highlight is None else list(highlight)
+        )
+    )
+
+
+def _read_json(path: str) -> Optional[dict]:
+    """Read a JSON file.
+
+    :param path: File path.
+    :return: File content or None if the file doesn't exist or it's invalid.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+def _write_json(path: str, data: dict):
+    """Write a JSON file.
+
+    The data is written to a temporary file which then replaces the file, so
+    that a partially written file is never read.
+
+    :param path: File path.
+    :param data: File content.
+    """
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    replace(tmp_path, path)
+
+
+def _write_chart(
+    unit: str,
+    path: str,
+    on_update: Optional[Callable[[], None]] = None,
+    highlight: Optional[tuple[str, str, int]] = None,
+    on_error: Optional[Callable[[str], None]] = None
+) -> dict:
+    """Generate and write the chart HTML page with updated data.
+
+    The page contains the data in both units and a JavaScript function named
+    "setUnit" that switches the prices unit in place. The function receives
+    the unit ("k" or "m").
+
+    :param unit: Initial prices unit. It must be "k" to have the prices in
+    €/kWh or "m" to have them in €/MWh.
+    :param path: Destination file path.
+    :param on_update: If it's not None, the chart is generated with the most
+    recent data in the cache if the data of the current day isn't there yet
+    (stale-while-revalidate mode), and this function is called, in a
+    background thread, when the data of the current day is got.
+    :param highlight: If it's not None, tuple with the prices series, the
+    highlight mode and the number of hours of the cheapest intervals to
+    highlight (see `_get_highlight_ranges`).
+    :param on_error: If it's not None and the chart is generated with stale
+    data, function to call, in a background thread, with the error message if
+    the data of the current day couldn't be got.
+    :return: Chart metadata (see `_get_metadata`).
+    """
+    # Plotly is imported here, instead of at the top of the module, because it
+    # takes a long time to be imported and it isn't needed until the first
+    # chart is generated.
+    import plotly.graph_objects as go
+
+    prices = _get_prices(on_update, on_error)
+    units = {u: _get_unit_data(p) for u, p in prices.items()}
+    u = units[unit]
+
+    # Smaller markers for quarter-hour prices
+    marker_size = 12 if len(u["time"]) <= 25 else 6
+
     # Create chart
     fig = go.Figure()
 
     fig.update_layout(
         title={
-            "text":
-                f'{title}<br><span style="font-size: 14px">{source}</span>',
+            "text": u["title"],
             "yref": "paper",
             "y": 1,
             "yanchor": "bottom",
@@ -107,7 +442,7 @@ def _write_chart(unit: str, path: str):
             "tickangle": 45
         },
         yaxis={
-            "title": price_unit,
+            "title": u["price_unit"],
             "fixedrange": True,
             "showline": True,
             "mirror": True,
@@ -119,78 +454,212 @@ def _write_chart(unit: str, path: str):
         margin={"t": 65}
     )
 
-    hover_tem = "Time: &nbsp;%{x}<br>Price: &nbsp;%{y} " + price_unit
-    spot_hover_tem = "<b>Spot Market</b><br>" + hover_tem
+    # Series names
+    names = {
+        "spot_market": "Spot Market price",
+        "pvpc_pcb": "PVPC price<br>(Peninsula, Canarias<br>and Baleares)",
+        "pvpc_cm": "<br>PVPC price<br>(Ceuta and Melilla)<br>"
+    }
+
+    # Spot Market prices, PVPC prices (Ceuta and Melilla) and PVPC prices
+    # (Peninsula, Canarias and Baleares).
+    for i, c in enumerate(SERIES):
+        fig.add_trace(go.Scatter(
+            x=u["time"],
+            y=u["y"][i],
+            mode="lines+markers+text",
+            text=u["text"][i],
+            line={"width": 3, "color": COLORS[c]},
+            marker={"size": marker_size, "color": COLORS[c]},
+            textposition=u["textposition"][i],
+            textfont={"color": COLORS[c]},
+            name=names[c],
+            hovertemplate=u["hovertemplate"][i],
+            hoverlabel={"namelength": 0}
+        ))
+
+    # Cheapest intervals. The ranges are got from the prices in €/MWh, as the
+    # prices in €/kWh are rounded, and they don't change with the unit.
+    if highlight is not None:
+        for i, (first, last) in enumerate(
+            _get_highlight_ranges(prices["m"], highlight)
+        ):
+            # The X axis is categorical, so each interval is centered on its
+            # index.
+            annotation = {
+                "annotation_text": "Cheapest",
+                "annotation_position": "top left"
+            }
+
+            fig.add_vrect(
+                x0=first - 0.5, x1=last + 0.5, fillcolor="#ffd700",
+                opacity=0.25, layer="below", line_width=0,
+                **(annotation if i == 0 else {})
+            )
 
-    pvpc_pcb_hover_tem = (
-        "<b>PVPC (Peninsula, Canarias and Baleares)</b><br>" + hover_tem
+    conf = {"displayModeBar": False}
+    set_unit_js = SET_UNIT_JS.replace("{{UNITS}}", json.dumps(units))
+
+    # Write chart. The Plotly JavaScript library isn't included in the page,
+    # it's served to the web view from memory through the application URL
+    # scheme, so the page is only a few KB.
+    fig.write_html(
+        path, config=conf, include_plotlyjs=PLOTLY_JS_URL,
+        post_script=set_unit_js
     )
 
-    pvpc_cm_hover_tem = "<b>PVPC (Ceuta and Melilla)</b><br>" + hover_tem
-
-    # Spot market prices
-    spot_sca = go.Scatter(
-        x=prices_df["time"],
-        y=prices_df["spot_market"],
-        mode="lines+markers+text",
-        text=prices_df["spot_market_text"],
-        line={"width": 3, "color": "#2077b4"},
-        marker={"size": 12, "color": "#2077b4"},
-        textposition=prices_df["spot_market_text_position"],
-        textfont={"color": "#2077b4"},
-        name="Spot Market price",
-        hovertemplate=spot_hover_tem,
-        hoverlabel={"namelength": 0}
-    )
+    return _get_metadata(prices["m"], _get_plotly_renderer(), unit, highlight)
 
-    # PVPC prices (Peninsula, Canarias and Baleares)
-    pvpc_pcb_sca = go.Scatter(
-        x=prices_df["time"],
-        y=prices_df["pvpc_pcb"],
-        mode="lines+markers+text",
-        text=prices_df["pvpc_pcb_text"],
-        line={"width": 3, "color": "#ff8c00"},
-        marker={"size": 12, "color": "#ff8c00"},
-        textposition=prices_df["pvpc_pcb_text_position"],
-        textfont={"color": "#ff8c00"},
-        name="PVPC price<br>(Peninsula, Canarias<br>and Baleares)",
-        hovertemplate=pvpc_pcb_hover_tem,
-        hoverlabel={"namelength": 0}
-    )
 
-    # PVPC prices (Ceuta and Melilla)
-    pvpc_cm_sca = go.Scatter(
-        x=prices_df["time"],
-        y=prices_df["pvpc_cm"],
-        mode="lines+markers+text",
-        text=prices_df["pvpc_cm_text"],
-        line={"width": 3, "color": "#00a002"},
-        marker={"size": 12, "color": "#00a002"},
-        textposition=prices_df["pvpc_cm_text_position"],
-        textfont={"color": "#00a002"},
-        name="<br>PVPC price<br>(Ceuta and Melilla)<br>",
-        hovertemplate=pvpc_cm_hover_tem,
-        hoverlabel={"namelength": 0}
-    )
+def get_chart_path(
+    unit: str = "m",
+    on_update: Optional[Callable[[], None]] = None,
+    highlight: Optional[tuple[str, str, int]] = None,
+    on_error: Optional[Callable[[str], None]] = None
+) -> str:
+    """Generate and write the chart HTML page with updated data and get its
+    path.
 
-    fig.add_traces([spot_sca, pvpc_cm_sca, pvpc_pcb_sca])
-    conf = {"displayModeBar": False}
+    :param unit: Initial prices unit. It must be "k" to have the prices in
+    €/kWh or "m" (default) to have them in €/MWh.
+    :param on_update: If it's not None, the chart may be generated with stale
+    data and this function is called, in a background thread, when the data
+    of the current day is got (see `_write_chart`).
+    :param highlight: If it's not None, cheapest intervals to highlight (see
+    `_write_chart`).
+    :param on_error: Function to call if the data of the current day couldn't
+    be got after generating the chart with stale data (see `_write_chart`).
+    :return: Absolute path of the chart file.
+    """
+    uc = UserConf(UC_APP_ID)
 
-    # Write chart
-    fig.write_html(path, config=conf)
+    path = uc.files.get_path("chart.html")
+    metadata_path = uc.files.get_path("chart.json")
 
+    # The metadata is removed while the chart file is written, so that a
+    # partially written chart is never reused (see `get_cached_chart_path`).
+    if exists(metadata_path):
+        remove(metadata_path)
 
-def get_chart_path(unit: str = "m") -> str:
-    """Generate and write the chart HTML page with updated data and get its
-    path.
+    metadata = _write_chart(unit, path, on_update, highlight, on_error)
+    _write_json(metadata_path, metadata)
 
-    :param unit: Prices unit. It must be "k" to have the prices in €/kWh or "m"
-    (default) to have them in €/MWh.
-    :return: Absolute path of the chart file.
+    return path
+
+
+def get_cached_chart_path(
+    highlight: Optional[tuple[str, str, int]] = None
+) -> Optional[str]:
+    """Return the path of the last chart HTML page generated if it's still
+    valid.
+
+    This function only reads the chart metadata (saved next to the chart file
+    by `get_chart_path`), so it doesn't need the prices manager, NumPy or
+    Plotly, and the chart can be shown immediately at startup.
+
+    :param highlight: Cheapest intervals that the chart must highlight (see
+    `_write_chart`).
+    :return: Absolute path of the chart file or None if there isn't any chart
+    or it isn't valid (see `_is_metadata_valid`).
     """
     uc = UserConf(UC_APP_ID)
 
     path = uc.files.get_path("chart.html")
-    _write_chart(unit, path)
+    metadata = _read_json(uc.files.get_path("chart.json"))
+
+    if (
+        metadata is None or not exists(path)
+        or not _is_metadata_valid(metadata, _get_plotly_renderer(), highlight)
+    ):
+        return None
 
     return path
+
+
+def get_chart_data(
+    unit: str = "m",
+    on_update: Optional[Callable[[], None]] = None,
+    highlight: Optional[tuple[str, str, int]] = None,
+    on_error: Optional[Callable[[str], None]] = None
+) -> dict:
+    """Return the data of the native chart with updated prices.
+
+    Unlike `get_chart_path`, this function doesn't generate any HTML page, so
+    it doesn't need Plotly.
+
+    :param unit: Initial prices unit. The data contains the prices in both
+    units, so it isn't used (it's a parameter for consistency with
+    `get_chart_path`).
+    :param on_update: If it's not None, the prices may be stale and this
+    function is called, in a background thread, when the data of the current
+    day is got (see `_write_chart`).
+    :param highlight: If it's not None, cheapest intervals to highlight (see
+    `_write_chart`).
+    :param on_error: Function to call if the data of the current day couldn't
+    be got after getting stale data (see `_write_chart`).
+    :return: Dictionary with three keys named "time", "highlight" and "units".
+    The "time" value is a list with the time label of each interval (see
+    `_get_unique_times`) and the "highlight" value is a list with the ranges
+    of intervals to highlight (see `_get_highlight_ranges`). The "units" value
+    is a dictionary which keys are the units ("k" and "m") and which values
+    are dictionaries with the "price_unit" and "title" keys and a key for
+    each series (see `SERIES`), which value is a list with the price of each
+    interval.
+    """
+    prices = _get_prices(on_update, on_error)
+
+    ranges = (
+        [] if highlight is None
+        else _get_highlight_ranges(prices["m"], highlight)
+    )
+
+    units = {
+        u: {
+            "price_unit": p["price_unit"],
+            "title": _get_title(p),
+            **{c: p[c].tolist() for c in SERIES}
+        }
+        for u, p in prices.items()
+    }
+
+    data = {
+        "time": _get_unique_times(prices["m"]["time"].tolist()),
+        "highlight": ranges,
+        "units": units
+    }
+
+    # The data is saved with its metadata so that it can be reused at startup
+    # (see `get_cached_chart_data`).
+    uc = UserConf(UC_APP_ID)
+
+    _write_json(uc.files.get_path("chart_data.json"), {
+        "metadata": _get_metadata(prices["m"], "native", unit, highlight),
+        "chart": data
+    })
+
+    return data
+
+
+def get_cached_chart_data(
+    highlight: Optional[tuple[str, str, int]] = None
+) -> Optional[dict]:
+    """Return the data of the last native chart generated if it's still
+    valid.
+
+    This function only reads the chart data file (saved by `get_chart_data`),
+    so it doesn't need the prices manager or NumPy.
+
+    :param highlight: Cheapest intervals that the chart must highlight (see
+    `_write_chart`).
+    :return: Chart data (see `get_chart_data`) or None if there isn't any
+    chart or it isn't valid (see `_is_metadata_valid`).
+    """
+    uc = UserConf(UC_APP_ID)
+    cached = _read_json(uc.files.get_path("chart_data.json"))
+
+    if cached is None or not _is_metadata_valid(
+        cached.get("metadata", {}), "native", highlight
+    ):
+        return None
+
+    return cached["chart"]
@@ -2,18 +2,16 @@
 
 from os.path import join, dirname
 
-from PySide6.QtCore import Qt, QUrl, QThread
-from PySide6.QtGui import QIcon, QAction
+from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtGui import QIcon, QAction, QCloseEvent
 
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QMenu, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
     QSizePolicy
 )
 
-from PySide6.QtWebEngineWidgets import QWebEngineView
-
-from energy_es.ui.chart import get_message_html
-from energy_es.ui.workers import ChartWorker
+from energy_es.data.scheduler import PrefetchScheduler
+from energy_es.ui.workers import ChartScheduler
 from energy_es.ui.about_dialog import AboutDialog
 
 
@@ -22,20 +20,89 @@ class MainWidget(QWidget):
 
     PRICE_UNITS = ["k", "m"]
 
-    def __init__(self):
-        """Class initializer."""
+    # Cheapest intervals that can be highlighted in the chart (option text and
+    # PVPC series, highlight mode and number of hours).
+    HIGHLIGHTS = [
+        ("None", None),
+        ("Cheapest 2 consecutive hours", ("pvpc_pcb", "window", 2)),
+        ("Cheapest 4 consecutive hours", ("pvpc_pcb", "window", 4)),
+        ("Cheapest 4 hours", ("pvpc_pcb", "hours", 4)),
+        ("Cheapest 8 hours", ("pvpc_pcb", "hours", 8))
+    ]
+
+    # Time (in seconds) to wait before retrying a failed update of the data of
+    # the current day.
+    REFRESH_RETRY_TIME = 60
+
+    # Signal emitted when the day changes (Europe/Madrid time zone)
+    rollover = Signal()
+
+    def __init__(self, backend: str = "web"):
+        """Class initializer.
+
+        :param backend: Chart backend. It must be "web" (Plotly chart shown in
+        a web engine view) or "native" (chart drawn with QPainter).
+        """
         super().__init__()
+
+        self._backend = backend
+
+        # Current prices unit and highlighted intervals
+        self._unit = "k"
+        self._highlight = None
+
         self.create_widgets()
 
+        # Prefetch scheduler. It gets the data of the next day in the evening
+        # and it notifies the day changes (from a background thread, so the
+        # notification is done through a signal).
+        self.rollover.connect(self.on_rollover)
+
+        self._prefetch_scheduler = PrefetchScheduler(
+            on_rollover=lambda _: self.rollover.emit()
+        )
+
+        self._prefetch_scheduler.start()
+
+    def stop(self):
+        """Stop the background tasks of the widget.
+
+        The result of the running chart job, if any, is discarded.
+        """
+        self._chart_scheduler.cancel()
+        self._retry_timer.stop()
+        self._prefetch_scheduler.stop()
+
     def create_widgets(self):
         """Create window widgets."""
         # Layout 1
         self._layout_1 = QVBoxLayout()
         self.setLayout(self._layout_1)
 
-        # Chart
-        self._chart = QWebEngineView()
-        self._chart.setContextMenuPolicy(Qt.NoContextMenu)
+        # Chart. The chart widget modules are imported here so that the web
+        # engine modules are only imported (and its processes only started)
+        # if the web backend is used.
+        if self._backend == "native":
+            from energy_es.ui.native_chart import NativeChart as Chart
+        else:
+            from energy_es.ui.web_chart import WebChart as Chart
+
+        self._chart = Chart()
+
+        # Chart job scheduler
+        self._chart_scheduler = ChartScheduler(self._chart.render, self)
+        self._chart_scheduler.success.connect(self.on_chart_success)
+        self._chart_scheduler.error.connect(self.on_chart_error)
+        self._chart_scheduler.updated.connect(self.on_prices_updated)
+
+        self._chart_scheduler.refresh_failed.connect(
+            self.on_prices_refresh_failed
+        )
+
+        # Timer to retry a failed update of the data of the current day
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self.on_prices_retry)
 
         self._layout_1.addWidget(self._chart)
 
@@ -57,59 +124,148 @@ class MainWidget(QWidget):
         self._unit_combo.currentIndexChanged.connect(self.on_unit_changed)
 
         self._layout_2.addWidget(
-            self._unit_combo, stretch=True,
+            self._unit_combo, alignment=Qt.AlignmentFlag.AlignLeft
+        )
+
+        # Highlight label
+        self._highlight_lab = QLabel(text="Highlight (PVPC):")
+
+        self._layout_2.addWidget(
+            self._highlight_lab, alignment=Qt.AlignmentFlag.AlignLeft
+        )
+
+        # Highlight combo box
+        self._highlight_combo = QComboBox()
+        self._highlight_combo.setFixedWidth(250)
+        self._highlight_combo.addItems([h[0] for h in self.HIGHLIGHTS])
+
+        self._highlight_combo.currentIndexChanged.connect(
+            self.on_highlight_changed
+        )
+
+        self._layout_2.addWidget(
+            self._highlight_combo, stretch=True,
             alignment=Qt.AlignmentFlag.AlignLeft
         )
 
-        # Initial chart generation
-        self.update_chart("k")
+        # Status label (errors updating the data of the current day)
+        self._status_lab = QLabel()
+
+        self._layout_2.addWidget(
+            self._status_lab, alignment=Qt.AlignmentFlag.AlignRight
+        )
+
+        # Initial chart. If the last chart generated is still valid, it's shown
+        # immediately, without getting the prices or generating the chart.
+        chart = self._chart.cached(self._highlight)
+
+        if chart is None:
+            self.update_chart(self._unit)
+        else:
+            self._chart.show_chart(chart)
 
-    def update_chart(self, unit: str):
+    def update_chart(self, unit: str, show_message: bool = True):
         """Update the chart widget.
 
-        :param unit: Prices unit. It must be "k" to have the prices in €/kWh or
-        "m" to have them in €/MWh.
+        The chart contains the prices in both units, so this method doesn't
+        need to be called when the unit changes.
+
+        :param unit: Initial prices unit. It must be "k" to have the prices in
+        €/kWh or "m" to have them in €/MWh.
+        :param show_message: Whether to replace the current chart by a
+        "Generating the chart..." message while the chart is generated.
+        """
+        if show_message:
+            self._chart.show_message("Generating the chart...")
+
+        self._chart_scheduler.request(unit, self._highlight)
+
+    def on_chart_success(self, chart: object):
+        """Run logic when a chart has been generated.
+
+        :param chart: Chart (chart file path or chart data, depending on the
+        backend).
+        """
+        self._chart.show_chart(chart)
+
+    def on_chart_error(self, message: str):
+        """Run logic when there was an error generating a chart.
+
+        :param message: Error message.
+        """
+        self._chart.show_message(
+            "There was an error generating the chart", message
+        )
+
+    def on_prices_updated(self):
+        """Run logic when the data of the current day has been got after
+        showing a chart with stale data.
         """
-        def on_success(path: str):
-            url = QUrl.fromLocalFile(path)
-            self._chart.load(url)
+        self._retry_timer.stop()
+        self._status_lab.clear()
+        self._status_lab.setToolTip("")
+        self.update_chart(self._unit, show_message=False)
 
-        def on_error(html: str):
-            self._chart.setHtml(html)
+    def on_prices_refresh_failed(self, message: str):
+        """Run logic when the data of the current day couldn't be got after
+        showing a chart with stale data.
 
-        self.chart_thread = QThread()
-        self.chart_worker = ChartWorker(unit)
-        self.chart_worker.moveToThread(self.chart_thread)
+        The error is shown in the status label and the update is retried after
+        `REFRESH_RETRY_TIME` seconds.
+
+        :param message: Error message.
+        """
+        self._status_lab.setText(
+            "The prices of today couldn't be updated. Retrying..."
+        )
 
-        self.chart_thread.started.connect(self.chart_worker.do_work)
-        self.chart_worker.finished.connect(self.chart_thread.quit)
+        self._status_lab.setToolTip(message)
+        self._retry_timer.start(self.REFRESH_RETRY_TIME * 1000)
 
-        self.chart_worker.finished.connect(self.chart_worker.deleteLater)
-        self.chart_thread.finished.connect(self.chart_thread.deleteLater)
+    def on_prices_retry(self):
+        """Retry the update of the data of the current day.
 
-        self.chart_worker.success.connect(on_success)
-        self.chart_worker.error.connect(on_error)
+        The chart is requested again, so the data is got in the background
+        while the chart is generated with stale data.
+        """
+        self._status_lab.clear()
+        self._status_lab.setToolTip("")
+        self.update_chart(self._unit, show_message=False)
 
-        html = get_message_html("Generating the chart...")
-        self._chart.setHtml(html)
-        self.chart_thread.start()
+    def on_rollover(self):
+        """Run logic when the day has changed."""
+        # The data of the new day is usually already in the cache
+        self.update_chart(self._unit, show_message=False)
 
     def on_unit_changed(self, x: int):
         """Run logic when the prices unit has changed.
 
         :param x: Selected unit index.
         """
-        unit = MainWidget.PRICE_UNITS[x]
-        self.update_chart(unit)
+        self._unit = MainWidget.PRICE_UNITS[x]
+        self._chart.set_unit(self._unit)
+
+    def on_highlight_changed(self, x: int):
+        """Run logic when the highlighted intervals have changed.
+
+        :param x: Selected highlight index.
+        """
+        self._highlight = MainWidget.HIGHLIGHTS[x][1]
+        self.update_chart(self._unit, show_message=False)
 
 
 class MainWindow(QMainWindow):
     """Main window."""
 
-    def __init__(self):
-        """Class initializer."""
+    def __init__(self, backend: str = "web"):
+        """Class initializer.
+
+        :param backend: Chart backend ("web" or "native").
+        """
         super().__init__()
 
+        self._backend = backend
+
         self.setWindowTitle("Energy-ES")
         self.set_window_icon()
         self.resize(900, 550)
@@ -152,6 +308,14 @@ class MainWindow(QMainWindow):
         self.menu_bar.addMenu(self.file_menu)
         self.menu_bar.addMenu(self.help_menu)
 
+    def closeEvent(self, event: QCloseEvent):
+        """Run logic when the window is closed.
+
+        :param event: Close event.
+        """
+        self.main_widget.stop()
+        super().closeEvent(event)
+
     def on_exit(self):
         """Run logic when the Exit menu option is clicked."""
         self.close()
@@ -163,5 +327,5 @@ class MainWindow(QMainWindow):
 
     def create_widgets(self):
         """Create window widgets."""
-        self.main_widget = MainWidget()
+        self.main_widget = MainWidget(self._backend)
         self.setCentralWidget(self.main_widget)
@@ -0,0 +1,553 @@
+"""Energy-ES - User Interface - Native Chart."""
+
+from math import ceil, floor, log10
+from typing import Optional
+
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import (
+    QColor, QFont, QFontMetricsF, QMouseEvent, QPainter, QPaintEvent, QPen
+)
+from PySide6.QtWidgets import QToolTip, QWidget
+
+from energy_es.ui.chart import (
+    COLORS, SERIES, SOURCE, get_cached_chart_data, get_chart_data
+)
+
+
+class NativeChart(QWidget):
+    """Native chart widget.
+
+    This class draws the chart with `QPainter` directly from the data returned
+    by `energy_es.ui.chart.get_chart_data`, with the same features as the web
+    chart: the three series (which can be hidden by clicking on their legend
+    items), the MIN and MAX labels, a tooltip with the price of the hovered
+    interval, the prices unit axis and the highlighted cheapest intervals. It
+    doesn't need a web engine (a Chromium process tree) or Plotly, so it uses
+    much less memory and it's shown immediately.
+    """
+
+    # Function that generates the charts shown by this widget (see
+    # `energy_es.ui.workers.ChartScheduler`).
+    render = staticmethod(get_chart_data)
+
+    # Function that returns the last chart generated, if it's still valid, to
+    # show it at startup without generating it again.
+    cached = staticmethod(get_cached_chart_data)
+
+    # Legend names of the series
+    NAMES = {
+        "spot_market": "Spot Market price",
+        "pvpc_pcb": "PVPC price\n(Peninsula, Canarias\nand Baleares)",
+        "pvpc_cm": "PVPC price\n(Ceuta and Melilla)"
+    }
+
+    # Tooltip titles of the series
+    HOVER_TITLES = {
+        "spot_market": "Spot Market",
+        "pvpc_pcb": "PVPC (Peninsula, Canarias and Baleares)",
+        "pvpc_cm": "PVPC (Ceuta and Melilla)"
+    }
+
+    # Minimum margins (in pixels) around the plot area (left, top, right and
+    # bottom).
+    MARGINS = (80, 80, 190, 75)
+
+    # Approximate number of ticks of the prices axis
+    Y_TICKS = 6
+
+    # Maximum vertical distance (in pixels) between the pointer and a point to
+    # show the tooltip of the point.
+    HOVER_DISTANCE = 20
+
+    # Color of the highlighted intervals
+    HIGHLIGHT_COLOR = QColor(255, 215, 0, 64)
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        """Class initializer.
+
+        :param parent: Parent widget.
+        """
+        super().__init__(parent)
+
+        # Chart data (see `get_chart_data`) or message
+        self._data = None
+        self._message = ("", "")
+
+        self._unit = "k"
+        self._hidden = set()
+
+        # Legend item areas of each series (set when the chart is painted)
+        self._legend = {}
+
+        self.setMouseTracking(True)
+
+    def show_message(self, title: str, message: str = ""):
+        """Replace the chart by a message.
+
+        :param title: Title.
+        :param message: Message.
+        """
+        self._data = None
+        self._message = (title, message)
+        self.update()
+
+    def show_chart(self, data: dict):
+        """Show a chart.
+
+        :param data: Chart data (see `energy_es.ui.chart.get_chart_data`).
+        """
+        self._data = data
+        self.update()
+
+    def set_unit(self, unit: str):
+        """Switch the prices unit of the chart.
+
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        """
+        self._unit = unit
+        self.update()
+
+    def _get_plot_rect(self) -> QRectF:
+        """Return the plot area.
+
+        :return: Rectangle.
+        """
+        left, top, right, bottom = self.MARGINS
+
+        if self._data is not None:
+            # Space for the time labels, rotated 45 degrees, and the axis title
+            metrics = QFontMetricsF(self.font())
+            times = self._data["time"]
+            width = max(metrics.horizontalAdvance(t) for t in times)
+            bottom = max(bottom, width * 0.71 + metrics.height() * 2 + 15)
+
+        return QRectF(
+            left, top, max(self.width() - left - right, 1),
+            max(self.height() - top - bottom, 1)
+        )
+
+    def _get_y_range(self, values: list[list[float]]) -> tuple:
+        """Return the range and the tick step of the prices axis.
+
+        :param values: Prices of the visible series.
+        :return: Tuple with the lowest value, the highest value and the step.
+        """
+        low = min((min(v) for v in values), default=0.0)
+        high = max((max(v) for v in values), default=1.0)
+
+        # Space for the MIN and MAX labels
+        pad = (high - low) * 0.1 or abs(high) * 0.1 or 1.0
+        low -= pad
+        high += pad
+
+        raw = (high - low) / self.Y_TICKS
+        mag = 10 ** floor(log10(raw))
+        step = next(m * mag for m in (1, 2, 5, 10) if m * mag >= raw)
+
+        return floor(low / step) * step, ceil(high / step) * step, step
+
+    def _get_x(self, i: int, count: int, rect: QRectF) -> float:
+        """Return the X coordinate of an interval.
+
+        :param i: Interval index.
+        :param count: Number of intervals.
+        :param rect: Plot area.
+        :return: X coordinate.
+        """
+        return rect.left() + (i + 0.5) * rect.width() / count
+
+    def _get_y(self, value: float, y_range: tuple, rect: QRectF) -> float:
+        """Return the Y coordinate of a price.
+
+        :param value: Price.
+        :param y_range: Range of the prices axis (see `_get_y_range`).
+        :param rect: Plot area.
+        :return: Y coordinate.
+        """
+        low, high, _ = y_range
+        return rect.bottom() - (value - low) / (high - low) * rect.height()
+
+    def _get_visible_series(self) -> list[str]:
+        """Return the visible series.
+
+        :return: Series names.
+        """
+        return [c for c in SERIES if c not in self._hidden]
+
+    def _get_visible_y_range(self) -> tuple:
+        """Return the range of the prices axis for the visible series in the
+        current unit.
+
+        :return: Tuple with the lowest value, the highest value and the step.
+        """
+        unit_data = self._data["units"][self._unit]
+
+        return self._get_y_range(
+            [unit_data[c] for c in self._get_visible_series()]
+        )
+
+    def _get_points(
+        self, values: list[float], rect: QRectF, y_range: tuple
+    ) -> list[QPointF]:
+        """Return the points of a series.
+
+        :param values: Prices of the series.
+        :param rect: Plot area.
+        :param y_range: Range of the prices axis (see `_get_y_range`).
+        :return: Point of each interval.
+        """
+        count = len(values)
+
+        return [
+            QPointF(self._get_x(i, count, rect), self._get_y(v, y_range, rect))
+            for i, v in enumerate(values)
+        ]
+
+    def _get_labels(
+        self,
+        values: list[float],
+        points: list[QPointF],
+        radius: float,
+        height: float
+    ) -> list[tuple[str, QRectF]]:
+        """Return the MIN and MAX labels of a series.
+
+        Only the first minimum and maximum are labelled (see
+        `energy_es.ui.chart._get_unit_data`). The MIN label is placed below its
+        point and the MAX label above its point.
+
+        :param values: Prices of the series.
+        :param points: Points of the series (see `_get_points`).
+        :param radius: Radius of the point markers.
+        :param height: Height of the labels.
+        :return: List of tuples, each one with the text and the area of a
+        label.
+        """
+        i_min = values.index(min(values))
+        i_max = values.index(max(values))
+
+        return [
+            (
+                text,
+                QRectF(points[i].x() - 40, points[i].y() + dy, 80, height)
+            )
+            for i, text, dy in (
+                (i_min, "MIN", radius + 2),
+                (i_max, "MAX", -radius - 2 - height)
+            )
+        ]
+
+    def _get_highlight_rects(self, rect: QRectF) -> list[QRectF]:
+        """Return the areas of the highlighted intervals.
+
+        :param rect: Plot area.
+        :return: Area of each range of highlighted intervals.
+        """
+        count = len(self._data["time"])
+        half = rect.width() / count / 2
+        rects = []
+
+        for first, last in self._data["highlight"]:
+            x0 = self._get_x(first, count, rect) - half
+            x1 = self._get_x(last, count, rect) + half
+            rects.append(QRectF(x0, rect.top(), x1 - x0, rect.height()))
+
+        return rects
+
+    def _get_tooltip(self, c: str, i: int) -> str:
+        """Return the tooltip text of a point.
+
+        :param c: Series.
+        :param i: Interval index.
+        :return: Text (HTML).
+        """
+        unit_data = self._data["units"][self._unit]
+
+        return (
+            f"<b>{self.HOVER_TITLES[c]}</b><br>"
+            f"Time: &nbsp;{self._data['time'][i]}<br>"
+            f"Price: &nbsp;{unit_data[c][i]} {unit_data['price_unit']}"
+        )
+
+    def _paint_message(self, p: QPainter):
+        """Paint the message.
+
+        :param p: Painter.
+        """
+        title, message = self._message
+        font = QFont(p.font())
+        font.setBold(True)
+        height = QFontMetricsF(font).height()
+
+        p.setPen(Qt.black)
+        p.setFont(font)
+        p.drawText(QPointF(10, 10 + height), title)
+
+        p.setFont(self.font())
+
+        p.drawText(
+            QRectF(10, 20 + height * 1.5, self.width() - 20, self.height()),
+            Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, message
+        )
+
+    def _paint_axes(self, p: QPainter, rect: QRectF, y_range: tuple):
+        """Paint the title, the grid, the axes and the highlighted intervals.
+
+        :param p: Painter.
+        :param rect: Plot area.
+        :param y_range: Range of the prices axis (see `_get_y_range`).
+        """
+        unit_data = self._data["units"][self._unit]
+        times = self._data["time"]
+        count = len(times)
+
+        font = self.font()
+        metrics = QFontMetricsF(font)
+        grid_pen = QPen(QColor("lightgrey"), 1)
+
+        # Title and data source
+        title_font = QFont(font)
+        title_font.setPointSizeF(font.pointSizeF() * 1.4)
+
+        p.setPen(Qt.black)
+        p.setFont(title_font)
+        title_height = QFontMetricsF(title_font).height()
+        p.drawText(QPointF(rect.left(), 10 + title_height), unit_data["title"])
+
+        p.setFont(font)
+        p.drawText(QPointF(rect.left(), 15 + title_height * 2), SOURCE)
+
+        # Highlighted intervals
+        for i, r in enumerate(self._get_highlight_rects(rect)):
+            p.fillRect(r, self.HIGHLIGHT_COLOR)
+
+            if i == 0:
+                p.setPen(Qt.black)
+                p.drawText(QPointF(r.left(), rect.top() - 4), "Cheapest")
+
+        # Prices axis
+        low, high, step = y_range
+        decimals = max(0, -floor(log10(step)))
+
+        for k in range(round((high - low) / step) + 1):
+            v = low + k * step
+            y = self._get_y(v, y_range, rect)
+
+            p.setPen(grid_pen)
+            p.drawLine(QPointF(rect.left(), y), QPointF(rect.right(), y))
+
+            p.setPen(Qt.black)
+            p.drawLine(QPointF(rect.left() - 5, y), QPointF(rect.left(), y))
+
+            p.drawText(
+                QRectF(0, y - metrics.height(), rect.left() - 8,
+                       metrics.height() * 2),
+                Qt.AlignRight | Qt.AlignVCenter, f"{v:.{decimals}f}"
+            )
+
+        # Time axis. The labels are rotated 45 degrees and only some of them
+        # are drawn if they don't fit.
+        every = max(ceil(count * metrics.height() * 1.5 / rect.width()), 1)
+
+        for i in range(0, count, every):
+            x = self._get_x(i, count, rect)
+
+            p.setPen(grid_pen)
+            p.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+
+            p.setPen(Qt.black)
+            p.drawLine(
+                QPointF(x, rect.bottom()), QPointF(x, rect.bottom() + 5)
+            )
+
+            p.save()
+            p.translate(x - metrics.ascent() / 2, rect.bottom() + 8)
+            p.rotate(45)
+            p.drawText(QPointF(0, metrics.ascent() / 2), times[i])
+            p.restore()
+
+        # Frame and axis titles
+        p.setPen(QPen(Qt.black, 1))
+        p.setBrush(Qt.NoBrush)
+        p.drawRect(rect)
+
+        p.drawText(
+            QRectF(rect.left(), self.height() - metrics.height() - 5,
+                   rect.width(), metrics.height()),
+            Qt.AlignCenter, "Time"
+        )
+
+        p.save()
+        p.translate(metrics.height(), rect.center().y())
+        p.rotate(-90)
+
+        p.drawText(
+            QRectF(-rect.height() / 2, -metrics.height(), rect.height(),
+                   metrics.height() * 2),
+            Qt.AlignCenter, unit_data["price_unit"]
+        )
+
+        p.restore()
+
+    def _paint_series(self, p: QPainter, rect: QRectF, y_range: tuple):
+        """Paint the series and their MIN and MAX labels.
+
+        :param p: Painter.
+        :param rect: Plot area.
+        :param y_range: Range of the prices axis (see `_get_y_range`).
+        """
+        unit_data = self._data["units"][self._unit]
+        count = len(self._data["time"])
+
+        # Smaller markers for quarter-hour prices
+        radius = 6 if count <= 25 else 3
+
+        label_font = QFont(self.font())
+        label_font.setBold(True)
+        label_height = QFontMetricsF(label_font).height()
+
+        for c in self._get_visible_series():
+            values = unit_data[c]
+            color = QColor(COLORS[c])
+
+            points = self._get_points(values, rect, y_range)
+
+            p.setPen(QPen(color, 3))
+            p.drawPolyline(points)
+
+            p.setPen(Qt.NoPen)
+            p.setBrush(color)
+
+            for pt in points:
+                p.drawEllipse(pt, radius, radius)
+
+            p.setPen(color)
+            p.setFont(label_font)
+
+            for text, r in self._get_labels(
+                values, points, radius, label_height
+            ):
+                p.drawText(r, Qt.AlignCenter, text)
+
+        p.setFont(self.font())
+
+    def _paint_legend(self, p: QPainter, rect: QRectF):
+        """Paint the legend.
+
+        :param p: Painter.
+        :param rect: Plot area.
+        """
+        metrics = QFontMetricsF(self.font())
+        x = rect.right() + 20
+        y = rect.top()
+
+        for c in SERIES:
+            lines = self.NAMES[c].split("\n")
+            height = len(lines) * metrics.height()
+            middle = y + metrics.height() / 2
+
+            color = QColor(COLORS[c])
+
+            if c in self._hidden:
+                color = QColor("lightgrey")
+
+            p.setPen(QPen(color, 3))
+            p.drawLine(QPointF(x, middle), QPointF(x + 30, middle))
+
+            p.setPen(Qt.NoPen)
+            p.setBrush(color)
+            p.drawEllipse(QPointF(x + 15, middle), 4, 4)
+
+            p.setPen(Qt.black if c not in self._hidden else color)
+
+            p.drawText(
+                QRectF(x + 38, y, self.width() - x - 38, height),
+                Qt.AlignLeft | Qt.AlignTop, "\n".join(lines)
+            )
+
+            self._legend[c] = QRectF(x, y, self.width() - x, height)
+            y += height + metrics.height()
+
+    def paintEvent(self, event: QPaintEvent):
+        """Paint the widget.
+
+        :param event: Paint event.
+        """
+        p = QPainter(self)
+        p.setRenderHint(QPainter.Antialiasing)
+        p.fillRect(self.rect(), Qt.white)
+
+        if self._data is None:
+            self._paint_message(p)
+        else:
+            rect = self._get_plot_rect()
+            y_range = self._get_visible_y_range()
+
+            self._paint_axes(p, rect, y_range)
+            self._paint_series(p, rect, y_range)
+            self._paint_legend(p, rect)
+
+        p.end()
+
+    def _get_point_at(self, pos: QPointF) -> Optional[tuple[str, int]]:
+        """Return the point of the chart under a position.
+
+        :param pos: Position.
+        :return: Tuple with the series and the interval index of the point or
+        None if there isn't any point close to the position.
+        """
+        if self._data is None:
+            return None
+
+        rect = self._get_plot_rect()
+        unit_data = self._data["units"][self._unit]
+        count = len(self._data["time"])
+        visible = self._get_visible_series()
+
+        i = floor((pos.x() - rect.left()) / rect.width() * count)
+
+        if not visible or not 0 <= i < count:
+            return None
+
+        y_range = self._get_visible_y_range()
+
+        dist, c = min(
+            (abs(self._get_y(unit_data[c][i], y_range, rect) - pos.y()), c)
+            for c in visible
+        )
+
+        return (c, i) if dist <= self.HOVER_DISTANCE else None
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        """Show the tooltip of the point under the pointer.
+
+        :param event: Mouse event.
+        """
+        pos = event.position()
+
+        on_legend = any(r.contains(pos) for r in self._legend.values())
+        self.setCursor(Qt.PointingHandCursor if on_legend else Qt.ArrowCursor)
+
+        point = self._get_point_at(pos)
+
+        if point is None:
+            QToolTip.hideText()
+            return
+
+        QToolTip.showText(
+            event.globalPosition().toPoint(), self._get_tooltip(*point), self
+        )
+
+    def mousePressEvent(self, event: QMouseEvent):
+        """Show or hide a series when its legend item is clicked.
+
+        :param event: Mouse event.
+        """
+        if self._data is None:
+            return
+
+        for c, r in self._legend.items():
+            if r.contains(event.position()):
+                self._hidden ^= {c}
+                self.update()
+                break
@@ -0,0 +1,98 @@
+"""Energy-ES - User Interface - URL Scheme."""
+
+from functools import lru_cache
+from os.path import exists
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QObject
+
+from PySide6.QtWebEngineCore import (
+    QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+)
+
+# The application URL scheme name and URLs are defined in the chart module,
+# which doesn't import the web engine modules, so that the chart page can be
+# generated without them.
+from energy_es.ui.chart import SCHEME_NAME
+
+
+@lru_cache(maxsize=1)
+def get_plotly_js() -> bytes:
+    """Return the Plotly JavaScript library code.
+
+    The code (about 3.5 MB) is read from the Plotly package only the first
+    time this function is called.
+
+    :return: JavaScript code.
+    """
+    from plotly.offline import get_plotlyjs
+    return get_plotlyjs().encode("utf-8")
+
+
+def register_scheme():
+    """Register the application URL scheme.
+
+    This function must be called before creating the `QApplication` instance.
+    """
+    scheme = QWebEngineUrlScheme(SCHEME_NAME.encode())
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+
+    scheme.setFlags(
+        QWebEngineUrlScheme.Flag.SecureScheme |
+        QWebEngineUrlScheme.Flag.LocalScheme |
+        QWebEngineUrlScheme.Flag.LocalAccessAllowed
+    )
+
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+class SchemeHandler(QWebEngineUrlSchemeHandler):
+    """Application URL scheme handler.
+
+    This class serves the Plotly JavaScript library from memory and the files
+    set through the `set_file` method (e.g. the chart page) from disk.
+    """
+
+    def __init__(self, parent: QObject = None):
+        """Class initializer.
+
+        :param parent: Parent object.
+        """
+        super().__init__(parent)
+
+        # Served files. Each key is a URL path (e.g. "/chart.html") and each
+        # value is the path of the file in disk.
+        self._files = {}
+
+    def set_file(self, name: str, path: str):
+        """Set a file to be served.
+
+        :param name: File name in the URL (e.g. "chart.html").
+        :param path: File path.
+        """
+        self._files[f"/{name}"] = path
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        """Reply to a request.
+
+        :param job: Request job.
+        """
+        url_path = job.requestUrl().path()
+
+        if url_path == "/plotly.min.js":
+            content_type = b"text/javascript"
+            data = get_plotly_js()
+        elif url_path in self._files and exists(self._files[url_path]):
+            content_type = b"text/html"
+
+            with open(self._files[url_path], "rb") as f:
+                data = f.read()
+        else:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        # The buffer is deleted along with the job
+        buf = QBuffer(job)
+        buf.setData(QByteArray(data))
+        buf.open(QIODevice.ReadOnly)
+
+        job.reply(QByteArray(content_type), buf)
@@ -0,0 +1,88 @@
+"""Energy-ES - User Interface - Web Chart."""
+
+from typing import Optional
+
+from PySide6.QtCore import Qt, QUrl
+from PySide6.QtWidgets import QWidget
+from PySide6.QtWebEngineWidgets import QWebEngineView
+
+from energy_es.ui.chart import (
+    BASE_URL, SCHEME_NAME, get_cached_chart_path, get_chart_path,
+    get_message_html
+)
+from energy_es.ui.scheme import SchemeHandler
+
+
+class WebChart(QWebEngineView):
+    """Web chart widget.
+
+    This class shows the Plotly chart HTML page generated by
+    `energy_es.ui.chart.get_chart_path`.
+    """
+
+    # Function that generates the charts shown by this widget (see
+    # `energy_es.ui.workers.ChartScheduler`).
+    render = staticmethod(get_chart_path)
+
+    # Function that returns the last chart generated, if it's still valid, to
+    # show it at startup without generating it again.
+    cached = staticmethod(get_cached_chart_path)
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        """Class initializer.
+
+        :param parent: Parent widget.
+        """
+        super().__init__(parent)
+
+        self._unit = "k"
+        self.setContextMenuPolicy(Qt.NoContextMenu)
+
+        # The chart page and the Plotly JavaScript library are served through
+        # the application URL scheme.
+        self._scheme_handler = SchemeHandler(self)
+
+        self.page().profile().installUrlSchemeHandler(
+            SCHEME_NAME.encode(), self._scheme_handler
+        )
+
+        self.loadFinished.connect(self.on_loaded)
+
+    def show_message(self, title: str, message: str = ""):
+        """Replace the chart by a message.
+
+        :param title: Title.
+        :param message: Message.
+        """
+        self.setHtml(get_message_html(title, message))
+
+    def show_chart(self, path: str):
+        """Show a chart.
+
+        :param path: Chart file path.
+        """
+        self._scheme_handler.set_file("chart.html", path)
+        self.load(QUrl(BASE_URL + "chart.html"))
+
+    def set_unit(self, unit: str):
+        """Switch the prices unit of the chart page in place.
+
+        This method calls the "setUnit" JavaScript function of the chart page,
+        if it's loaded.
+
+        :param unit: Prices unit. It must be "k" (€/kWh) or "m" (€/MWh).
+        """
+        self._unit = unit
+
+        self.page().runJavaScript(
+            f'if (window.setUnit) {{ window.setUnit("{unit}"); }}'
+        )
+
+    def on_loaded(self, ok: bool):
+        """Run logic when a page has been loaded.
+
+        :param ok: Whether the page was loaded successfully.
+        """
+        # The unit may have changed while the chart was being generated
+        if ok:
+            self.set_unit(self._unit)
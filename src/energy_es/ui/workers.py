@@ -1,43 +1,189 @@
 """Energy-ES - User Interface - Workers."""
 
-from PySide6.QtCore import QObject, Signal
+from typing import Any, Callable, Optional
 
-from energy_es.ui.chart import get_message_html, get_chart_path
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
 
 
-class ChartWorker(QObject):
-    """Chart thread class.
+# Function that generates a chart. It receives the prices unit, the function to
+# call when the data of the current day is got, the cheapest intervals to
+# highlight and the function to call with the error message if the data of the
+# current day couldn't be got (see `energy_es.ui.chart.get_chart_path`), and
+# it returns the chart (e.g. the chart file path or the chart data).
+Render = Callable[
+    [
+        str, Optional[Callable[[], None]], Optional[tuple[str, str, int]],
+        Optional[Callable[[str], None]]
+    ],
+    Any
+]
 
-    This class is used to generate the chart HTML file in a separate, parallel
-    thread.
+
+class ChartJobSignals(QObject):
+    """Chart job signals.
+
+    `QRunnable` isn't a `QObject`, so the signals of a chart job are defined in
+    this class.
     """
 
-    success = Signal(str)
-    error = Signal(str)
-    finished = Signal()
+    # Job ID, whether the job succeeded and chart or error message
+    finished = Signal(int, bool, object)
+
+
+class ChartJob(QRunnable):
+    """Chart job class.
 
-    def __init__(self, unit: str):
+    This class is used to generate a chart in a thread of a thread pool.
+    """
+
+    def __init__(
+        self,
+        job_id: int,
+        render: Render,
+        unit: str,
+        on_update: Optional[Callable[[], None]] = None,
+        highlight: Optional[tuple[str, str, int]] = None,
+        on_error: Optional[Callable[[str], None]] = None
+    ):
         """Initialize the instance.
 
+        :param job_id: Job ID.
+        :param render: Function that generates the chart.
         :param unit: Prices unit. It must be "k" to have the prices in €/kWh or
         "m" to have them in €/MWh.
+        :param on_update: If it's not None, the chart may be generated with
+        stale data and this function is called, in a background thread, when
+        the data of the current day is got.
+        :param highlight: If it's not None, cheapest intervals to highlight
+        (see `energy_es.ui.chart.get_chart_path`).
+        :param on_error: If it's not None and the chart is generated with
+        stale data, this function is called, in a background thread, with the
+        error message if the data of the current day couldn't be got.
         """
         super().__init__()
+
+        self._job_id = job_id
+        self._render = render
         self._unit = unit
+        self._on_update = on_update
+        self._highlight = highlight
+        self._on_error = on_error
+        self.signals = ChartJobSignals()
 
-    def do_work(self):
-        """Do the thread work.
+    def run(self):
+        """Do the job.
 
-        This method generates the chart HTML file in a separate, parallel
-        thread and emits the file path or an error message HTML code if there
-        is any error.
+        This method generates the chart and emits it or an error message if
+        there is any error.
         """
         try:
-            path = get_chart_path(self._unit)  # Absolute path
-            self.success.emit(path)
+            chart = self._render(
+                self._unit, self._on_update, self._highlight, self._on_error
+            )
+            self.signals.finished.emit(self._job_id, True, chart)
         except Exception as e:
-            title = "There was an error generating the chart"
-            html = get_message_html(title, str(e))
-            self.error.emit(html)
-        finally:
-            self.finished.emit()
+            self.signals.finished.emit(self._job_id, False, str(e))
+
+
+class ChartScheduler(QObject):
+    """Chart job scheduler.
+
+    This class runs the chart jobs in the global thread pool, one at a time,
+    so that two jobs never write the chart file at the same time. If a chart
+    is requested while a job is running, the request waits until the job
+    finishes, replacing any other waiting request (requests are coalesced).
+    Only the result of the newest request is emitted: the results of the
+    superseded or cancelled jobs are discarded.
+
+    The charts are generated in stale-while-revalidate mode: if the data of
+    the current day isn't in the cache yet, the chart is generated with the
+    most recent data in the cache and the `updated` signal is emitted when the
+    data of the current day is got, so that the chart can be requested again.
+    If the data of the current day couldn't be got, the `refresh_failed`
+    signal is emitted with the error message instead.
+    """
+
+    success = Signal(object)
+    error = Signal(str)
+    updated = Signal()
+    refresh_failed = Signal(str)
+
+    def __init__(self, render: Render, parent: Optional[QObject] = None):
+        """Initialize the instance.
+
+        :param render: Function that generates the charts (e.g.
+        `energy_es.ui.chart.get_chart_path`).
+        :param parent: Parent object.
+        """
+        super().__init__(parent)
+
+        self._render = render
+        self._pool = QThreadPool.globalInstance()
+
+        # ID of the newest request
+        self._last_id = 0
+
+        # Running job and waiting request (job ID, unit and highlight)
+        self._job = None
+        self._pending = None
+
+    def request(
+        self, unit: str, highlight: Optional[tuple[str, str, int]] = None
+    ):
+        """Request a chart.
+
+        :param unit: Prices unit. It must be "k" to have the prices in €/kWh or
+        "m" to have them in €/MWh.
+        :param highlight: If it's not None, cheapest intervals to highlight
+        (see `energy_es.ui.chart.get_chart_path`).
+        """
+        self._last_id += 1
+
+        if self._job is None:
+            self._start(self._last_id, unit, highlight)
+        else:
+            self._pending = (self._last_id, unit, highlight)
+
+    def cancel(self):
+        """Cancel the waiting request and discard the running job result."""
+        self._last_id += 1
+        self._pending = None
+
+    def _start(
+        self,
+        job_id: int,
+        unit: str,
+        highlight: Optional[tuple[str, str, int]] = None
+    ):
+        """Start a job.
+
+        :param job_id: Job ID.
+        :param unit: Prices unit.
+        :param highlight: Cheapest intervals to highlight.
+        """
+        self._job = ChartJob(
+            job_id, self._render, unit, self.updated.emit, highlight,
+            self.refresh_failed.emit
+        )
+
+        self._job.signals.finished.connect(self._on_finished)
+        self._pool.start(self._job)
+
+    def _on_finished(self, job_id: int, ok: bool, value: Any):
+        """Run logic when a job has finished.
+
+        :param job_id: Job ID.
+        :param ok: Whether the job succeeded.
+        :param value: Chart or error message.
+        """
+        self._job = None
+
+        if self._pending is not None:
+            # The result of this job is superseded by the waiting request
+            self._start(*self._pending)
+            self._pending = None
+        elif job_id == self._last_id:
+            if ok:
+                self.success.emit(value)
+            else:
+                self.error.emit(value)
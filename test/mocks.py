@@ -1,71 +1,159 @@
 """Energy-ES - Tests - Data - Mocks."""
 
-from datetime import datetime
-from unittest.mock import MagicMock
-from typing import Any
+from datetime import date, timedelta
+from typing import Any, Iterator
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+import asyncio
+import json
 
+from energy_es.data.intervals import get_day_minutes, get_day_start
 
-# Current local datetime
-now = datetime.now()
 
-# "requests.get" method mocks
-get_spot_mock = MagicMock()
-get_spot_mock.status_code = 200
+# API response data
+def get_spot_data(start: date, end: date, resolution: int = 60) -> dict:
+    """Return the Spot Market API response data of a date range.
 
-spot = [
-    {
-        "datetime":
-            datetime(now.year, now.month, now.day, i).astimezone().isoformat(),
-        "value": 100.10
+    :param start: Start date.
+    :param end: End date (included).
+    :param resolution: Resolution (in minutes) of the values.
+    :return: Response data.
+    """
+    tz = ZoneInfo("Europe/Madrid")
+    days = (end - start).days + 1
+    spot = []
+
+    for i in range(days):
+        day = start + timedelta(days=i)
+        day_start = get_day_start(day)
+
+        spot.extend(
+            {
+                "datetime": (
+                    day_start + timedelta(minutes=j * resolution)
+                ).astimezone(tz).isoformat(),
+                "value": 100.10
+            }
+            for j in range(get_day_minutes(day) // resolution)
+        )
+
+    return {
+        "included": [
+            {
+                "type": "spot",
+                "attributes": {
+                    "values": spot
+                }
+            }
+        ]
     }
-    for i in range(24)
-]
 
-get_spot_mock.json.return_value = {
-    "included": [
+
+def get_pvpc_data(day: date) -> dict:
+    """Return the PVPC API response data of a day.
+
+    :param day: Date.
+    :return: Response data.
+    """
+    tz = ZoneInfo("Europe/Madrid")
+    day_start = get_day_start(day)
+    hours = get_day_minutes(day) // 60
+
+    def get_hour(i: int) -> str:
+        return (day_start + timedelta(hours=i)).astimezone(tz).strftime("%H")
+
+    pvpc = [
         {
-            "type": "spot",
-            "attributes": {
-                "values": spot
-            }
+            "Dia": day.strftime("%d/%m/%Y"),
+            "Hora": get_hour(i) + "-" + get_hour(i + 1),
+            "PCB": "100,25",
+            "CYM": "150"
         }
+        for i in range(hours)
     ]
-}
 
-get_pvpc_mock = MagicMock()
-get_pvpc_mock.status_code = 200
-
-pvpc = [
-    {
-        "Dia": now.strftime("%d/%m/%Y"),
-        "Hora": str.zfill(str(i), 2) + "-" + str.zfill(str(i + 1), 2),
-        "PCB": "100,25",
-        "CYM": "150"
+    return {
+        "PVPC": pvpc
     }
-    for i in range(24)
-]
 
-get_pvpc_mock.json.return_value = {
-    "PVPC": pvpc
-}
 
+# "energy_es.data.transport.Transport" mock
+class TransportMock:
+    """Transport mock."""
 
-def requests_get(url: str) -> Any:
-    """`requests.get` mock function.
+    def __init__(self, spot_resolution: int = 60):
+        """Initializer.
 
-    :param url: Request URL.
-    :return: Request response.
-    """
-    if url.startswith("https://apidatos.ree.es/"):
-        return get_spot_mock
-    elif url.startswith("https://api.esios.ree.es/"):
-        return get_pvpc_mock
-    else:
-        raise Exception("Invalid URL")
+        :param spot_resolution: Resolution (in minutes) of the Spot Market
+        values.
+        """
+        self.urls = []
+        self._spot_resolution = spot_resolution
+
+    def get_json(self, url: str) -> Any:
+        """Make a GET request and return the response data.
+
+        :param url: Request URL.
+        :return: Response data (parsed JSON).
+        """
+        self.urls.append(url)
+        params = parse_qs(urlparse(url).query)
+
+        if url.startswith("https://apidatos.ree.es/"):
+            start = date.fromisoformat(params["start_date"][0][:10])
+            end = date.fromisoformat(params["end_date"][0][:10])
+
+            return get_spot_data(start, end, self._spot_resolution)
+        elif url.startswith("https://api.esios.ree.es/"):
+            return get_pvpc_data(date.fromisoformat(params["date"][0]))
+        else:
+            raise Exception("Invalid URL")
 
+    def iter_text(self, url: str, chunk_size: int = 65536) -> Iterator[str]:
+        """Make a GET request and iterate over the response body.
+
+        :param url: Request URL.
+        :param chunk_size: Maximum number of characters of each chunk.
+        :return: Iterator of strings (chunks of the body).
+        """
+        body = json.dumps(self.get_json(url))
+
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
 
-get_mock = MagicMock()
-get_mock.side_effect = requests_get
+
+# "energy_es.data.transport.AsyncTransport" mock
+class AsyncTransportMock:
+    """Asynchronous transport mock."""
+
+    def __init__(self, spot_resolution: int = 60, delay: float = 0.0):
+        """Initializer.
+
+        :param spot_resolution: Resolution (in minutes) of the Spot Market
+        values.
+        :param delay: Time (in seconds) taken by each request.
+        """
+        self._transport = TransportMock(spot_resolution)
+        self._delay = delay
+
+        self.urls = self._transport.urls
+        self.active = 0
+        self.max_active = 0
+
+    async def get_json(self, url: str) -> Any:
+        """Make a GET request and return the response data.
+
+        :param url: Request URL.
+        :return: Response data (parsed JSON).
+        """
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+
+        try:
+            await asyncio.sleep(self._delay)
+            return self._transport.get_json(url)
+        finally:
+            self.active -= 1
 
 
 # "userconf.settings.SettingsManager" mock
@@ -94,3 +182,11 @@ class SettingsManagerMock:
         :param value: Setting value. It must be serializable to JSON.
         """
         self._data[key] = value
+
+    def delete(self, key: str):
+        """Delete a setting.
+
+        :param key: Setting key. It must contain at least 1 character and must
+        contain only letters, numbers, hyphens or underscores.
+        """
+        del self._data[key]
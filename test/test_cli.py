@@ -0,0 +1,96 @@
+"""Energy-ES - Tests - Command-Line Interface - Unit tests."""
+
+from datetime import date
+from io import StringIO
+import json
+import unittest
+from unittest.mock import patch
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import TransportMock
+
+from energy_es import cli
+from energy_es.data.history import HistoryStore
+from energy_es.data.prices import PricesManager
+
+
+class CliTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.cli" module."""
+
+    def setUp(self):
+        """Set up the prices manager used by the tests."""
+        self.pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+
+    def run_cli(self, args: list[str]) -> str:
+        """Run the command-line interface and return its output.
+
+        :param args: Command-line arguments.
+        :return: Output.
+        """
+        with patch("energy_es.cli.PricesManager", return_value=self.pm):
+            with patch("sys.stdout", new_callable=StringIO) as out:
+                cli.main(args)
+
+        return out.getvalue()
+
+    def test_json(self):
+        """Test the JSON format."""
+        prices = json.loads(self.run_cli(["-f", "json", "-u", "k"]))
+
+        self.assertEqual(prices, self.pm.get_prices("k"))
+
+    def test_csv(self):
+        """Test the CSV format."""
+        lines = self.run_cli(["-f", "csv"]).splitlines()
+
+        self.assertEqual(len(lines), 25)
+        self.assertEqual(lines[0], "time,spot_market,pvpc_pcb,pvpc_cm")
+        self.assertEqual(lines[1], "00:00,100.1,100.25,150.0")
+
+        # Date range
+        lines = self.run_cli(
+            ["-f", "csv", "-s", "2022-12-01", "-e", "2022-12-02"]
+        ).splitlines()
+
+        self.assertEqual(len(lines), 49)
+        self.assertEqual(lines[0], "date,time,spot_market,pvpc_pcb,pvpc_cm")
+        self.assertEqual(lines[-1], "2022-12-02,23:00,100.1,100.25,150.0")
+
+    def test_resolution(self):
+        """Test the resolution argument."""
+        lines = self.run_cli(
+            ["-f", "csv", "-r", "30", "-s", "2022-12-01"]
+        ).splitlines()
+
+        self.assertEqual(len(lines), 49)
+        self.assertEqual(lines[2], "2022-12-01,00:30,100.1,100.25,150.0")
+
+    def test_table(self):
+        """Test the table format."""
+        lines = self.run_cli(["-s", "2022-12-01"]).splitlines()
+
+        self.assertEqual(len(lines), 25)
+        self.assertIn("spot_market (€/MWh)", lines[0])
+        self.assertTrue(lines[1].startswith(str(date(2022, 12, 1))))
+
+    def test_cheapest(self):
+        """Test the cheapest window and hours arguments."""
+        lines = self.run_cli(
+            ["-f", "csv", "-w", "3", "-s", "2022-12-01", "-e", "2022-12-02"]
+        ).splitlines()
+
+        # All the prices are the same, so the first window is the cheapest
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[0], "date,time,spot_market")
+        self.assertEqual(lines[1], "2022-12-01,00:00,100.1")
+
+        res = json.loads(self.run_cli(
+            ["-f", "json", "-c", "2", "--series", "pvpc_cm", "-s",
+             "2022-12-01"]
+        ))
+
+        self.assertEqual(res["series"], "pvpc_cm")
+        self.assertEqual(len(res["data"]), 2)
+        self.assertEqual(res["mean"], 150.0)
@@ -0,0 +1,142 @@
+"""Energy-ES - Tests - Data - Async Prices - Unit tests."""
+
+from datetime import date, datetime, timedelta
+import asyncio
+import unittest
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import AsyncTransportMock, TransportMock
+
+from energy_es.data.async_prices import AsyncPricesManager
+from energy_es.data.history import HistoryStore
+from energy_es.data.intervals import TZ
+from energy_es.data.prices import PricesManager
+
+
+class DataAsyncPricesTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.async_prices" module."""
+
+    def setUp(self):
+        """Set up the prices managers used by the tests."""
+        self.transport = AsyncTransportMock(delay=0.01)
+
+        self.apm = AsyncPricesManager(
+            self.transport, HistoryStore(":memory:"), max_requests=3
+        )
+
+        self.pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+
+    def test_not_blocking_manager(self):
+        """Test that the class can't be used as a blocking prices manager."""
+        self.assertNotIsInstance(self.apm, PricesManager)
+
+    def test_get_prices(self):
+        """Test the `get_prices` method."""
+        async def run() -> list[dict]:
+            return await asyncio.gather(
+                *(self.apm.get_prices("k") for _ in range(10))
+            )
+
+        results = asyncio.run(run())
+
+        # The data is only got once for all the tasks
+        self.assertEqual(len(self.transport.urls), 2)
+
+        # The prices are the same as the ones of the synchronous class
+        prices = self.pm.get_prices("k")
+        prices["updated"] = results[0]["updated"]
+
+        for r in results:
+            self.assertEqual(r, prices)
+
+        # Array format
+        prices = asyncio.run(
+            self.apm.get_prices(format="array", resolution=30)
+        )
+
+        self.assertEqual(len(prices["time"]), 48)
+        self.assertEqual(prices["spot_market"][0], 100.1)
+        self.assertEqual(len(self.transport.urls), 2)
+
+        # Invalid unit
+        with self.assertRaises(Exception):
+            asyncio.run(self.apm.get_prices("x"))
+
+    def test_stale(self):
+        """Test the stale-while-revalidate mode."""
+        today = datetime.now(TZ).date()
+        yesterday = today - timedelta(days=1)
+
+        async def run() -> tuple[dict, dict]:
+            await self.apm.prefetch(yesterday)
+            updated = asyncio.get_running_loop().create_future()
+
+            prices = await self.apm.get_prices(
+                stale_ok=True, on_update=updated.set_result
+            )
+
+            return prices, await updated
+
+        stale, updated = asyncio.run(run())
+
+        self.assertTrue(stale["stale"])
+        self.assertEqual(stale["date"], yesterday.isoformat())
+        self.assertFalse(updated["stale"])
+        self.assertEqual(updated["date"], today.isoformat())
+
+    def test_get_prices_range(self):
+        """Test the `get_prices_range` method."""
+        start = date(2022, 3, 1)
+        end = date(2022, 4, 9)
+
+        async def run() -> list[dict]:
+            return await asyncio.gather(
+                self.apm.get_prices_range(start, end, "k"),
+                self.apm.get_prices_range(start, end, "k")
+            )
+
+        results = asyncio.run(run())
+
+        # 2 Spot Market requests and 40 PVPC requests, made once for both
+        # tasks and with up to 3 requests at a time.
+        self.assertEqual(len(self.transport.urls), 42)
+        self.assertEqual(self.transport.max_active, 3)
+
+        prices = self.pm.get_prices_range(start, end, "k")
+        prices["updated"] = results[0]["updated"]
+
+        self.assertEqual(results[0], prices)
+        self.assertEqual(results[1], prices)
+
+        # Cheapest window
+        window = asyncio.run(self.apm.get_cheapest_window(
+            datetime(2022, 3, 1), datetime(2022, 3, 2), 3
+        ))
+
+        self.assertEqual(window["start"], "2022-03-01T00:00:00+01:00")
+        self.assertEqual(len(self.transport.urls), 42)
+
+        # Invalid range
+        with self.assertRaises(Exception):
+            asyncio.run(self.apm.get_prices_range(end, start))
+
+    def test_update_range(self):
+        """Test the `update_range` method."""
+        start = date(2022, 1, 1)
+        end = date(2022, 2, 15)
+
+        self.assertEqual(asyncio.run(self.apm.update_range(start, end)), 46)
+        self.assertEqual(asyncio.run(self.apm.update_range(start, end)), 0)
+        self.assertTrue(asyncio.run(self.apm.is_cached(end)))
+
+    def test_errors(self):
+        """Test that errors of the APIs are raised."""
+        async def get_json(url: str):
+            raise Exception("Connection error")
+
+        self.transport.get_json = get_json
+
+        with self.assertRaisesRegex(Exception, "couldn't be updated"):
+            asyncio.run(self.apm.get_prices())
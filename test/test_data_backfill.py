@@ -0,0 +1,125 @@
+"""Energy-ES - Tests - Data - Backfill - Unit tests."""
+
+from datetime import date
+from threading import Lock
+from time import sleep
+import unittest
+from typing import Any
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import TransportMock
+
+from energy_es.data.backfill import Backfill
+from energy_es.data.history import HistoryStore
+
+
+class DataBackfillTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.backfill" module."""
+
+    def test_run(self):
+        """Test `Backfill.run`."""
+        store = HistoryStore(":memory:")
+        transport = TransportMock()
+        start = date(2022, 1, 1)
+        end = date(2022, 3, 31)
+
+        backfill = Backfill(
+            start, end, workers=4, rate=1000, chunk_days=10,
+            transport=transport, store=store
+        )
+
+        self.assertEqual(len(backfill.get_chunks()), 9)
+
+        progress = []
+        status = backfill.run(lambda x: progress.append(x["done"]))
+
+        self.assertEqual(status["total"], 90)
+        self.assertEqual(status["done"], 90)
+        self.assertEqual(status["failed"], [])
+        self.assertEqual(len(progress), 9)
+        self.assertEqual(len(store.get_stored_dates(start, end)), 90)
+        self.assertEqual(backfill.get_pending_days(), [])
+
+    def test_workers(self):
+        """Test that `Backfill.run` bounds the parallel PVPC requests."""
+        class SlowTransportMock(TransportMock):
+            def __init__(self):
+                super().__init__()
+
+                self.active = 0
+                self.max_active = 0
+                self._lock = Lock()
+
+            def get_json(self, url: str) -> Any:
+                if "esios" not in url:
+                    return super().get_json(url)
+
+                with self._lock:
+                    self.active += 1
+                    self.max_active = max(self.max_active, self.active)
+
+                sleep(0.01)
+
+                with self._lock:
+                    self.active -= 1
+
+                return super().get_json(url)
+
+        transport = SlowTransportMock()
+
+        backfill = Backfill(
+            date(2022, 1, 1), date(2022, 1, 28), workers=2, rate=1000,
+            chunk_days=7, transport=transport, store=HistoryStore(":memory:")
+        )
+
+        status = backfill.run()
+
+        self.assertEqual(status["done"], 28)
+        self.assertLessEqual(
+            transport.max_active, 2 * backfill.CHUNK_PVPC_WORKERS
+        )
+
+    def test_resume(self):
+        """Test that `Backfill.run` only gets the days that aren't stored."""
+        store = HistoryStore(":memory:")
+        start = date(2022, 1, 1)
+        end = date(2022, 1, 31)
+
+        class ErrorTransportMock(TransportMock):
+            def get_json(self, url: str) -> Any:
+                if "2022-01-20" in url:
+                    raise Exception("Internal Server Error")
+
+                return super().get_json(url)
+
+        # Interrupted backfill
+        backfill = Backfill(
+            start, end, rate=1000, chunk_days=7,
+            transport=ErrorTransportMock(), store=store
+        )
+
+        status = backfill.run()
+
+        # The days of the failed chunk before the failed day are saved
+        self.assertEqual(status["done"], 29)
+        self.assertEqual(status["skipped"], 2)
+        self.assertEqual(len(status["failed"]), 1)
+        self.assertEqual(
+            status["failed"][0][:2], (date(2022, 1, 15), date(2022, 1, 21))
+        )
+
+        # Resumed backfill
+        transport = TransportMock()
+
+        backfill = Backfill(
+            start, end, rate=1000, chunk_days=7,
+            transport=transport, store=store
+        )
+
+        status = backfill.run()
+
+        self.assertEqual(status["total"], 2)
+        self.assertEqual(status["done"], 2)
+        self.assertEqual(len(transport.urls), 3)
@@ -0,0 +1,148 @@
+"""Energy-ES - Tests - Data - Billing - Unit tests."""
+
+from datetime import date, datetime, timedelta, timezone
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import TransportMock
+
+from energy_es.data.billing import CostEngine, simulate_bills
+from energy_es.data.history import HistoryStore
+from energy_es.data.prices import PricesManager
+
+
+def write_consumption(
+    path: str, start: date, days: int, value: float, encoding: str = "utf-8"
+):
+    """Write a consumption file with hourly values.
+
+    :param path: File path.
+    :param start: Start date.
+    :param days: Number of days.
+    :param value: Consumption (kWh) of every hour.
+    :param encoding: File encoding.
+    """
+    # 2022-01-01 00:00 (Europe/Madrid) is 2021-12-31 23:00 (UTC)
+    dt = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+    dt -= timedelta(hours=1)
+
+    with open(path, "w", encoding=encoding) as f:
+        f.write("datetime,consumption\n")
+
+        for i in range(days * 24):
+            t = (dt + timedelta(hours=i)).isoformat()
+            f.write(f"{t},{value}\n")
+
+
+class DataBillingTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.billing" module."""
+
+    def setUp(self):
+        """Set up the prices manager used by the tests."""
+        self.pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+
+    def test_get_costs(self):
+        """Test `CostEngine.get_costs`."""
+        start = date(2022, 1, 1)
+        engine = CostEngine.from_prices_manager(
+            start, date(2022, 2, 28), prices_manager=self.pm
+        )
+
+        # 48 hours from 2022-01-01 00:00 (Europe/Madrid)
+        times = np.datetime64("2021-12-31T23:00") + np.arange(48) * 60
+
+        res = engine.get_costs(times, np.full(len(times), 2.0))
+
+        self.assertEqual(res["consumption"], 96.0)
+        self.assertAlmostEqual(res["costs"]["spot_market"], 96 * 0.1001)
+        self.assertAlmostEqual(res["costs"]["pvpc_cm"], 96 * 0.15)
+        self.assertEqual(len(res["periods"]), 1)
+        self.assertEqual(res["periods"][0]["period"], "2022-01")
+
+        # Period whose consumption nets to 0 (exported energy)
+        feb = times[:2] + np.timedelta64(31, "D")
+        values = np.concatenate((np.full(48, 2.0), [1.0, -1.0]))
+        res = engine.get_costs(np.concatenate((times, feb)), values)
+
+        self.assertEqual(res["consumption"], 96.0)
+        self.assertEqual(
+            [p["period"] for p in res["periods"]], ["2022-01", "2022-02"]
+        )
+
+        self.assertEqual(res["periods"][1]["consumption"], 0.0)
+
+        # Values without prices
+        with self.assertRaises(Exception):
+            engine.get_costs(times + np.timedelta64(90, "D"), times)
+
+        # Invalid period
+        with self.assertRaises(Exception):
+            CostEngine.from_prices_manager(
+                start, start, "week", prices_manager=self.pm
+            )
+
+    def test_get_file_costs(self):
+        """Test `CostEngine.get_file_costs` in chunks."""
+        start = date(2022, 1, 1)
+
+        with TemporaryDirectory() as tmp:
+            path = join(tmp, "meter.csv")
+            write_consumption(path, start, 59, 0.5)
+
+            engine = CostEngine.from_prices_manager(
+                start, date(2022, 2, 28), "day", prices_manager=self.pm
+            )
+
+            engine.CHUNK_ROWS = 100
+            res = engine.get_file_costs(path)
+
+        self.assertAlmostEqual(res["consumption"], 59 * 24 * 0.5)
+        self.assertEqual(len(res["periods"]), 59)
+        self.assertEqual(res["periods"][-1]["period"], "2022-02-28")
+        self.assertAlmostEqual(res["periods"][-1]["pvpc_pcb"], 12 * 0.10025)
+
+    def test_get_file_costs_bom(self):
+        """Test `CostEngine.get_file_costs` with a byte order mark."""
+        start = date(2022, 1, 1)
+
+        with TemporaryDirectory() as tmp:
+            path = join(tmp, "meter.csv")
+            write_consumption(path, start, 1, 1.0, "utf-8-sig")
+
+            engine = CostEngine.from_prices_manager(
+                start, start, prices_manager=self.pm
+            )
+
+            res = engine.get_file_costs(path)
+
+        self.assertEqual(res["consumption"], 24.0)
+
+    def test_simulate_bills(self):
+        """Test the `simulate_bills` function."""
+        start = date(2022, 1, 1)
+
+        with TemporaryDirectory() as tmp:
+            paths = [join(tmp, f"meter_{i}.csv") for i in range(5)]
+
+            for i, p in enumerate(paths):
+                write_consumption(p, start, 31, i)
+
+            # Invalid file
+            with open(paths[3], "w") as f:
+                f.write("date,value\n")
+
+            res = list(simulate_bills(
+                paths, start, date(2022, 1, 31), workers=2,
+                prices_manager=self.pm
+            ))
+
+        self.assertEqual([r["path"] for r in res], paths)
+        self.assertIn("error", res[3])
+        self.assertAlmostEqual(res[4]["consumption"], 31 * 24 * 4)
+        self.assertAlmostEqual(res[2]["costs"]["pvpc_cm"], 31 * 24 * 2 * 0.15)
@@ -0,0 +1,43 @@
+"""Energy-ES - Tests - Data - Cache - Unit tests."""
+
+import unittest
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+
+from energy_es.data.cache import PricesCache
+
+
+class DataCacheTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.cache" module."""
+
+    def test_get_put(self):
+        """Test `PricesCache.get` and `PricesCache.put`."""
+        cache = PricesCache()
+        prices = {"updated": 1.0, "data": []}
+
+        self.assertIsNone(cache.get("a", 1.0))
+
+        cache.put("a", 1.0, prices)
+        self.assertIs(cache.get("a", 1.0), prices)
+
+        # Other update timestamp
+        self.assertIsNone(cache.get("a", 2.0))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_lru(self):
+        """Test that `PricesCache` discards the least recently used entry."""
+        cache = PricesCache(2)
+
+        cache.put("a", 1.0, {})
+        cache.put("b", 1.0, {})
+        cache.get("a", 1.0)
+        cache.put("c", 1.0, {})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get("a", 1.0))
+        self.assertIsNone(cache.get("b", 1.0))
+        self.assertIsNotNone(cache.get("c", 1.0))
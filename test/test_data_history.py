@@ -0,0 +1,162 @@
+"""Energy-ES - Tests - Data - History - Unit tests."""
+
+from datetime import date
+from os.path import join
+from tempfile import TemporaryDirectory
+import sqlite3
+import unittest
+from unittest.mock import MagicMock
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import SettingsManagerMock
+
+from energy_es.data.history import HistoryStore, _migrate_legacy_data
+
+
+def get_prices(day: date, value: float, resolution: int = 60) -> dict:
+    """Return a prices dictionary for a day.
+
+    :param day: Date.
+    :param value: Value of all the prices.
+    :param resolution: Resolution (in minutes).
+    :return: Dictionary with the same structure as `PricesManager._prices`.
+    """
+    return {
+        "date": day.isoformat(),
+        "updated": 1671058800.0,
+        "price_unit": "€/MWh",
+        "resolution": resolution,
+        "data": [
+            {
+                "interval": i,
+                "spot_market": value,
+                "pvpc_pcb": value,
+                "pvpc_cm": value
+            }
+            for i in range(1440 // resolution)
+        ]
+    }
+
+
+class DataHistoryTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.history" module."""
+
+    def test_days(self):
+        """Test `HistoryStore.get_day` and `HistoryStore.set_day`."""
+        store = HistoryStore(":memory:")
+
+        d1 = date(2022, 12, 14)
+        d2 = date(2022, 12, 15)
+
+        self.assertIs(store.get_day(d1), None)
+        self.assertIs(store.get_last_day(), None)
+
+        store.set_day(d1, get_prices(d1, 100.5))
+        store.set_day(d2, get_prices(d2, 200.5))
+
+        self.assertEqual(store.get_day(d1), get_prices(d1, 100.5))
+        self.assertEqual(store.get_day(d2), get_prices(d2, 200.5))
+        self.assertEqual(store.get_last_day(), d2)
+
+        # Replace a day
+        store.set_day(d1, get_prices(d1, 50.5))
+        self.assertEqual(store.get_day(d1), get_prices(d1, 50.5))
+
+        # Replace a day with prices in another resolution
+        store.set_day(d2, get_prices(d2, 25.5, 15))
+        self.assertEqual(store.get_day(d2), get_prices(d2, 25.5, 15))
+
+    def test_arrays(self):
+        """Test `HistoryStore.get_arrays`."""
+        store = HistoryStore(":memory:")
+
+        d1 = date(2022, 12, 14)
+        d2 = date(2022, 12, 15)
+
+        store.set_day(d1, get_prices(d1, 100.5))
+        store.set_day(d2, get_prices(d2, 200.5, 15))
+
+        days, values = store.get_arrays(d1, date(2022, 12, 31))
+
+        self.assertEqual(
+            days,
+            [
+                ("2022-12-14", 1671058800.0, 60, 24),
+                ("2022-12-15", 1671058800.0, 15, 96)
+            ]
+        )
+
+        self.assertEqual(values.shape, (120, 3))
+        self.assertEqual(values[23].tolist(), [100.5] * 3)
+        self.assertEqual(values[24].tolist(), [200.5] * 3)
+
+        # Empty range
+        days, values = store.get_arrays(date(2023, 1, 1), date(2023, 1, 2))
+
+        self.assertEqual(days, [])
+        self.assertEqual(values.shape, (0, 3))
+
+    def test_migrate(self):
+        """Test the migration of a database created with the schema of the
+        hourly prices.
+        """
+        with TemporaryDirectory() as tmp:
+            path = join(tmp, "prices.db")
+
+            con = sqlite3.connect(path)
+
+            con.executescript(
+                "CREATE TABLE days (date TEXT PRIMARY KEY, updated REAL "
+                "NOT NULL) WITHOUT ROWID; CREATE TABLE prices (date TEXT NOT "
+                "NULL, hour INTEGER NOT NULL, spot_market REAL NOT NULL, "
+                "pvpc_pcb REAL NOT NULL, pvpc_cm REAL NOT NULL, PRIMARY KEY "
+                "(date, hour)) WITHOUT ROWID;"
+            )
+
+            d = date(2022, 12, 15)
+            con.execute(
+                "INSERT INTO days VALUES (?, ?)", (d.isoformat(), 1671058800.0)
+            )
+
+            con.executemany(
+                "INSERT INTO prices VALUES (?, ?, ?, ?, ?)",
+                [(d.isoformat(), i, 100.5, 100.5, 100.5) for i in range(24)]
+            )
+
+            con.commit()
+            con.close()
+
+            store = HistoryStore(path)
+            self.assertEqual(store.get_day(d), get_prices(d, 100.5))
+
+            # The database isn't migrated again
+            store = HistoryStore(path)
+            self.assertEqual(store.get_day(d), get_prices(d, 100.5))
+
+    def test_migrate_legacy_data(self):
+        """Test `_migrate_legacy_data`."""
+        store = HistoryStore(":memory:")
+
+        conf = MagicMock()
+        conf.settings = SettingsManagerMock()
+
+        # 2022-12-15 00:00 (Europe/Madrid). The legacy data has the prices of
+        # every hour.
+        prices = get_prices(date(2022, 12, 15), 100.5)
+        del prices["date"]
+        del prices["resolution"]
+
+        for x in prices["data"]:
+            x["hour"] = x.pop("interval")
+
+        conf.settings.set("prices", prices)
+        _migrate_legacy_data(store, conf)
+
+        self.assertIs(conf.settings.get("prices"), None)
+
+        self.assertEqual(
+            store.get_day(date(2022, 12, 15)),
+            get_prices(date(2022, 12, 15), 100.5)
+        )
@@ -0,0 +1,83 @@
+"""Energy-ES - Tests - Data - Intervals - Unit tests."""
+
+from datetime import date, datetime, timezone
+import unittest
+
+import numpy as np
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+
+from energy_es.data.intervals import (
+    check_resolution, get_day_minutes, get_resolution, get_starts, get_times,
+    resample, resample_array
+)
+
+
+class DataIntervalsTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.intervals" module."""
+
+    def test_days(self):
+        """Test `get_day_minutes` and `get_resolution`."""
+        self.assertEqual(get_day_minutes(date(2022, 12, 15)), 1440)
+        self.assertEqual(get_day_minutes(date(2022, 3, 27)), 1380)
+        self.assertEqual(get_day_minutes(date(2022, 10, 30)), 1500)
+
+        self.assertEqual(get_resolution(date(2022, 12, 15), 96), 15)
+        self.assertEqual(get_resolution(date(2022, 3, 27), 23), 60)
+        self.assertEqual(get_resolution(date(2022, 10, 30), 50), 30)
+        self.assertIsNone(get_resolution(date(2022, 12, 15), 23))
+
+        self.assertEqual(check_resolution(15), 15)
+
+        with self.assertRaises(Exception):
+            check_resolution(20)
+
+    def test_get_times(self):
+        """Test the `get_times` function."""
+        times = get_times(date(2022, 12, 15), 15)
+        self.assertEqual(len(times), 96)
+        self.assertEqual(times[:2], ("00:00", "00:15"))
+
+        times = get_times(date(2022, 3, 27), 60)
+        self.assertEqual(times[:3], ("00:00", "01:00", "03:00"))
+
+        times = get_times(date(2022, 10, 30), 60)
+        self.assertEqual(times[:4], ("00:00", "01:00", "02:00", "02:00"))
+
+    def test_get_starts(self):
+        """Test the `get_starts` function."""
+        dates = np.array(
+            ["2022-10-30"] * 25 + ["2022-10-31"] * 24, dtype="datetime64[D]"
+        )
+
+        starts = get_starts(dates, 60)
+
+        self.assertEqual(starts[0].item(), datetime(2022, 10, 29, 22, 0))
+        self.assertEqual(starts[25].item(), datetime(2022, 10, 30, 23, 0))
+
+        # The intervals are consecutive
+        self.assertTrue((np.diff(starts) == np.timedelta64(60, "m")).all())
+
+        self.assertEqual(
+            starts[-1].item().replace(tzinfo=timezone.utc).hour, 22
+        )
+
+    def test_resample(self):
+        """Test `resample` and `resample_array`."""
+        values = [1.0, 3.0, 5.0, 7.0]
+
+        self.assertEqual(resample(values, 15, 30), [2.0, 6.0])
+        self.assertEqual(resample(values, 15, 60), [4.0])
+        self.assertEqual(resample([1.0, 2.0], 60, 30), [1.0, 1.0, 2.0, 2.0])
+
+        arr = np.array(values)
+        self.assertEqual(resample_array(arr, 15, 30).tolist(), [2.0, 6.0])
+
+        arr = np.array([[1.0, 2.0], [3.0, 4.0]])
+
+        self.assertEqual(
+            resample_array(arr, 60, 30).tolist(),
+            [[1.0, 2.0], [1.0, 2.0], [3.0, 4.0], [3.0, 4.0]]
+        )
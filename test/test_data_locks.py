@@ -0,0 +1,102 @@
+"""Energy-ES - Tests - Data - Locks - Unit tests."""
+
+from os.path import join
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import sleep
+import asyncio
+import unittest
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+
+from energy_es.data.locks import AsyncSingleFlight, FileLock, SingleFlight
+
+
+class DataLocksTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.locks" module."""
+
+    def test_file_lock(self):
+        """Test that `FileLock` is held by one holder at a time."""
+        with TemporaryDirectory() as d:
+            path = join(d, "test.lock")
+            events = []
+
+            def hold(name: str):
+                with FileLock(path):
+                    events.append(f"{name} start")
+                    sleep(0.1)
+                    events.append(f"{name} end")
+
+            threads = [Thread(target=hold, args=(i,)) for i in "ab"]
+
+            for t in threads:
+                t.start()
+
+            for t in threads:
+                t.join()
+
+            # The holders don't overlap
+            self.assertEqual(len(events), 4)
+            self.assertEqual(events[0][0], events[1][0])
+            self.assertEqual(events[2][0], events[3][0])
+
+    def test_single_flight(self):
+        """Test that `SingleFlight.do` runs concurrent calls once."""
+        sf = SingleFlight()
+        calls = []
+        results = []
+
+        def func() -> int:
+            calls.append(1)
+            sleep(0.1)
+
+            return 123
+
+        threads = [
+            Thread(target=lambda: results.append(sf.do("key", func)))
+            for _ in range(5)
+        ]
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, [123] * 5)
+
+        # Exceptions are raised in all the callers
+        def error_func():
+            raise Exception("Error")
+
+        with self.assertRaisesRegex(Exception, "Error"):
+            sf.do("key", error_func)
+
+    def test_async_single_flight(self):
+        """Test that `AsyncSingleFlight.do` runs concurrent calls once."""
+        sf = AsyncSingleFlight()
+        calls = []
+
+        async def func() -> int:
+            calls.append(1)
+            await asyncio.sleep(0.05)
+
+            return 123
+
+        async def run() -> list[int]:
+            return await asyncio.gather(
+                *(sf.do("key", func) for _ in range(5))
+            )
+
+        self.assertEqual(asyncio.run(run()), [123] * 5)
+        self.assertEqual(calls, [1])
+
+        # Exceptions are raised in all the callers
+        async def error_func():
+            raise Exception("Error")
+
+        with self.assertRaisesRegex(Exception, "Error"):
+            asyncio.run(sf.do("key", error_func))
@@ -0,0 +1,186 @@
+"""Energy-ES - Tests - Data - Parsing - Unit tests."""
+
+from datetime import date
+import json
+import unittest
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import get_pvpc_data, get_spot_data
+
+from energy_es.data.parsing import (
+    iter_spot_market_days, iter_spot_market_values, parse_pvpc,
+    parse_spot_market
+)
+
+
+def get_chunks(data: dict, size: int) -> list[str]:
+    """Return the chunks of a response body.
+
+    :param data: Response data.
+    :param size: Number of characters of each chunk.
+    :return: Chunks.
+    """
+    body = json.dumps(data)
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class DataParsingTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.parsing" module."""
+
+    def test_parse_spot_market(self):
+        """Test the `parse_spot_market` function."""
+        start = date(2022, 12, 15)
+        end = date(2022, 12, 17)
+        data = get_spot_data(start, end)
+
+        # Unsorted data
+        values = data["included"][0]["attributes"]["values"]
+        values.reverse()
+        values[0]["value"] = 200.0
+
+        res = parse_spot_market(data, start, end)
+
+        self.assertEqual(list(res), [
+            date(2022, 12, 15), date(2022, 12, 16), date(2022, 12, 17)
+        ])
+
+        self.assertEqual(res[start].shape, (24,))
+        self.assertEqual(res[start][0], 100.1)
+        self.assertEqual(res[end][23], 200.0)
+
+        # Days with 23 and 25 hours (daylight saving time changes)
+        d1 = date(2022, 3, 27)
+        d2 = date(2022, 10, 30)
+
+        res = parse_spot_market(get_spot_data(d1, d1), d1, d1)
+        self.assertEqual(res[d1].shape, (23,))
+
+        res = parse_spot_market(get_spot_data(d2, d2), d2, d2)
+        self.assertEqual(res[d2].shape, (25,))
+
+        # Quarter-hour resolution
+        res = parse_spot_market(get_spot_data(d2, d2, 15), d2, d2)
+        self.assertEqual(res[d2].shape, (100,))
+
+        # Invalid count
+        with self.assertRaises(Exception):
+            parse_spot_market(data, start, date(2022, 12, 18))
+
+        # Invalid date
+        data = get_spot_data(date(2022, 12, 14), date(2022, 12, 14))
+
+        with self.assertRaises(Exception) as cm:
+            parse_spot_market(data, start, start)
+
+        self.assertIn("2022-12-15 expected", str(cm.exception))
+
+        # Invalid hour
+        data = get_spot_data(start, start)
+        values = data["included"][0]["attributes"]["values"]
+        values[5]["datetime"] = values[4]["datetime"]
+
+        with self.assertRaises(Exception) as cm:
+            parse_spot_market(data, start, start)
+
+        self.assertIn("05:00 expected but data for 04:00", str(cm.exception))
+
+    def test_parse_pvpc(self):
+        """Test the `parse_pvpc` function."""
+        day = date(2022, 12, 15)
+        data = get_pvpc_data(day)
+
+        # Unsorted data
+        data["PVPC"].reverse()
+        data["PVPC"][0]["PCB"] = "200,5"
+
+        res = parse_pvpc(data, day)
+
+        self.assertEqual(res.shape, (24, 2))
+        self.assertEqual(res[0].tolist(), [100.25, 150.0])
+        self.assertEqual(res[23].tolist(), [200.5, 150.0])
+
+        # Day with 25 hours (the hour 02 is repeated)
+        d = date(2022, 10, 30)
+        res = parse_pvpc(get_pvpc_data(d), d)
+
+        self.assertEqual(res.shape, (25, 2))
+
+        # Invalid date
+        with self.assertRaises(Exception) as cm:
+            parse_pvpc(data, date(2022, 12, 16))
+
+        self.assertIn("2022-12-15 received", str(cm.exception))
+
+        # Invalid count
+        data["PVPC"].pop()
+
+        with self.assertRaises(Exception):
+            parse_pvpc(data, day)
+
+    def test_iter_spot_market_values(self):
+        """Test the `iter_spot_market_values` function."""
+        start = date(2022, 12, 15)
+        end = date(2022, 12, 16)
+        data = get_spot_data(start, end)
+        exp = data["included"][0]["attributes"]["values"]
+
+        # Other values before the Spot Market ones
+        data["included"].insert(0, {
+            "type": "PVPC (\u20ac/MWh)",
+            "attributes": {"values": [{"value": 1, "datetime": "x"}]}
+        })
+
+        for size in (1, 7, 100000):
+            values = list(iter_spot_market_values(get_chunks(data, size)))
+            self.assertEqual(values, exp)
+
+        # Incomplete response
+        chunks = get_chunks(data, 100)[:-20]
+
+        with self.assertRaises(Exception):
+            list(iter_spot_market_values(chunks))
+
+    def test_iter_spot_market_days(self):
+        """Test the `iter_spot_market_days` function."""
+        start = date(2022, 12, 15)
+        end = date(2022, 12, 17)
+        data = get_spot_data(start, end)
+        values = data["included"][0]["attributes"]["values"]
+
+        days = list(iter_spot_market_days(values, start, end))
+
+        self.assertEqual([d for d, _ in days], [
+            date(2022, 12, 15), date(2022, 12, 16), date(2022, 12, 17)
+        ])
+
+        self.assertEqual(days[0][1], [100.1] * 24)
+
+        # The days are yielded while the values are received
+        it = iter_spot_market_days(values[:30], start, end)
+        self.assertEqual(next(it)[0], start)
+
+        with self.assertRaises(Exception) as cm:
+            next(it)
+
+        self.assertIn(
+            "6 values received for 2022-12-16, which has 24 hours",
+            str(cm.exception)
+        )
+
+        # Quarter-hour resolution and day with 23 hours
+        d = date(2022, 3, 27)
+        data = get_spot_data(d, d, 15)
+
+        days = list(iter_spot_market_days(
+            data["included"][0]["attributes"]["values"], d, d
+        ))
+
+        self.assertEqual(len(days[0][1]), 92)
+
+        # Unsorted values
+        values[0], values[1] = values[1], values[0]
+
+        with self.assertRaises(Exception):
+            list(iter_spot_market_days(values, start, end))
@@ -1,54 +1,48 @@
 """Energy-ES - Tests - Data - Prices - Unit tests."""
 
+from datetime import date, datetime, timedelta
+from threading import Event, Thread
+from time import sleep
 import unittest
-from unittest.mock import MagicMock, patch
+from typing import Any
+from unittest.mock import patch
 
 # We import "paths" to include the "src" directory in "sys.path" so that we can
-# import "userconf".
+# import "energy_es".
 import paths
-from mocks import get_mock, SettingsManagerMock
+from mocks import TransportMock
 
+from energy_es.data.history import HistoryStore
+from energy_es.data.intervals import get_day_minutes, get_times
 from energy_es.data.prices import PricesManager
 
 
 class DataPricesTestCase(unittest.TestCase):
     """Unit tests of the "energy_es.data.prices" module."""
 
-    @patch("requests.get", get_mock)
-    @patch("userconf.SettingsManager")
-    def test_initial_data(self, sm_mock: MagicMock):
+    def test_initial_data(self):
         """Test the initial values of `PricesManager._prices`."""
-        # Mock
-        sm_mock.return_value = SettingsManagerMock()
-
-        pm = PricesManager()
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
         self.assertIs(pm._prices, None)
 
-    @patch("requests.get", get_mock)
-    @patch("userconf.SettingsManager")
-    def test_is_data_valid(self, sm_mock: MagicMock):
+    def test_is_data_valid(self):
         """Test `PricesManager._is_data_valid`."""
-        # Mock
-        sm_mock.return_value = SettingsManagerMock()
-
-        pm = PricesManager()
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
         self.assertFalse(pm._is_data_valid())
 
         pm.get_prices()
         self.assertTrue(pm._is_data_valid())
 
-    @patch("requests.get", get_mock)
-    @patch("userconf.SettingsManager")
-    def test_get_prices(self, sm_mock: MagicMock):
+    def test_get_prices(self):
         """Test `PricesManager.get_prices`."""
-        # Mock
-        sm_mock.return_value = SettingsManagerMock()
-
-        pm = PricesManager()
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
         prices = pm.get_prices()
 
         self.assertEqual(type(prices), dict)
-        self.assertEqual(len(prices), 3)
+        self.assertEqual(len(prices), 5)
+
+        self.assertIn("date", prices)
+        self.assertEqual(prices["date"], pm._get_today_em().isoformat())
 
         self.assertIn("updated", prices)
         self.assertEqual(type(prices["updated"]), float)
@@ -56,10 +50,16 @@ class DataPricesTestCase(unittest.TestCase):
         self.assertIn("price_unit", prices)
         self.assertEqual(type(prices["price_unit"]), str)
 
+        self.assertIn("resolution", prices)
+        self.assertEqual(prices["resolution"], 60)
+
+        # The current day may have 23, 24 or 25 hours
+        times = get_times(pm._get_today_em(), 60)
+
         self.assertIn("data", prices)
         data = prices["data"]
         self.assertEqual(type(data), list)
-        self.assertEqual(len(data), 24)
+        self.assertEqual(len(data), len(times))
 
         for i, v in enumerate(data):
             self.assertEqual(type(v), dict)
@@ -68,7 +68,7 @@ class DataPricesTestCase(unittest.TestCase):
             self.assertIn("time", v)
             t = v["time"]
             self.assertEqual(type(t), str)
-            self.assertEqual(t, str.zfill(str(i), 2) + ":00")
+            self.assertEqual(t, times[i])
 
             self.assertIn("spot_market", v)
             self.assertEqual(type(v["spot_market"]), float)
@@ -79,14 +79,9 @@ class DataPricesTestCase(unittest.TestCase):
             self.assertIn("pvpc_cm", v)
             self.assertEqual(type(v["pvpc_cm"]), float)
 
-    @patch("requests.get", get_mock)
-    @patch("userconf.SettingsManager")
-    def test_prices_units(self, sm_mock: MagicMock):
+    def test_prices_units(self):
         """Test `PricesManager.get_prices` with different units."""
-        # Mock
-        sm_mock.return_value = SettingsManagerMock()
-
-        pm = PricesManager()
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
 
         data_k = pm.get_prices("k")["data"]  # Prices in €/kWh
         data_m = pm.get_prices("m")["data"]  # Prices in €/MWh
@@ -94,8 +89,11 @@ class DataPricesTestCase(unittest.TestCase):
         k_count = len(data_k)
         m_count = len(data_m)
 
-        self.assertEqual(k_count, 24)
-        self.assertEqual(m_count, 24)
+        # The current day may have 23, 24 or 25 hours
+        hours = len(get_times(pm._get_today_em(), 60))
+
+        self.assertEqual(k_count, hours)
+        self.assertEqual(m_count, hours)
 
         # Check that each price in €/kWh is equal to the price in €/MWh divided
         # by 1000.
@@ -105,3 +103,461 @@ class DataPricesTestCase(unittest.TestCase):
                 exp = round(data_m[j][i] / 1000, 5)
 
                 self.assertEqual(act, exp)
+
+    def test_update_data_error(self):
+        """Test `PricesManager.get_prices` when one of the APIs fails."""
+        class ErrorTransportMock(TransportMock):
+            def get_json(self, url: str) -> Any:
+                if url.startswith("https://api.esios.ree.es/"):
+                    raise Exception("Internal Server Error")
+
+                return super().get_json(url)
+
+        pm = PricesManager(ErrorTransportMock(), HistoryStore(":memory:"))
+
+        with self.assertRaisesRegex(Exception, "PVPC"):
+            pm.get_prices()
+
+        # Check that no partial data was stored
+        self.assertIs(pm._prices, None)
+
+    def test_cache(self):
+        """Test that `PricesManager.get_prices` uses the cached data."""
+        store = HistoryStore(":memory:")
+
+        pm_1 = PricesManager(TransportMock(), store)
+        prices_1 = pm_1.get_prices()
+
+        # The data of the current day is got from the store by a new instance
+        transport = TransportMock()
+        pm_2 = PricesManager(transport, store)
+        prices_2 = pm_2.get_prices()
+
+        self.assertEqual(transport.urls, [])
+        self.assertEqual(prices_1, prices_2)
+
+    def test_memory_cache(self):
+        """Test that `PricesManager.get_prices` uses the in-memory cache."""
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+        calls = []
+        format_prices = pm._format_prices
+
+        def format_prices_mock(prices: dict, unit: str) -> dict:
+            calls.append(unit)
+            return format_prices(prices, unit)
+
+        pm._format_prices = format_prices_mock
+
+        prices_1 = pm.get_prices("k")
+        prices_2 = pm.get_prices("k")
+        pm.get_prices("m")
+
+        self.assertEqual(calls, ["k", "m"])
+        self.assertEqual(prices_1, prices_2)
+
+        # The returned prices are copies
+        prices_1["data"][0]["spot_market"] = -1.0
+        self.assertNotEqual(pm.get_prices("k"), prices_1)
+
+        # The cached prices are invalidated when the data is updated
+        pm._prices = dict(pm._prices, updated=pm._prices["updated"] + 1)
+        prices_3 = pm.get_prices("k")
+
+        self.assertEqual(calls, ["k", "m", "k"])
+        self.assertEqual(prices_3["updated"], pm._prices["updated"])
+
+    def test_get_prices_range(self):
+        """Test `PricesManager.get_prices_range`."""
+        store = HistoryStore(":memory:")
+        transport = TransportMock()
+        pm = PricesManager(transport, store)
+
+        # 40 days: 2 Spot Market requests and 40 PVPC requests
+        prices = pm.get_prices_range(date(2022, 11, 1), date(2022, 12, 10))
+        data = prices["data"]
+
+        spot_urls = [u for u in transport.urls if "apidatos" in u]
+        pvpc_urls = [u for u in transport.urls if "esios" in u]
+
+        self.assertEqual(len(spot_urls), 2)
+        self.assertEqual(len(pvpc_urls), 40)
+
+        self.assertEqual(prices["price_unit"], "€/MWh")
+        self.assertEqual(len(data), 40 * 24)
+        self.assertEqual(data[0]["date"], "2022-11-01")
+        self.assertEqual(data[0]["time"], "00:00")
+        self.assertEqual(data[-1]["date"], "2022-12-10")
+        self.assertEqual(data[-1]["time"], "23:00")
+
+        # Cached days
+        transport.urls.clear()
+
+        prices_k = pm.get_prices_range(
+            date(2022, 11, 15), date(2022, 11, 16), "k"
+        )
+
+        self.assertEqual(transport.urls, [])
+        self.assertEqual(prices_k["price_unit"], "€/kWh")
+        self.assertEqual(len(prices_k["data"]), 48)
+        self.assertEqual(prices_k["data"][0]["spot_market"], 0.1001)
+
+        # Partially cached range
+        pm.get_prices_range(date(2022, 12, 9), date(2022, 12, 12))
+        self.assertEqual(len(transport.urls), 3)
+
+        # Invalid range
+        with self.assertRaises(Exception):
+            pm.get_prices_range(date(2022, 12, 2), date(2022, 12, 1))
+
+    def test_resolution(self):
+        """Test `PricesManager.get_prices` and
+        `PricesManager.get_prices_range` with quarter-hour prices and days
+        with 23 and 25 hours.
+        """
+        pm = PricesManager(TransportMock(15), HistoryStore(":memory:"))
+        intervals = get_day_minutes(pm._get_today_em()) // 15
+
+        # Quarter-hour Spot Market prices and hourly PVPC prices
+        prices = pm.get_prices()
+
+        self.assertEqual(prices["resolution"], 15)
+        self.assertEqual(len(prices["data"]), intervals)
+        self.assertEqual(prices["data"][1]["spot_market"], 100.1)
+        self.assertEqual(prices["data"][1]["pvpc_pcb"], 100.25)
+
+        # Other resolutions
+        prices = pm.get_prices(resolution=60)
+
+        self.assertEqual(prices["resolution"], 60)
+        self.assertEqual(len(prices["data"]), intervals // 4)
+        self.assertAlmostEqual(prices["data"][0]["spot_market"], 100.1)
+
+        arrays = pm.get_prices(format="array", resolution=30)
+
+        self.assertEqual(arrays["resolution"], 30)
+        self.assertEqual(arrays["time"].shape, (intervals // 2,))
+        self.assertEqual(arrays["time"][1], "00:30")
+
+        # Invalid resolution
+        with self.assertRaises(Exception):
+            pm.get_prices(resolution=20)
+
+        # Days with 23 and 25 hours (daylight saving time changes)
+        start = date(2022, 3, 26)
+        end = date(2022, 3, 28)
+
+        for d in (start, date(2022, 10, 29)):
+            e = d + timedelta(days=2)
+            prices = pm.get_prices_range(d, e, resolution=60)
+            arrays = pm.get_prices_range(d, e, format="array")
+
+            self.assertEqual(arrays["resolution"], 15)
+            self.assertEqual(arrays["time"].shape, (len(prices["data"]) * 4,))
+
+        prices = pm.get_prices_range(start, end, resolution=60)
+        times = [x["time"] for x in prices["data"]]
+
+        self.assertEqual(len(times), 71)
+        self.assertNotIn("02:00", times[24:47])
+
+        prices = pm.get_prices_range(
+            date(2022, 10, 30), date(2022, 10, 30), resolution=60
+        )
+
+        times = [x["time"] for x in prices["data"]]
+
+        self.assertEqual(len(times), 25)
+        self.assertEqual(times[2:4], ["02:00", "02:00"])
+
+    def test_cheapest(self):
+        """Test `PricesManager.get_cheapest_window` and
+        `PricesManager.get_cheapest_hours`.
+        """
+        store = HistoryStore(":memory:")
+        transport = TransportMock()
+        pm = PricesManager(transport, store)
+
+        # The prices of the first day decrease and the ones of the second day
+        # increase.
+        d1 = date(2022, 12, 14)
+        d2 = date(2022, 12, 15)
+
+        for d, f in ((d1, lambda i: 100.0 - i), (d2, lambda i: 50.0 + i)):
+            store.set_day(d, {
+                "date": d.isoformat(),
+                "updated": 1671058800.0,
+                "price_unit": "€/MWh",
+                "resolution": 60,
+                "data": [
+                    {
+                        "interval": i,
+                        "spot_market": f(i),
+                        "pvpc_pcb": 100.0,
+                        "pvpc_cm": 100.0
+                    }
+                    for i in range(24)
+                ]
+            })
+
+        start = datetime(2022, 12, 14, 10, 30)
+        end = datetime(2022, 12, 16)
+
+        # Window
+        res = pm.get_cheapest_window(start, end, 4)
+
+        self.assertEqual(res["start"], "2022-12-15T00:00:00+01:00")
+        self.assertEqual(res["end"], "2022-12-15T04:00:00+01:00")
+        self.assertEqual(res["mean"], 51.5)
+        self.assertEqual(len(res["data"]), 4)
+
+        self.assertEqual(res["data"][0], {
+            "date": "2022-12-15", "time": "00:00", "spot_market": 50.0
+        })
+
+        # Window in another series, unit and resolution
+        res = pm.get_cheapest_window(start, end, 1, "pvpc_pcb", "k", 15)
+
+        self.assertEqual(res["start"], "2022-12-14T10:30:00+01:00")
+        self.assertEqual(res["price_unit"], "€/kWh")
+        self.assertEqual(len(res["data"]), 4)
+
+        # Non-consecutive hours
+        end = datetime(2022, 12, 15, 2)
+        res = pm.get_cheapest_hours(start, end, 3)
+
+        self.assertEqual(
+            [(x["date"], x["time"]) for x in res["data"]],
+            [
+                ("2022-12-14", "23:00"), ("2022-12-15", "00:00"),
+                ("2022-12-15", "01:00")
+            ]
+        )
+
+        self.assertEqual(transport.urls, [])
+
+        # Invalid arguments
+        with self.assertRaises(Exception):
+            pm.get_cheapest_hours(start, end, 20)
+
+        with self.assertRaises(Exception):
+            pm.get_cheapest_window(end, start, 1)
+
+        with self.assertRaises(Exception):
+            pm.get_cheapest_window(start, end, 1, "pvpc")
+
+    def test_update_range(self):
+        """Test `PricesManager.update_range`."""
+        store = HistoryStore(":memory:")
+        transport = TransportMock()
+        pm = PricesManager(transport, store)
+
+        start = date(2022, 11, 1)
+        end = date(2022, 12, 10)
+
+        # 40 days: 2 Spot Market requests and 40 PVPC requests
+        self.assertEqual(pm.update_range(start, end), 40)
+        self.assertEqual(len(transport.urls), 42)
+        self.assertEqual(len(store.get_stored_dates(start, end)), 40)
+
+        # The data is the same as the one got in batch
+        transport.urls.clear()
+        prices = pm.get_prices_range(start, end)
+
+        self.assertEqual(transport.urls, [])
+
+        pm_2 = PricesManager(TransportMock(), HistoryStore(":memory:"))
+        prices_2 = pm_2.get_prices_range(start, end)
+
+        self.assertEqual(prices["data"], prices_2["data"])
+
+        # Cached days
+        self.assertEqual(pm.update_range(start, end), 0)
+        self.assertEqual(transport.urls, [])
+
+        # Error. The days before the failed day are saved.
+        class ErrorTransportMock(TransportMock):
+            def get_json(self, url: str) -> Any:
+                if "2022-12-14" in url:
+                    raise Exception("Internal Server Error")
+
+                return super().get_json(url)
+
+        pm = PricesManager(ErrorTransportMock(), store)
+
+        with self.assertRaises(Exception) as cm:
+            pm.update_range(date(2022, 12, 11), date(2022, 12, 20))
+
+        self.assertIn("PVPC (2022-12-14)", str(cm.exception))
+
+        stored = store.get_stored_dates(date(2022, 12, 11), date(2022, 12, 20))
+        self.assertEqual(len(stored), 3)
+
+    def test_array_format(self):
+        """Test the "array" format of `PricesManager.get_prices` and
+        `PricesManager.get_prices_range`.
+        """
+        transport = TransportMock()
+        pm = PricesManager(transport, HistoryStore(":memory:"))
+        keys = ("spot_market", "pvpc_pcb", "pvpc_cm")
+
+        # Current day
+        for u in ("k", "m"):
+            prices = pm.get_prices(u)
+            arrays = pm.get_prices(u, format="array")
+
+            self.assertEqual(arrays["date"], prices["date"])
+            self.assertEqual(arrays["updated"], prices["updated"])
+            self.assertEqual(arrays["price_unit"], prices["price_unit"])
+            self.assertNotIn("data", arrays)
+
+            self.assertEqual(
+                arrays["time"].tolist(), [x["time"] for x in prices["data"]]
+            )
+
+            for k in keys:
+                self.assertEqual(arrays[k].dtype, "float64")
+
+                for a, b in zip(arrays[k], prices["data"]):
+                    self.assertAlmostEqual(a, b[k])
+
+        # The returned arrays are copies
+        arrays["spot_market"][0] = -1.0
+        arrays = pm.get_prices(format="array")
+
+        self.assertNotEqual(arrays["spot_market"][0], -1.0)
+
+        # Date range
+        start = date(2022, 11, 30)
+        end = date(2022, 12, 2)
+
+        prices = pm.get_prices_range(start, end, "k")
+        arrays = pm.get_prices_range(start, end, "k", "array")
+
+        self.assertEqual(len(arrays["date"]), 72)
+        self.assertEqual(str(arrays["date"][0]), "2022-11-30")
+        self.assertEqual(str(arrays["date"][-1]), "2022-12-02")
+        self.assertEqual(arrays["updated"], prices["updated"])
+        self.assertEqual(arrays["time"][-1], "23:00")
+
+        for k in keys:
+            for a, b in zip(arrays[k], prices["data"]):
+                self.assertAlmostEqual(a, b[k])
+
+        # Invalid format and range
+        with self.assertRaises(Exception):
+            pm.get_prices(format="list")
+
+        with self.assertRaises(Exception):
+            pm.get_prices_range(end, start, format="array")
+
+    def test_stale_while_revalidate(self):
+        """Test `PricesManager.get_prices` in stale-while-revalidate mode."""
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+
+        # Data of the previous day
+        yesterday = pm._get_today_em() - timedelta(days=1)
+        pm.get_prices_range(yesterday, yesterday)
+
+        event = Event()
+        updates = []
+
+        def on_update(prices: dict):
+            updates.append(prices)
+            event.set()
+
+        prices = pm.get_prices("k", stale_ok=True, on_update=on_update)
+        self.assertTrue(prices["stale"])
+        self.assertEqual(len(prices["data"]), len(get_times(yesterday, 60)))
+
+        # Updated data
+        self.assertTrue(event.wait(5))
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(updates[0]["price_unit"], "€/kWh")
+        self.assertTrue(pm._is_data_valid())
+
+        prices = pm.get_prices("k", stale_ok=True)
+        self.assertFalse(prices["stale"])
+        self.assertEqual(updates[0], prices)
+
+    def test_refresh_callbacks(self):
+        """Test that an error of a caller's function doesn't affect others."""
+        release = Event()
+
+        class SlowTransportMock(TransportMock):
+            def get_json(self, url: str) -> Any:
+                release.wait(5)
+                return super().get_json(url)
+
+        pm = PricesManager(SlowTransportMock(), HistoryStore(":memory:"))
+        get_prices = pm._get_prices
+
+        def get_prices_mock(prices: dict, unit: str, *args) -> dict:
+            if unit == "k":
+                raise Exception("Conversion error")
+
+            return get_prices(prices, unit, *args)
+
+        pm._get_prices = get_prices_mock
+
+        done = Event()
+        updates = []
+        errors = []
+
+        def on_update_1(prices: dict):
+            raise Exception("Callback error")
+
+        def on_update_2(prices: dict):
+            updates.append(prices)
+
+            if len(updates) + len(errors) == 2:
+                done.set()
+
+        def on_error(e: Exception):
+            errors.append(e)
+
+            if len(updates) + len(errors) == 2:
+                done.set()
+
+        # All the callers wait for the same update
+        pm._refresh_data("m", "dict", None, on_update_1, on_error)
+        pm._refresh_data("k", "dict", None, on_update_2, on_error)
+        pm._refresh_data("m", "dict", None, on_update_2, on_error)
+
+        with patch("sys.stderr"):
+            release.set()
+            self.assertTrue(done.wait(5))
+
+        # The conversion error is only reported to its caller
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(str(errors[0]), "Conversion error")
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(updates[0]["price_unit"], "€/MWh")
+
+    def test_single_flight(self):
+        """Test that concurrent updates of the same day call the APIs once."""
+        store = HistoryStore(":memory:")
+
+        class SlowTransportMock(TransportMock):
+            def get_json(self, url: str) -> Any:
+                sleep(0.2)
+                return super().get_json(url)
+
+        transport = SlowTransportMock()
+        results = []
+
+        def get_prices():
+            results.append(PricesManager(transport, store).get_prices())
+
+        threads = [Thread(target=get_prices) for _ in range(8)]
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(transport.urls), 2)
+        self.assertEqual(len(results), 8)
+
+        for r in results:
+            self.assertEqual(r, results[0])
@@ -0,0 +1,92 @@
+"""Energy-ES - Tests - Data - Scenarios - Unit tests."""
+
+from datetime import date
+import unittest
+
+import numpy as np
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import TransportMock
+
+from energy_es.data.history import HistoryStore
+from energy_es.data.prices import PricesManager
+
+from energy_es.data.scenarios import (
+    Tariff, evaluate_scenarios, get_default_tariffs
+)
+
+
+class DataScenariosTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.scenarios" module."""
+
+    def setUp(self):
+        """Set up the prices manager used by the tests."""
+        self.pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+        self.start = date(2022, 1, 1)
+        self.end = date(2022, 1, 2)
+
+    def test_tariffs(self):
+        """Test `Tariff.get_prices`."""
+        prices = self.pm.get_prices_range(self.start, self.end, format="array")
+
+        tariff = Tariff("Discount", "pvpc_cm", 0.5, 0.01)
+        self.assertTrue(np.allclose(tariff.get_prices(prices), 0.085))
+
+        # Time-of-use charge from 18:00
+        def add_peak(values: np.ndarray, local: np.ndarray) -> np.ndarray:
+            hours = local - local.astype("datetime64[D]")
+            return values + 0.1 * (hours >= np.timedelta64(18, "h"))
+
+        tariff = Tariff("Peak", "pvpc_cm", transform=add_peak)
+        values = tariff.get_prices(prices)
+
+        self.assertEqual(values[17], 0.15)
+        self.assertAlmostEqual(values[18], 0.25)
+        self.assertEqual(values[24], 0.15)
+
+        # Invalid tariffs
+        with self.assertRaises(Exception):
+            Tariff("Invalid", "pvpc")
+
+        tariff = Tariff("Invalid", transform=lambda v, t: v[:10])
+
+        with self.assertRaises(Exception):
+            tariff.get_prices(prices)
+
+    def test_evaluate_scenarios(self):
+        """Test the `evaluate_scenarios` function."""
+        rng = np.random.default_rng(0)
+        loads = rng.uniform(0, 3, (50, 48))
+
+        tariffs = get_default_tariffs() + [
+            Tariff("Double", "spot_market", 2.0)
+        ]
+
+        costs = evaluate_scenarios(
+            loads, tariffs, self.start, self.end, chunk_rows=8,
+            prices_manager=self.pm
+        )
+
+        totals = loads.sum(axis=1)
+
+        self.assertEqual(costs.shape, (50, 4))
+        self.assertTrue(np.allclose(costs[:, 0], totals * 0.1001))
+        self.assertTrue(np.allclose(costs[:, 2], totals * 0.15))
+        self.assertTrue(np.allclose(costs[:, 3], costs[:, 0] * 2))
+
+        # Process pool with shared memory. The results are the same.
+        costs_2 = evaluate_scenarios(
+            loads, tariffs, self.start, self.end, workers=2, chunk_rows=8,
+            prices_manager=self.pm
+        )
+
+        self.assertTrue((costs == costs_2).all())
+
+        # Invalid loads
+        with self.assertRaises(Exception):
+            evaluate_scenarios(
+                loads[:, :24], tariffs, self.start, self.end,
+                prices_manager=self.pm
+            )
@@ -0,0 +1,139 @@
+"""Energy-ES - Tests - Data - Scheduler - Unit tests."""
+
+from datetime import date, datetime
+import threading
+import unittest
+from typing import Any
+from unittest.mock import MagicMock, patch
+from zoneinfo import ZoneInfo
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import TransportMock
+
+from energy_es.data.history import HistoryStore
+from energy_es.data.prices import PricesManager
+from energy_es.data.scheduler import PrefetchScheduler
+
+
+def get_datetime(*args) -> datetime:
+    """Return a datetime in the Europe/Madrid time zone.
+
+    :param args: Year, month, day, hour, etc.
+    :return: Datetime.
+    """
+    return datetime(*args, tzinfo=ZoneInfo("Europe/Madrid"))
+
+
+class DataSchedulerTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.scheduler" module."""
+
+    def test_prefetch(self):
+        """Test that `PrefetchScheduler` gets the data of the next day."""
+        transport = TransportMock()
+        pm = PricesManager(transport, HistoryStore(":memory:"))
+        prefetched = []
+
+        scheduler = PrefetchScheduler(pm, on_prefetch=prefetched.append)
+
+        # Before the publication time
+        wait = scheduler._step(get_datetime(2022, 12, 15, 20, 0))
+
+        self.assertEqual(wait, 1800)
+        self.assertEqual(transport.urls, [])
+
+        # After the publication time
+        wait = scheduler._step(get_datetime(2022, 12, 15, 21, 0))
+
+        self.assertEqual(wait, 3 * 3600 + scheduler.ROLLOVER_MARGIN)
+        self.assertEqual(len(transport.urls), 2)
+        self.assertEqual(prefetched, [date(2022, 12, 16)])
+        self.assertTrue(pm.is_cached(date(2022, 12, 16)))
+
+        # Data already in the cache
+        scheduler._step(get_datetime(2022, 12, 15, 22, 0))
+        self.assertEqual(len(transport.urls), 2)
+
+    def test_backoff(self):
+        """Test that `PrefetchScheduler` retries with backoff."""
+        class ErrorTransportMock(TransportMock):
+            def get_json(self, url: str) -> Any:
+                raise Exception("Not published")
+
+        pm = PricesManager(ErrorTransportMock(), HistoryStore(":memory:"))
+        scheduler = PrefetchScheduler(pm)
+
+        waits = [
+            scheduler._step(get_datetime(2022, 12, 15, 21, 0))
+            for _ in range(4)
+        ]
+
+        self.assertEqual(waits, [300, 600, 1200, 1800])
+
+        # The wait never goes past midnight
+        wait = scheduler._step(get_datetime(2022, 12, 15, 23, 59))
+        self.assertEqual(wait, 60 + scheduler.ROLLOVER_MARGIN)
+
+    def test_rollover(self):
+        """Test that `PrefetchScheduler` detects the day changes."""
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+        days = []
+
+        scheduler = PrefetchScheduler(pm, on_rollover=days.append)
+
+        scheduler._step(get_datetime(2022, 12, 15, 21, 0))
+        self.assertEqual(days, [])
+
+        scheduler._step(get_datetime(2022, 12, 16, 0, 0, 1))
+        self.assertEqual(days, [date(2022, 12, 16)])
+
+        # DST change (25-hour day)
+        wait = scheduler._step(get_datetime(2022, 10, 30, 0, 30))
+        self.assertEqual(wait, 21 * 3600)
+
+    def test_errors(self):
+        """Test that the errors of a step don't stop `PrefetchScheduler`."""
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+        is_cached = pm.is_cached
+        pm.is_cached = MagicMock(side_effect=[Exception("Locked"), False])
+
+        on_prefetch = MagicMock(side_effect=Exception("Callback error"))
+        scheduler = PrefetchScheduler(pm, on_prefetch=on_prefetch)
+        now = get_datetime(2022, 12, 15, 21, 0)
+
+        with patch("sys.stderr"):
+            # The store is locked
+            self.assertEqual(scheduler._safe_step(now), 300)
+
+            # The data is got although the callback fails
+            wait = scheduler._safe_step(now)
+
+        self.assertEqual(wait, 3 * 3600 + scheduler.ROLLOVER_MARGIN)
+        self.assertTrue(is_cached(date(2022, 12, 16)))
+        on_prefetch.assert_called_once_with(date(2022, 12, 16))
+
+    def test_default_prices_manager(self):
+        """Test that the default prices manager is got in the background."""
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+        threads = []
+        called = threading.Event()
+
+        def get_pm() -> PricesManager:
+            threads.append(threading.get_ident())
+            called.set()
+
+            return pm
+
+        with patch(
+            "energy_es.data.scheduler.get_default_prices_manager", get_pm
+        ):
+            scheduler = PrefetchScheduler()
+            self.assertEqual(threads, [])
+
+            scheduler.start()
+            self.assertTrue(called.wait(5))
+            scheduler.stop()
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
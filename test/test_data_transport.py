@@ -0,0 +1,202 @@
+"""Energy-ES - Tests - Data - Transport - Unit tests."""
+
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+
+from energy_es.data.transport import AsyncTransport, Transport
+
+
+def get_response_mock(
+    status_code: int, data: dict = None, headers: dict = None
+) -> MagicMock:
+    """Return a `requests.Response` mock.
+
+    :param status_code: Response status code.
+    :param data: Response data.
+    :param headers: Response headers.
+    :return: Response mock.
+    """
+    res = MagicMock()
+    res.status_code = status_code
+    res.reason = str(status_code)
+    res.headers = headers or {}
+    res.json.return_value = data
+
+    return res
+
+
+class DataTransportTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.transport" module."""
+
+    @patch("energy_es.data.transport.sleep")
+    def test_retries(self, sleep_mock: MagicMock):
+        """Test that `Transport.get_json` retries failed requests."""
+        t = Transport(connect_timeout=1, read_timeout=2, retries=2)
+        t._session = MagicMock()
+
+        t._session.get.side_effect = [
+            requests.ConnectionError(),
+            get_response_mock(503),
+            get_response_mock(200, {"a": 1})
+        ]
+
+        self.assertEqual(t.get_json("https://test/"), {"a": 1})
+        self.assertEqual(t._session.get.call_count, 3)
+
+        # Check timeouts and backoff
+        for c in t._session.get.call_args_list:
+            self.assertEqual(c.kwargs["timeout"], (1, 2))
+
+        self.assertEqual(
+            [c.args[0] for c in sleep_mock.call_args_list], [0.5, 1.0]
+        )
+
+        # Retries exhausted
+        t._session.get.side_effect = None
+        t._session.get.return_value = get_response_mock(503)
+
+        with self.assertRaises(Exception):
+            t.get_json("https://test/")
+
+    def test_revalidation(self):
+        """Test that `Transport.get_json` revalidates cached responses."""
+        t = Transport()
+        t._session = MagicMock()
+
+        res_1 = get_response_mock(200, {"a": 1}, {"ETag": '"x"'})
+        res_2 = get_response_mock(304)
+        t._session.get.side_effect = [res_1, res_2]
+
+        data_1 = t.get_json("https://test/")
+        data_2 = t.get_json("https://test/")
+
+        # The second response isn't parsed
+        self.assertIs(data_1, data_2)
+        res_2.json.assert_not_called()
+
+        headers = t._session.get.call_args_list[1].kwargs["headers"]
+        self.assertEqual(headers, {"If-None-Match": '"x"'})
+
+    def test_cache_size(self):
+        """Test that `Transport` only caches the most recently used
+        responses.
+        """
+        t = Transport(cache_size=2)
+        t._session = MagicMock()
+
+        t._session.get.side_effect = lambda url, **kwargs: get_response_mock(
+            200, {"url": url}, {"ETag": '"x"'}
+        )
+
+        for url in ("https://test/1", "https://test/2", "https://test/1"):
+            t.get_json(url)
+
+        t.get_json("https://test/3")
+
+        # The least recently used response is discarded
+        self.assertEqual(
+            list(t._cache), ["https://test/1", "https://test/3"]
+        )
+
+    def test_iter_text(self):
+        """Test `Transport.iter_text`."""
+        t = Transport()
+        t._session = MagicMock()
+
+        res = get_response_mock(200)
+        res.encoding = None
+        res.iter_content.return_value = iter(['{"a": ', "1}"])
+        t._session.get.return_value = res
+
+        chunks = t.iter_text("https://test/", 10)
+
+        # The request is made when the iteration starts
+        t._session.get.assert_not_called()
+        self.assertEqual(list(chunks), ['{"a": ', "1}"])
+
+        self.assertTrue(t._session.get.call_args.kwargs["stream"])
+        res.iter_content.assert_called_once_with(10, decode_unicode=True)
+        self.assertEqual(res.encoding, "utf-8")
+        res.close.assert_called_once()
+
+        # Error
+        t._session.get.return_value = get_response_mock(404)
+
+        with self.assertRaises(Exception):
+            list(t.iter_text("https://test/"))
+
+    def test_async_transport(self):
+        """Test that `AsyncTransport` makes the requests of a transport in
+        threads.
+        """
+        transport = MagicMock()
+        threads = []
+
+        def get_json(url: str) -> dict:
+            threads.append(threading.get_ident())
+            return {"url": url}
+
+        transport.get_json.side_effect = get_json
+        t = AsyncTransport(transport)
+
+        async def run() -> list:
+            try:
+                return await asyncio.gather(
+                    t.get_json("https://test/1"), t.get_json("https://test/2")
+                )
+            finally:
+                await t.close()
+
+        self.assertEqual(
+            asyncio.run(run()),
+            [{"url": "https://test/1"}, {"url": "https://test/2"}]
+        )
+
+        self.assertNotIn(threading.get_ident(), threads)
+        transport.close.assert_called_once()
+
+    def test_async_transport_workers(self):
+        """Test that `AsyncTransport` bounds the concurrent requests."""
+        transport = MagicMock()
+        lock = threading.Lock()
+        names = set()
+        active = [0, 0]
+
+        def get_json(url: str) -> dict:
+            with lock:
+                names.add(threading.current_thread().name)
+                active[0] += 1
+                active[1] = max(active)
+
+            time.sleep(0.01)
+
+            with lock:
+                active[0] -= 1
+
+            return {}
+
+        transport.get_json.side_effect = get_json
+        t = AsyncTransport(transport, max_workers=2)
+
+        async def run():
+            await asyncio.gather(
+                *(t.get_json(f"https://test/{i}") for i in range(6))
+            )
+
+            await t.close()
+
+        asyncio.run(run())
+
+        self.assertEqual(active[1], 2)
+        self.assertTrue(
+            all(n.startswith("energy-es-transport") for n in names)
+        )
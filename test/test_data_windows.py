@@ -0,0 +1,52 @@
+"""Energy-ES - Tests - Data - Windows - Unit tests."""
+
+import unittest
+
+import numpy as np
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+
+from energy_es.data.windows import (
+    find_cheapest_intervals, find_cheapest_window
+)
+
+
+class DataWindowsTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.data.windows" module."""
+
+    def test_find_cheapest_window(self):
+        """Test the `find_cheapest_window` function."""
+        values = np.array([5.0, 1.0, 9.0, 2.0, 2.0, 3.0, 0.5, 8.0])
+
+        self.assertEqual(find_cheapest_window(values, 1), 6)
+        self.assertEqual(find_cheapest_window(values, 2), 5)
+        self.assertEqual(find_cheapest_window(values, 3), 4)
+        self.assertEqual(find_cheapest_window(values, 8), 0)
+
+        # Ties
+        self.assertEqual(find_cheapest_window(np.ones(10), 4), 0)
+
+        # Invalid number of intervals
+        for c in (0, 9):
+            with self.assertRaises(Exception):
+                find_cheapest_window(values, c)
+
+    def test_find_cheapest_intervals(self):
+        """Test the `find_cheapest_intervals` function."""
+        values = np.array([5.0, 1.0, 9.0, 2.0, 2.0, 3.0, 0.5, 8.0])
+
+        res = find_cheapest_intervals(values, 3)
+        self.assertEqual(res.tolist(), [1, 3, 6])
+
+        res = find_cheapest_intervals(values, 4)
+        self.assertEqual(res.tolist(), [1, 3, 4, 6])
+
+        # Ties
+        res = find_cheapest_intervals(np.array([2.0, 1.0, 2.0, 2.0]), 2)
+        self.assertEqual(res.tolist(), [0, 1])
+
+        # Invalid number of intervals
+        with self.assertRaises(Exception):
+            find_cheapest_intervals(values, 0)
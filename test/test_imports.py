@@ -0,0 +1,79 @@
+"""Energy-ES - Tests - Imports - Unit tests."""
+
+import subprocess
+import sys
+import unittest
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+
+
+# Modules that mustn't be imported by the data modules
+HEAVY_MODULES = ("PySide6", "pandas", "numpy", "plotly", "requests")
+
+# Maximum import time (in seconds) of a data module. The actual time is a few
+# milliseconds, but we allow some margin for slow machines.
+MAX_IMPORT_TIME = 0.3
+
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    """Run Python code in a new process with the "src" directory in
+    "sys.path" and the "-X importtime" option.
+
+    :param code: Python code.
+    :return: Completed process.
+    """
+    code = f"import sys; sys.path.insert(0, {repr(paths.src_dir)}); {code}"
+
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True
+    )
+
+
+class ImportsTestCase(unittest.TestCase):
+    """Import-time regression tests of the "energy_es" package."""
+
+    def test_headless_import(self):
+        """Test that the data modules don't import heavy modules."""
+        for m in ("energy_es", "energy_es.data.prices", "energy_es.cli"):
+            res = run_python(
+                f"import {m}; "
+                f"print([i for i in {HEAVY_MODULES} if i in sys.modules])"
+            )
+
+            self.assertEqual(res.stdout.strip(), "[]", m)
+
+    def test_import_time(self):
+        """Test the import time of the "energy_es.data.prices" module."""
+        res = run_python("import energy_es.data.prices")
+
+        # Each line of the "-X importtime" output has the format "import time:
+        # <self (us)> | <cumulative (us)> | <module>".
+        times = {}
+
+        for line in res.stderr.splitlines():
+            cols = line.split("|")
+
+            if len(cols) == 3 and cols[1].strip().isdigit():
+                times[cols[2].strip()] = int(cols[1]) / 1_000_000
+
+        self.assertIn("energy_es.data.prices", times)
+        self.assertLess(times["energy_es.data.prices"], MAX_IMPORT_TIME)
+
+    def test_native_chart_import(self):
+        """Test that the native chart module doesn't import the web engine,
+        Plotly or pandas.
+        """
+        modules = (
+            "PySide6.QtWebEngineCore", "PySide6.QtWebEngineWidgets", "plotly",
+            "pandas"
+        )
+
+        res = run_python(
+            "import energy_es.ui.native_chart; "
+            f"print([i for i in {modules} if i in sys.modules])"
+        )
+
+        self.assertEqual(res.stdout.strip(), "[]")
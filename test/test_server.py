@@ -0,0 +1,161 @@
+"""Energy-ES - Tests - HTTP Server - Unit tests."""
+
+import asyncio
+import json
+import unittest
+from unittest.mock import MagicMock
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import TransportMock
+
+from energy_es.data.history import HistoryStore
+from energy_es.data.intervals import get_times
+from energy_es.data.prices import PricesManager
+from energy_es.server import PricesServer
+
+
+class ServerTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.server" module."""
+
+    def setUp(self):
+        """Set up the server used by the tests."""
+        self.transport = TransportMock()
+        pm = PricesManager(self.transport, HistoryStore(":memory:"))
+        self.server = PricesServer(pm, port=0)
+
+    def get(self, target: str, headers: dict = {}) -> tuple:
+        """Return the response of a GET request.
+
+        :param target: Request target.
+        :param headers: Request headers.
+        :return: Tuple with the status code, the headers and the body.
+        """
+        return asyncio.run(self.server.get_response("GET", target, headers))
+
+    def test_prices(self):
+        """Test the prices of the current day."""
+        status, headers, body = self.get("/prices?unit=k")
+        prices = json.loads(body)
+        today = self.server._get_today_em()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            headers["Content-Type"], "application/json; charset=utf-8"
+        )
+
+        self.assertTrue(headers["Cache-Control"].startswith("public, max-age"))
+        self.assertEqual(prices["price_unit"], "€/kWh")
+        self.assertEqual(len(prices["data"]), len(get_times(today, 60)))
+
+        # The response is served from memory
+        self.assertEqual(self.get("/prices?unit=k"), (status, headers, body))
+        self.assertEqual(len(self.transport.urls), 2)
+
+        # Conditional request
+        status, headers, body = self.get(
+            "/prices?unit=k", {"if-none-match": headers["ETag"]}
+        )
+
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+
+    def test_range(self):
+        """Test the prices of a date range."""
+        status, headers, body = self.get(
+            "/prices/range?start=2022-12-01&end=2022-12-02&format=csv"
+            "&resolution=30"
+        )
+
+        lines = body.decode().splitlines()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Cache-Control"], "public, max-age=86400")
+        self.assertEqual(len(lines), 97)
+        self.assertEqual(lines[0], "date,time,spot_market,pvpc_pcb,pvpc_cm")
+        self.assertEqual(lines[2], "2022-12-01,00:30,100.1,100.25,150.0")
+
+    def test_errors(self):
+        """Test the error responses."""
+        self.assertEqual(self.get("/")[0], 404)
+        self.assertEqual(self.get("/prices?unit=x")[0], 400)
+        self.assertEqual(self.get("/prices?resolution=20")[0], 400)
+        self.assertEqual(self.get("/prices/range")[0], 400)
+        self.assertEqual(self.get("/prices/range?start=2022-13-01")[0], 400)
+
+        self.assertEqual(
+            self.get("/prices/range?start=2022-12-02&end=2022-12-01")[0], 400
+        )
+
+        status, headers, _ = asyncio.run(
+            self.server.get_response("POST", "/prices", {})
+        )
+
+        self.assertEqual(status, 405)
+        self.assertEqual(headers["Allow"], "GET, HEAD")
+
+    def test_render_error(self):
+        """Test the responses of the failed renders."""
+        self.transport.get_json = MagicMock(side_effect=Exception("Timeout"))
+        target = "/prices/range?start=2022-12-01"
+
+        status, headers, body = self.get(target)
+        calls = self.transport.get_json.call_count
+
+        self.assertEqual(status, 502)
+        self.assertTrue(body.endswith(b"Timeout\n"))
+        self.assertEqual(headers["Retry-After"], "30")
+        self.assertGreater(calls, 0)
+
+        # The error is served from memory until it expires
+        self.assertEqual(self.get(target)[0], 502)
+        self.assertEqual(self.transport.get_json.call_count, calls)
+
+        self.server.ERROR_MAX_AGE = 0
+        self.server._errors.clear()
+
+        self.assertEqual(self.get(target)[0], 502)
+        self.assertEqual(self.get(target)[0], 502)
+        self.assertEqual(self.transport.get_json.call_count, 3 * calls)
+
+    def test_connection(self):
+        """Test concurrent requests through keep-alive connections."""
+        async def request(count: int) -> list[bytes]:
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", self.server.port
+            )
+
+            responses = []
+
+            for _ in range(count):
+                writer.write(b"GET /prices HTTP/1.1\r\nHost: test\r\n\r\n")
+                head = await reader.readuntil(b"\r\n\r\n")
+
+                length = [
+                    int(h.split(b":")[1]) for h in head.split(b"\r\n")
+                    if h.lower().startswith(b"content-length:")
+                ][0]
+
+                responses.append(head.split(b"\r\n")[0])
+                await reader.readexactly(length)
+
+            writer.close()
+            return responses
+
+        async def run() -> list[list[bytes]]:
+            await self.server.start()
+
+            try:
+                return await asyncio.gather(*(request(3) for _ in range(10)))
+            finally:
+                await self.server.close()
+
+        results = asyncio.run(run())
+
+        self.assertEqual(
+            [r for res in results for r in res], [b"HTTP/1.1 200 OK"] * 30
+        )
+
+        # The prices were only got once for all the clients
+        self.assertEqual(len(self.transport.urls), 2)
@@ -0,0 +1,163 @@
+"""Energy-ES - Tests - User Interface - Chart - Unit tests."""
+
+from datetime import datetime, timedelta
+from os.path import join
+from tempfile import TemporaryDirectory
+from threading import Event
+from unittest.mock import MagicMock, patch
+import json
+import unittest
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+from mocks import TransportMock
+
+from energy_es.data.history import HistoryStore
+from energy_es.data.intervals import TZ
+from energy_es.data.prices import PricesManager
+from energy_es.ui import chart
+
+
+class UiChartTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.ui.chart" module."""
+
+    def setUp(self):
+        """Set up a temporary files directory and a prices manager."""
+        self.tmp_dir = TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        uc = MagicMock()
+        uc.files.get_path = lambda name: join(self.tmp_dir.name, name)
+        self.transport = TransportMock()
+        self.pm = PricesManager(self.transport, HistoryStore(":memory:"))
+
+        for target, value in (
+            ("energy_es.ui.chart.UserConf", uc),
+            ("energy_es.ui.chart.get_default_prices_manager", self.pm)
+        ):
+            p = patch(target, return_value=value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_cached_chart_data(self):
+        """Test that the last chart data is reused while it's valid."""
+        self.assertIsNone(chart.get_cached_chart_data())
+
+        highlight = ("pvpc_pcb", "window", 2)
+        data = chart.get_chart_data("k", highlight=highlight)
+
+        # The highlighted ranges are saved as lists
+        data["highlight"] = [list(r) for r in data["highlight"]]
+        self.assertEqual(chart.get_cached_chart_data(highlight), data)
+
+        # Other highlighted intervals
+        self.assertIsNone(chart.get_cached_chart_data())
+
+        self.assertIsNone(
+            chart.get_cached_chart_data(("pvpc_pcb", "hours", 2))
+        )
+
+    def test_stale_prices(self):
+        """Test that the prices of both units are got from the same data and
+        that the errors updating stale data are reported.
+        """
+        self.pm.prefetch(datetime.now(TZ).date() - timedelta(days=1))
+
+        def get_json(url: str):
+            raise Exception("Connection error")
+
+        self.transport.get_json = get_json
+
+        errors = []
+        done = Event()
+
+        def on_error(message: str):
+            errors.append(message)
+            done.set()
+
+        prices = chart._get_prices(lambda: None, on_error)
+        done.wait(5)
+
+        self.assertTrue(prices["m"]["stale"])
+        self.assertTrue(prices["k"]["stale"])
+        self.assertEqual(prices["k"]["date"], prices["m"]["date"])
+        self.assertEqual(prices["k"]["price_unit"], "€/kWh")
+
+        self.assertEqual(
+            prices["k"]["spot_market"].tolist(),
+            [round(x / 1000, 5) for x in prices["m"]["spot_market"].tolist()]
+        )
+
+        self.assertEqual(len(errors), 1)
+        self.assertIn("Connection error", errors[0])
+
+    def test_chart_page(self):
+        """Test the chart HTML page written by `get_chart_path`."""
+        path = chart.get_chart_path("k", highlight=("pvpc_pcb", "window", 2))
+
+        with open(path, encoding="utf-8") as f:
+            page = f.read()
+
+        # The Plotly JavaScript library (about 3.5 MB) isn't embedded, it's
+        # loaded from the application URL scheme.
+        self.assertLess(len(page), 100_000)
+        self.assertIn(f'<script src="{chart.PLOTLY_JS_URL}"', page)
+        self.assertEqual(chart.PLOTLY_JS_URL, "energy-es://app/plotly.min.js")
+
+        # The page has the data of both units and the "setUnit" function
+        self.assertIn("window.setUnit = function (unit)", page)
+
+        line = next(
+            x for x in page.splitlines() if x.startswith("var units = ")
+        )
+
+        units = json.loads(line[len("var units = "):].rstrip(";"))
+
+        self.assertEqual(set(units), {"k", "m"})
+        self.assertEqual(units["k"]["price_unit"], "€/kWh")
+        self.assertEqual(units["m"]["price_unit"], "€/MWh")
+        self.assertEqual(len(units["k"]["y"]), len(chart.SERIES))
+
+        self.assertEqual(
+            units["m"]["y"][0][0], round(units["k"]["y"][0][0] * 1000, 2)
+        )
+
+        # The chart is reused at startup
+        self.assertEqual(
+            chart.get_cached_chart_path(("pvpc_pcb", "window", 2)), path
+        )
+
+    def test_metadata(self):
+        """Test the validity of the chart metadata."""
+        prices = {"date": "2022-12-15", "updated": 1671058800.0}
+        metadata = chart._get_metadata(prices, "native", "k")
+
+        self.assertEqual(metadata["version"], chart.CHART_VERSION)
+        self.assertIsNone(metadata["highlight"])
+        self.assertFalse(metadata["stale"])
+
+        # Past day
+        self.assertFalse(chart._is_metadata_valid(metadata, "native"))
+
+        # Current day
+        prices = chart._get_prices()["m"]
+        metadata = chart._get_metadata(prices, "native", "k")
+
+        self.assertTrue(chart._is_metadata_valid(metadata, "native"))
+        self.assertFalse(chart._is_metadata_valid(metadata, "plotly-5.0.0"))
+
+        # Stale data and other chart version
+        for key, value in (("stale", True), ("version", 0)):
+            self.assertFalse(
+                chart._is_metadata_valid({**metadata, key: value}, "native")
+            )
+
+        # Invalid metadata file
+        path = join(self.tmp_dir.name, "chart_data.json")
+
+        with open(path, "w") as f:
+            f.write("{")
+
+        self.assertIsNone(chart._read_json(path))
+        self.assertIsNone(chart.get_cached_chart_data())
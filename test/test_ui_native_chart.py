@@ -0,0 +1,216 @@
+"""Energy-ES - Tests - User Interface - Native Chart - Unit tests."""
+
+from os import environ
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+import unittest
+
+# The widgets are created without any display
+environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QPointF, QRectF, Qt  # noqa: E402
+from PySide6.QtTest import QTest  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths  # noqa: E402
+from mocks import TransportMock  # noqa: E402
+
+from energy_es.data.history import HistoryStore  # noqa: E402
+from energy_es.data.prices import PricesManager  # noqa: E402
+from energy_es.ui.native_chart import NativeChart  # noqa: E402
+
+
+def get_data(values: list[float], highlight: list = []) -> dict:
+    """Return chart data (see `energy_es.ui.chart.get_chart_data`).
+
+    :param values: Prices (€/MWh) of the Spot Market series. The PVPC series
+    have the same prices plus 10 and 20.
+    :param highlight: Ranges of intervals to highlight.
+    :return: Chart data.
+    """
+    def get_unit_data(unit: str, div: int) -> dict:
+        return {
+            "price_unit": unit,
+            "title": f"Energy prices ({unit})",
+            "spot_market": [v / div for v in values],
+            "pvpc_pcb": [(v + 10) / div for v in values],
+            "pvpc_cm": [(v + 20) / div for v in values]
+        }
+
+    return {
+        "time": [f"{i:02}:00" for i in range(len(values))],
+        "highlight": highlight,
+        "units": {
+            "k": get_unit_data("€/kWh", 1000),
+            "m": get_unit_data("€/MWh", 1)
+        }
+    }
+
+
+class UiNativeChartTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.ui.native_chart" module."""
+
+    def setUp(self):
+        """Set up the application and the chart widget."""
+        app = QApplication.instance()
+
+        if app is None:
+            app = QApplication([])
+        elif not isinstance(app, QApplication):
+            self.skipTest("A non-GUI application is already running.")
+
+        self.chart = NativeChart()
+        self.chart.resize(1000, 600)
+        self.addCleanup(self.chart.deleteLater)
+
+    def test_render(self):
+        """Test the chart of the data returned by `NativeChart.render`."""
+        tmp_dir = TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+
+        uc = MagicMock()
+        uc.files.get_path = lambda name: join(tmp_dir.name, name)
+        pm = PricesManager(TransportMock(), HistoryStore(":memory:"))
+
+        with (
+            patch("energy_es.ui.chart.UserConf", return_value=uc),
+            patch(
+                "energy_es.ui.chart.get_default_prices_manager",
+                return_value=pm
+            )
+        ):
+            data = NativeChart.render("k", None, ("spot_market", "window", 2))
+
+        self.chart.show_chart(data)
+        self.chart.grab()
+
+        # The mock prices of each series are constant
+        low, high, step = self.chart._get_visible_y_range()
+
+        self.assertLess(low, 0.1001)
+        self.assertGreater(high, 0.15)
+        self.assertGreater(step, 0)
+        self.assertEqual(len(data["highlight"]), 1)
+
+        first, last = data["highlight"][0]
+        self.assertEqual(last - first, 1)
+
+    def test_y_range(self):
+        """Test the range of the prices axis."""
+        chart = self.chart
+
+        for values in ([[5.0] * 24], [[0.0] * 24], [[-5.0, -1.0]], []):
+            low, high, step = chart._get_y_range(values)
+            flat = [v for vs in values for v in vs] or [0.0, 1.0]
+
+            self.assertGreater(step, 0)
+            self.assertLess(low, min(flat))
+            self.assertGreater(high, max(flat))
+
+            # The range is a whole number of steps
+            self.assertAlmostEqual((high - low) / step % 1, 0)
+
+        # Negative prices
+        low, high, _ = chart._get_y_range([[-30.0, -10.0, 20.0]])
+
+        self.assertLess(low, -30)
+        self.assertGreater(high, 20)
+
+    def test_labels(self):
+        """Test the placement of the MIN and MAX labels."""
+        chart = self.chart
+        values = [3.0, 1.0, 5.0, 1.0, 5.0]
+
+        chart.show_chart(get_data(values))
+
+        rect = QRectF(0, 0, 500, 100)
+        y_range = chart._get_y_range([values])
+        points = chart._get_points(values, rect, y_range)
+        labels = dict(chart._get_labels(values, points, 6, 10))
+
+        # Only the first minimum and maximum are labelled
+        self.assertEqual(labels["MIN"].center().x(), points[1].x())
+        self.assertEqual(labels["MAX"].center().x(), points[2].x())
+
+        # The MIN label is below its point and the MAX label above it
+        self.assertGreater(labels["MIN"].top(), points[1].y())
+        self.assertLess(labels["MAX"].bottom(), points[2].y())
+
+    def test_unit(self):
+        """Test the unit switch and the tooltip text."""
+        chart = self.chart
+        chart.show_chart(get_data([100.0, 200.0, -50.0]))
+
+        text = chart._get_tooltip("spot_market", 1)
+        self.assertIn("Price: &nbsp;0.2 €/kWh", text)
+
+        k_range = chart._get_visible_y_range()
+        chart.set_unit("m")
+        m_range = chart._get_visible_y_range()
+
+        self.assertLess(k_range[1], 1)
+        self.assertGreater(m_range[1], 200)
+        self.assertLess(m_range[0], -50)
+
+        text = chart._get_tooltip("pvpc_cm", 2)
+
+        self.assertIn("<b>PVPC (Ceuta and Melilla)</b>", text)
+        self.assertIn("Time: &nbsp;02:00", text)
+        self.assertIn("Price: &nbsp;-30.0 €/MWh", text)
+
+    def test_legend(self):
+        """Test that the series are hidden by clicking on the legend."""
+        chart = self.chart
+        chart.set_unit("m")
+        chart.show_chart(get_data([100.0, 200.0]))
+        chart.grab()
+
+        values = [[100.0, 200.0], [110.0, 210.0], [120.0, 220.0]]
+        y_range = chart._get_y_range(values)
+
+        self.assertEqual(chart._get_visible_y_range(), y_range)
+
+        # Hide the PVPC series
+        for c in ("pvpc_cm", "pvpc_pcb"):
+            pos = chart._legend[c].center().toPoint()
+            QTest.mouseClick(chart, Qt.LeftButton, pos=pos)
+
+        self.assertEqual(chart._get_visible_series(), ["spot_market"])
+
+        self.assertEqual(
+            chart._get_visible_y_range(), chart._get_y_range([[100.0, 200.0]])
+        )
+
+        # The hovered point is only searched in the visible series
+        rect = chart._get_plot_rect()
+        y_range = chart._get_visible_y_range()
+        point = chart._get_points([100.0, 200.0], rect, y_range)[1]
+
+        self.assertEqual(chart._get_point_at(point), ("spot_market", 1))
+        self.assertIsNone(chart._get_point_at(QPointF(0, 0)))
+
+        # Show a series again
+        pos = chart._legend["pvpc_cm"].center().toPoint()
+        QTest.mouseClick(chart, Qt.LeftButton, pos=pos)
+
+        self.assertEqual(
+            chart._get_visible_series(), ["spot_market", "pvpc_cm"]
+        )
+
+    def test_highlight(self):
+        """Test the areas of the highlighted intervals."""
+        chart = self.chart
+        chart.show_chart(get_data([1.0] * 24, [(2, 4), (10, 10)]))
+
+        rect = QRectF(0, 0, 240, 100)
+        rects = chart._get_highlight_rects(rect)
+
+        # Each interval is 10 pixels wide
+        self.assertEqual(
+            [(r.left(), r.right()) for r in rects], [(20, 50), (100, 110)]
+        )
+
+        self.assertTrue(all(r.height() == rect.height() for r in rects))
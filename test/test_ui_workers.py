@@ -0,0 +1,104 @@
+"""Energy-ES - Tests - User Interface - Workers - Unit tests."""
+
+from threading import Event
+from time import monotonic
+from typing import Callable, Optional
+import unittest
+
+from PySide6.QtCore import QCoreApplication
+
+# We import "paths" to include the "src" directory in "sys.path" so that we can
+# import "energy_es".
+import paths
+
+from energy_es.ui.workers import ChartScheduler
+
+
+class UiWorkersTestCase(unittest.TestCase):
+    """Unit tests of the "energy_es.ui.workers" module."""
+
+    def setUp(self):
+        """Set up the application and a chart scheduler with a fake render
+        function that waits until it's released.
+        """
+        self.app = QCoreApplication.instance() or QCoreApplication([])
+
+        self.release = Event()
+        self.calls = []
+        self.fail = False
+
+        def render(
+            unit: str,
+            on_update: Optional[Callable[[], None]],
+            highlight: Optional[tuple[str, str, int]],
+            on_error: Optional[Callable[[str], None]]
+        ) -> tuple:
+            self.calls.append((unit, highlight))
+            self.release.wait(5)
+
+            if self.fail:
+                on_error("Connection error")
+
+            return unit, highlight
+
+        self.scheduler = ChartScheduler(render)
+        self.results = []
+        self.scheduler.success.connect(self.results.append)
+
+    def wait(self, count: int):
+        """Process the events until some jobs have finished.
+
+        :param count: Number of render calls to wait for.
+        """
+        deadline = monotonic() + 5
+
+        while (
+            monotonic() < deadline and
+            (len(self.calls) < count or self.scheduler._job is not None)
+        ):
+            self.app.processEvents()
+
+    def test_coalescing(self):
+        """Test that a burst of requests is coalesced into one pending job and
+        that only the newest result is emitted.
+        """
+        highlight = ("pvpc_pcb", "window", 2)
+
+        self.scheduler.request("k")
+        self.scheduler.request("m")
+        self.scheduler.request("k", highlight)
+        self.scheduler.request("m", highlight)
+
+        # Only the newest request waits for the running job
+        self.assertEqual(self.scheduler._pending[1:], ("m", highlight))
+
+        self.release.set()
+        self.wait(2)
+
+        self.assertEqual(self.calls, [("k", None), ("m", highlight)])
+        self.assertEqual(self.results, [("m", highlight)])
+
+    def test_cancel(self):
+        """Test that the result of a cancelled job is discarded."""
+        self.scheduler.request("k")
+        self.scheduler.request("m")
+        self.scheduler.cancel()
+
+        self.release.set()
+        self.wait(1)
+
+        self.assertEqual(self.calls, [("k", None)])
+        self.assertEqual(self.results, [])
+
+    def test_refresh_failed(self):
+        """Test that the errors updating stale data are emitted."""
+        errors = []
+        self.scheduler.refresh_failed.connect(errors.append)
+
+        self.fail = True
+        self.release.set()
+        self.scheduler.request("k")
+        self.wait(1)
+
+        self.assertEqual(errors, ["Connection error"])
+        self.assertEqual(self.results, [("k", None)])